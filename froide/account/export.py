@@ -1,10 +1,12 @@
 import json
 import os
-import tempfile
 import zipfile
 from datetime import timedelta
 
 from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.template.loader import render_to_string
 from django.urls import reverse
@@ -15,6 +17,7 @@ from django.utils.translation import override
 from crossdomainmedia import CrossDomainMediaAuth
 
 from froide.helper.csv_utils import get_dict
+from froide.helper.zip_utils import ChunkReader, get_zip_members, stream_zip
 
 from .tasks import start_export_task
 from .utils import send_mail_user
@@ -23,23 +26,73 @@ PURPOSE = "dataexport"
 EXPORT_MEDIA_PREFIX = "export"
 EXPORT_MAX_AGE = timedelta(days=7)
 EXPORT_LIMIT = timedelta(hours=6)
+EXPORT_PARTS_PREFIX = os.path.join(EXPORT_MEDIA_PREFIX, "parts")
+EXPORT_PROGRESS_CACHE_KEY = "froide:export_progress:{}"
 
 
 def get_path(token):
     return os.path.join(EXPORT_MEDIA_PREFIX, "{}.zip".format(token))
 
 
+def get_parts_path(token):
+    return os.path.join(EXPORT_PARTS_PREFIX, str(token))
+
+
+def get_checkpoint_path(token):
+    return os.path.join(get_parts_path(token), "checkpoint.json")
+
+
+def get_part_path(token, index):
+    return os.path.join(get_parts_path(token), "{}.zip".format(index))
+
+
+def get_callback_key(func):
+    return "{}.{}".format(func.__module__, func.__qualname__)
+
+
 class ExportRegistry:
+    """
+    Export callbacks yield (path, bytes or file) tuples for a user.
+    Callbacks registered with `get_parts` are called once per part
+    it returns, so large exports are written and resumed piecewise.
+    """
+
     def __init__(self):
-        self.callbacks = []
+        self.callbacks = {}
 
-    def register(self, func):
-        self.callbacks.append(func)
+    def register(self, func, get_parts=None):
+        self.callbacks[get_callback_key(func)] = (func, get_parts)
         return func
 
+    def get_export_parts(self, user):
+        for key, (_func, get_parts) in self.callbacks.items():
+            if get_parts is None:
+                yield [key, None]
+                continue
+            for part in get_parts(user):
+                yield [key, part]
+
+    def get_part_files(self, user, key, part):
+        func, _get_parts = self.callbacks[key]
+        if part is None:
+            return func(user)
+        return func(user, part=part)
+
     def get_export_files(self, user):
-        for callback in self.callbacks:
-            yield from callback(user)
+        for func, _get_parts in self.callbacks.values():
+            yield from func(user)
+
+
+def get_export_progress(user):
+    return cache.get(EXPORT_PROGRESS_CACHE_KEY.format(user.id))
+
+
+def set_export_progress(user, done, total):
+    cache.set(
+        EXPORT_PROGRESS_CACHE_KEY.format(user.id),
+        {"done": done, "total": total},
+        int(EXPORT_MAX_AGE.total_seconds()),
+    )
 
 
 def request_export(user):
@@ -89,6 +142,16 @@ def delete_export(token):
     path = get_path(token)
     if default_storage.exists(path):
         default_storage.delete(path)
+    delete_export_parts(token)
+
+
+def delete_export_parts(token):
+    parts_path = get_parts_path(token)
+    if not default_storage.exists(parts_path):
+        return
+    _, files = default_storage.listdir(parts_path)
+    for filename in files:
+        default_storage.delete(os.path.join(parts_path, filename))
 
 
 def delete_all_expired_exports():
@@ -99,14 +162,54 @@ def delete_all_expired_exports():
     AccessToken.objects.filter(purpose=PURPOSE, timestamp__lte=old_export_date).delete()
 
     _, files = default_storage.listdir(EXPORT_MEDIA_PREFIX)
-    for filename in files:
-        token = filename.replace(".zip", "")
+    tokens = [filename.replace(".zip", "") for filename in files]
+    if default_storage.exists(EXPORT_PARTS_PREFIX):
+        part_dirs, _ = default_storage.listdir(EXPORT_PARTS_PREFIX)
+        tokens.extend(part_dirs)
+    for token in set(tokens):
         if not AccessToken.objects.filter(
             purpose=PURPOSE, timestamp__gt=old_export_date, token=token
         ).exists():
             delete_export(token)
 
 
+def load_checkpoint(token):
+    path = get_checkpoint_path(token)
+    if not default_storage.exists(path):
+        return None
+    with default_storage.open(path, "rb") as f:
+        return json.load(f)
+
+
+def save_checkpoint(token, checkpoint):
+    path = get_checkpoint_path(token)
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    default_storage.save(path, ContentFile(json.dumps(checkpoint).encode("utf-8")))
+
+
+def save_zip(path, members):
+    """
+    Stream a zip of members into storage without a local copy.
+    """
+    if default_storage.exists(path):
+        default_storage.delete(path)
+    content = File(ChunkReader(stream_zip(members)), name=os.path.basename(path))
+    return default_storage.save(path, content)
+
+
+def get_part_members(user, key, part):
+    for path, content in registry.get_part_files(user, key, part):
+        yield os.path.join("export", path), content
+
+
+def get_export_members(part_names):
+    for name in part_names:
+        with default_storage.open(name, "rb") as f:
+            with zipfile.ZipFile(f) as zfile:
+                yield from get_zip_members(zfile)
+
+
 def create_export(user, notification_user=None):
     from froide.accesstoken.models import AccessToken
 
@@ -118,34 +221,30 @@ def create_export(user, notification_user=None):
         user=user, purpose=PURPOSE
     )
     token = access_token.token
+    checkpoint = None
     if not created:
-        delete_export(token)
-        token = AccessToken.objects.reset(user, purpose=PURPOSE)
-
-    export_file = tempfile.NamedTemporaryFile(delete=False)
-    try:
-        zfile = zipfile.ZipFile(export_file, "w")
-        for path, filebytes in registry.get_export_files(user):
-            zfile.writestr(os.path.join("export", path), filebytes)
-    except Exception:
-        zfile.close()
-        export_file.close()
-        os.remove(export_file.name)
-        raise
-    finally:
-        try:
-            zfile.close()
-        except ValueError:
-            pass
-
-    export_file.flush()
-    export_file.seek(0)
-
-    path = get_path(token)
-    default_storage.save(path, export_file)
-
-    export_file.close()
-    os.remove(export_file.name)
+        # Resume an interrupted export of this token
+        checkpoint = load_checkpoint(token)
+        if checkpoint is None:
+            delete_export(token)
+            token = AccessToken.objects.reset(user, purpose=PURPOSE)
+
+    if checkpoint is None:
+        checkpoint = {"parts": list(registry.get_export_parts(user)), "done": []}
+        save_checkpoint(token, checkpoint)
+
+    total = len(checkpoint["parts"])
+    for index in range(len(checkpoint["done"]), total):
+        set_export_progress(user, index, total)
+        key, part = checkpoint["parts"][index]
+        name = save_zip(get_part_path(token, index), get_part_members(user, key, part))
+        checkpoint["done"].append(name)
+        save_checkpoint(token, checkpoint)
+
+    set_export_progress(user, total, total)
+    save_zip(get_path(token), get_export_members(checkpoint["done"]))
+    delete_export_parts(token)
+    cache.delete(EXPORT_PROGRESS_CACHE_KEY.format(user.id))
 
     if notification_user is None or notification_user == user:
         email_template = "account/emails/export_ready.txt"
@@ -97,7 +97,8 @@ def make_account_private_task(user_id):
     account_made_private.send(sender=User, user=user)
 
 
-@celery_app.task
+# Redelivered after a worker crash, create_export resumes from its checkpoint
+@celery_app.task(acks_late=True)
 def start_export_task(user_id, notification_user_id=None):
     from .export import create_export
 
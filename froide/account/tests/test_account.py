@@ -1,4 +1,5 @@
 import re
+import zipfile
 from datetime import datetime, timedelta, timezone
 from importlib import reload
 from unittest import mock
@@ -9,6 +10,7 @@ from django.contrib.admin.sites import AdminSite
 from django.contrib.auth import get_user_model
 from django.contrib.messages.storage import default_storage
 from django.core import mail
+from django.core.files.storage import default_storage as file_storage
 from django.db import IntegrityError
 from django.test.utils import override_settings
 from django.urls import reverse
@@ -25,6 +27,7 @@ from froide.foirequestfollower.models import FoiRequestFollower
 from froide.publicbody.models import PublicBody
 
 from ..admin import UserAdmin
+from ..export import PURPOSE, create_export, get_path, load_checkpoint, registry
 from ..models import AccountBlocklist
 from ..services import VIP_TAG, AccountService
 from ..utils import merge_accounts
@@ -936,3 +939,34 @@ def test_unicode_name_redaction():
     repl = "NAME"
     redacted_name = account_service.apply_name_redaction(name, repl, unicode=False)
     assert redacted_name == "reply-NAME-NAME.pdf"
+
+
+@pytest.mark.django_db
+def test_create_export_resumes(world):
+    user = User.objects.get(username="sw")
+    get_part_files = registry.get_part_files
+    calls = []
+
+    def fail_on_second_part(user, key, part):
+        calls.append(key)
+        if len(calls) == 2:
+            raise IOError
+        return get_part_files(user, key, part)
+
+    with mock.patch.object(registry, "get_part_files", side_effect=fail_on_second_part):
+        with pytest.raises(IOError):
+            create_export(user)
+
+    token = AccessToken.objects.get_token_by_user(user, purpose=PURPOSE)
+    assert len(load_checkpoint(token)["done"]) == 1
+    assert len(mail.outbox) == 0
+
+    create_export(user)
+    assert AccessToken.objects.get_token_by_user(user, purpose=PURPOSE) == token
+    assert load_checkpoint(token) is None
+    assert len(mail.outbox) == 1
+    with file_storage.open(get_path(token), "rb") as f:
+        names = zipfile.ZipFile(f).namelist()
+    assert "export/account.json" in names
+    assert any(name.startswith("export/requests/") for name in names)
+    assert len(names) == len(set(names))
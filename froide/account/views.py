@@ -51,6 +51,7 @@ from .export import (
     ExportCrossDomainMediaAuth,
     get_export_access_token,
     get_export_access_token_by_token,
+    get_export_progress,
     request_export,
 )
 from .forms import (
@@ -579,6 +580,7 @@ def account_settings(
         context["user_delete_form"] = UserDeleteForm(request)
     if "change_form" not in context:
         context["change_form"] = UserChangeDetailsForm(request.user)
+    context["export_progress"] = get_export_progress(request.user)
     return render(request, "account/settings.html", context, status=status)
 
 
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.12 on 2026-10-18 16:05
+
+import datetime
+
+from django.db import migrations, models
+
+STATS_PERIOD = datetime.timedelta(weeks=5)
+
+
+def build_bounce_stats(apps, schema_editor):
+    Bounce = apps.get_model('bounce', 'Bounce')
+
+    min_day = (datetime.date.today() - STATS_PERIOD).isoformat()
+    batch = []
+    for bounce in Bounce.objects.all().iterator(chunk_size=1000):
+        stats = {}
+        for b in bounce.bounces:
+            day = b['timestamp'][:10]
+            if day < min_day:
+                continue
+            counts = stats.setdefault(b['bounce_type'], {})
+            counts[day] = counts.get(day, 0) + 1
+        if not stats:
+            continue
+        bounce.stats = stats
+        batch.append(bounce)
+        if len(batch) >= 1000:
+            Bounce.objects.bulk_update(batch, ['stats'])
+            batch = []
+    Bounce.objects.bulk_update(batch, ['stats'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bounce', '0002_auto_20181107_1950'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bounce',
+            name='stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(build_bounce_stats, migrations.RunPython.noop),
+    ]
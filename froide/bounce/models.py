@@ -1,11 +1,19 @@
+import logging
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.expressions import CombinedExpression
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .utils import add_to_bounce_stats
+
 User = get_user_model()
 
+logger = logging.getLogger(__name__)
+
 
 def convert_bounce_info(bounce_info):
     d = dict(bounce_info._asdict())
@@ -15,26 +23,77 @@ def convert_bounce_info(bounce_info):
 
 class BounceManager(models.Manager):
     def update_bounce(self, email, bounce_info):
-        email_lower = email.lower()
-        try:
-            bounce = Bounce.objects.get(email=email_lower)
-            bounce.last_update = timezone.now()
-            bounce.bounces.append(convert_bounce_info(bounce_info))
-            bounce.save()
-        except Bounce.DoesNotExist:
-            user = None
-            users = User.objects.filter(email__iexact=email_lower)
-            if len(users) > 1:
+        bounces = self.update_bounces([(email, bounce_info)])
+        return bounces[0] if bounces else None
+
+    def update_bounces(self, updates):
+        """
+        Record (email, bounce_info) pairs and return their bounces.
+        Known addresses are looked up and locked in one query, their
+        bounce lists are appended to in the database without loading them.
+        A failing update is logged and skipped without losing the others.
+        """
+        emails = {email.lower() for email, _bounce_info in updates}
+        result = []
+        with transaction.atomic():
+            # Locked so concurrent runs do not overwrite each other's stats
+            known = {
+                bounce.email: bounce
+                for bounce in self.defer("bounces")
+                .filter(email__in=emails)
+                .order_by("id")
+                .select_for_update()
+            }
+            for email, bounce_info in updates:
                 try:
-                    user = User.objects.get(email=email)
-                except User.DoesNotExist:
-                    pass
-            if users and not user:
-                user = users[0]
-            bounce = Bounce.objects.create(
-                email=email, user=user, bounces=[convert_bounce_info(bounce_info)]
-            )
-        return bounce
+                    with transaction.atomic():
+                        info = convert_bounce_info(bounce_info)
+                        bounce = known.get(email.lower())
+                        if bounce is None:
+                            bounce = self.create_bounce(email, info)
+                            known[email.lower()] = bounce
+                        else:
+                            self.append_bounce(bounce, info)
+                except Exception:
+                    logger.exception("Could not record bounce of %s", email)
+                    continue
+                result.append(bounce)
+        return result
+
+    def create_bounce(self, email, info):
+        email_lower = email.lower()
+        user = None
+        users = User.objects.filter(email__iexact=email_lower)
+        if len(users) > 1:
+            try:
+                user = User.objects.get(email=email)
+            except User.DoesNotExist:
+                pass
+        if users and not user:
+            user = users[0]
+        return Bounce.objects.create(
+            email=email,
+            user=user,
+            bounces=[info],
+            stats=add_to_bounce_stats({}, info["bounce_type"], info["timestamp"]),
+        )
+
+    def append_bounce(self, bounce, info):
+        bounce.last_update = timezone.now()
+        add_to_bounce_stats(bounce.stats, info["bounce_type"], info["timestamp"])
+        self.filter(id=bounce.id).update(
+            bounces=CombinedExpression(
+                F("bounces"),
+                "||",
+                Value([info], output_field=models.JSONField()),
+                output_field=models.JSONField(),
+            ),
+            stats=bounce.stats,
+            last_update=bounce.last_update,
+        )
+        if "bounces" in bounce.__dict__:
+            # Otherwise deferred and loaded with the new bounce on access
+            bounce.bounces.append(info)
 
 
 class Bounce(models.Model):
@@ -44,6 +103,8 @@ class Bounce(models.Model):
         settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE
     )
     bounces = models.JSONField(default=list, blank=True)
+    # Daily bounce counts per bounce type of recent weeks
+    stats = models.JSONField(default=dict, blank=True)
     last_update = models.DateTimeField(default=timezone.now)
 
     objects = BounceManager()
@@ -1,9 +1,11 @@
 import os
 import unittest
 from datetime import datetime, timedelta
+from unittest import mock
 
 from django.db import connection
 from django.test import TestCase
+from django.utils import timezone
 
 from froide.foirequest.tests.factories import UserFactory
 from froide.helper.email_parsing import EmailAddress, parse_email
@@ -15,6 +17,7 @@ from .utils import (
     check_deactivation_condition,
     get_recipient_address_from_bounce,
     make_bounce_address,
+    process_bounce_mails,
 )
 
 TEST_DATA_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "testdata"))
@@ -53,6 +56,35 @@ class BounceTest(TestCase):
         self.assertIsNone(bounce.user)
         self.assertEqual(len(bounce.bounces), 1)
 
+    def test_bounce_stats(self):
+        with open(p("bounce_001.txt"), "rb") as f:
+            email = parse_email(f)
+
+        now = timezone.now()
+        bounce_info = email.bounce_info._replace(timestamp=now)
+        bounces = Bounce.objects.update_bounces(
+            [(self.email, bounce_info), (self.email, bounce_info)]
+        )
+        self.assertIs(bounces[0], bounces[1])
+        bounce = Bounce.objects.get(email=self.email)
+        self.assertEqual(len(bounce.bounces), 2)
+        day = now.date().isoformat()
+        self.assertEqual(bounce.stats, {BounceType.HARD.value: {day: 2}})
+        self.assertTrue(check_deactivation_condition(bounce))
+
+    def test_process_bounce_mails_skips_broken_mail(self):
+        with open(p("bounce_001.txt"), "rb") as f:
+            email = parse_email(f)
+        email.to = [EmailAddress("", make_bounce_address(self.email))]
+
+        with mock.patch(
+            "froide.bounce.utils.parse_email", side_effect=[ValueError, email]
+        ):
+            process_bounce_mails([b"broken", b"bounce"])
+
+        bounce = Bounce.objects.get(email=self.email)
+        self.assertEqual(len(bounce.bounces), 1)
+
     def test_bounce_parsing_2(self):
         with open(p("bounce_002.txt"), "rb") as f:
             email = parse_email(f)
@@ -6,6 +6,7 @@ https://en.wikipedia.org/wiki/Variable_envelope_return_path
 
 import base64
 import datetime
+import logging
 import time
 from contextlib import closing
 from io import BytesIO
@@ -29,11 +30,14 @@ from froide.helper.email_utils import (
     BounceType,
     find_status_from_diagnostic,
     get_mail_client,
+    get_unread_mail_batches,
     get_unread_mails,
 )
 
 from .signals import email_bounced, email_unsubscribed, user_email_bounced
 
+logger = logging.getLogger(__name__)
+
 BOUNCE_FORMAT = settings.FROIDE_CONFIG["bounce_format"]
 UNSUBSCRIBE_FORMAT = settings.FROIDE_CONFIG["unsubscribe_format"]
 UNSUBSCRIBE_PREFIX = "unsubscribe-"
@@ -50,6 +54,10 @@ HARD_BOUNCE_PERIOD = datetime.timedelta(seconds=5 * WEEK)
 SOFT_BOUNCE_COUNT = 5
 SOFT_BOUNCE_PERIOD = datetime.timedelta(seconds=5 * WEEK)
 
+# Daily bounce counts are kept for the longest period
+BOUNCE_STATS_PERIOD = max(HARD_BOUNCE_PERIOD, SOFT_BOUNCE_PERIOD)
+BOUNCE_BATCH_SIZE = 50
+
 
 def b32_encode(s):
     return base64.b32encode(s).strip(b"=")
@@ -192,8 +200,10 @@ def check_bounce_mails():
         settings.BOUNCE_EMAIL_ACCOUNT_PASSWORD,
         ssl=settings.BOUNCE_EMAIL_USE_SSL,
     ) as client:
-        for _mail_uid, rfc_data in get_unread_mails(client, flag=False):
-            process_bounce_mail(rfc_data)
+        for batch in get_unread_mail_batches(
+            client, flag=False, batch_size=BOUNCE_BATCH_SIZE
+        ):
+            process_bounce_mails([rfc_data for _mail_uid, rfc_data in batch])
 
 
 def check_unsubscribe_mails():
@@ -229,23 +239,39 @@ def process_unsubscribe_mail(mail_bytes):
 
 
 def process_bounce_mail(mail_bytes):
-    with closing(BytesIO(mail_bytes)) as stream:
-        email = parse_email(stream)
-
-    bounce_info = email.bounce_info
-    if bounce_info.is_bounce:
-        add_bounce_mail(email)
-    else:
-        if email.is_auto_reply:
-            return
-        mail_managers("No bounce detected in bounce mailbox", email.subject)
+    process_bounce_mails([mail_bytes])
 
 
-def add_bounce_mail(email):
+def process_bounce_mails(mails):
+    """
+    Record the bounces of a batch of bounce mailbox mails at once.
+    """
+    updates = []
+    for mail_bytes in mails:
+        # Mails of the batch are already marked as seen,
+        # a broken mail must not lose the others
+        try:
+            with closing(BytesIO(mail_bytes)) as stream:
+                email = parse_email(stream)
+
+            bounce_info = email.bounce_info
+            if bounce_info.is_bounce:
+                updates.extend(
+                    (recipient, bounce_info)
+                    for recipient in get_bounce_recipients(email)
+                )
+            elif not email.is_auto_reply:
+                mail_managers("No bounce detected in bounce mailbox", email.subject)
+        except Exception:
+            logger.exception("Could not process bounce mail")
+    update_bounces(updates)
+
+
+def get_bounce_recipients(email):
     recipient_list = {get_recipient_address_from_bounce(x.email) for x in email.to}
     for recipient, status in recipient_list:
         if status:
-            update_bounce(email, recipient)
+            yield recipient
         else:
             mail_managers(
                 "Bad bounce address found",
@@ -253,36 +279,70 @@ def add_bounce_mail(email):
             )
 
 
+def add_bounce_mail(email):
+    update_bounces(
+        [(recipient, email.bounce_info) for recipient in get_bounce_recipients(email)]
+    )
+
+
 def update_bounce(email, recipient):
+    update_bounces([(recipient, email.bounce_info)])
+
+
+def update_bounces(updates):
     from .models import Bounce
 
-    bounce = Bounce.objects.update_bounce(recipient, email.bounce_info)
-    should_deactivate = check_deactivation_condition(bounce)
+    if not updates:
+        return
 
-    email_bounced.send(
-        sender=Bounce, bounce=bounce, should_deactivate=should_deactivate
-    )
-    if bounce.user:
-        user_email_bounced.send(
-            sender=Bounce, bounce=bounce, should_deactivate=should_deactivate
-        )
+    bounces = Bounce.objects.update_bounces(updates)
+    for bounce in bounces:
+        try:
+            should_deactivate = check_deactivation_condition(bounce)
+
+            email_bounced.send(
+                sender=Bounce, bounce=bounce, should_deactivate=should_deactivate
+            )
+            if bounce.user:
+                user_email_bounced.send(
+                    sender=Bounce, bounce=bounce, should_deactivate=should_deactivate
+                )
+        except Exception:
+            logger.exception("Could not handle bounce of %s", bounce.email)
+
+
+def add_to_bounce_stats(stats, bounce_type, timestamp):
+    """
+    Count a bounce in the daily counts per bounce type and drop
+    days that are older than all bounce periods.
+    """
+    counts = stats.setdefault(BounceType(bounce_type).value, {})
+    day = timestamp[:10]
+    counts[day] = counts.get(day, 0) + 1
+    min_day = (datetime.date.today() - BOUNCE_STATS_PERIOD).isoformat()
+    for old_day in [d for d in counts if d < min_day]:
+        del counts[old_day]
+    return stats
+
+
+def make_bounce_stats(bounces):
+    stats = {}
+    for b in bounces:
+        add_to_bounce_stats(stats, b["bounce_type"], b["timestamp"])
+    return stats
 
 
-def get_bounce_stats(bounces, bounce_type=BounceType.HARD, start_date=None):
-    filtered_bounces = [
-        datetime.datetime.strptime(b["timestamp"][:19], "%Y-%m-%dT%H:%M:%S")
-        for b in bounces
-        if b["bounce_type"] == bounce_type
-    ]
-    filtered_bounces = [
-        b for b in filtered_bounces if b >= start_date or start_date is None
-    ]
-    return len(filtered_bounces)
+def get_bounce_stats(stats, bounce_type=BounceType.HARD, start_date=None):
+    counts = stats.get(BounceType(bounce_type).value, {})
+    if start_date is None:
+        return sum(counts.values())
+    start_day = start_date.date().isoformat()
+    return sum(count for day, count in counts.items() if day >= start_day)
 
 
-def check_bounce_status(bounces, bounce_type, period, threshold):
+def check_bounce_status(stats, bounce_type, period, threshold):
     start_date = datetime.datetime.now() - period
-    count = get_bounce_stats(bounces, bounce_type=bounce_type, start_date=start_date)
+    count = get_bounce_stats(stats, bounce_type=bounce_type, start_date=start_date)
     if count >= MAX_BOUNCE_COUNT:
         return True
     return count >= threshold
@@ -292,14 +352,18 @@ def check_deactivation_condition(bounce):
     """
     Decide if current bounce state warrants deactivation
     """
+    stats = bounce.stats
+    if not stats:
+        # Not yet counted, e.g. unsaved bounce
+        stats = make_bounce_stats(bounce.bounces)
 
     if check_bounce_status(
-        bounce.bounces, BounceType.HARD, HARD_BOUNCE_PERIOD, HARD_BOUNCE_COUNT
+        stats, BounceType.HARD, HARD_BOUNCE_PERIOD, HARD_BOUNCE_COUNT
     ):
         return True
 
     if check_bounce_status(
-        bounce.bounces, BounceType.SOFT, SOFT_BOUNCE_PERIOD, SOFT_BOUNCE_COUNT
+        stats, BounceType.SOFT, SOFT_BOUNCE_PERIOD, SOFT_BOUNCE_COUNT
     ):
         return True
 
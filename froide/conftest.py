@@ -1,6 +1,7 @@
 import os
 
 from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.db.models import signals
 from django.utils.translation import activate
 
@@ -71,6 +72,12 @@ def request_throttle_settings(settings):
     settings.FROIDE_CONFIG = froide_config
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    yield
+    cache.clear()
+
+
 @pytest.fixture(autouse=True)
 def set_default_language():
     activate("en")
@@ -2,6 +2,7 @@ from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.test import RequestFactory
 from django.urls import reverse
+from django.utils.text import Truncator
 from django.utils.translation import gettext_lazy as _
 
 from froide.helper.search.queryset import SearchQuerySetWrapper
@@ -17,6 +18,11 @@ class DocumentAlertConfiguration(AlertConfiguration):
     def search(
         cls, query, start_date, user=None, item_count=5, **kwargs
     ) -> list[AlertEvent]:
+        sqs = cls.get_search(query, start_date, user=user)
+        return cls.get_results(sqs, item_count=item_count)
+
+    @classmethod
+    def get_search(cls, query, start_date, user=None, **kwargs):
         from .documents import PageDocument
         from .filters import PageDocumentFilterset
         from .models import Document
@@ -32,12 +38,18 @@ class DocumentAlertConfiguration(AlertConfiguration):
         request = request_factory.get("/")
         request.user = AnonymousUser()
 
+        data = {"q": query}
+        if start_date is not None:
+            data["created_at_after"] = start_date.date().strftime("%Y-%m-%d")
         filtered = PageDocumentFilterset(
-            {"q": query, "created_at_after": start_date.date().strftime("%Y-%m-%d")},
+            data,
             queryset=sqs,
             request=request,
         )
-        sqs = filtered.qs
+        return filtered.qs
+
+    @classmethod
+    def get_results(cls, sqs, item_count=5) -> list[AlertEvent]:
         count = sqs.count()
         qs = sqs.to_queryset()
         qs = qs.select_related("document")
@@ -56,6 +68,37 @@ class DocumentAlertConfiguration(AlertConfiguration):
             ],
         )
 
+    @classmethod
+    def get_document(cls):
+        from .documents import PageDocument
+
+        return PageDocument
+
+    @classmethod
+    def get_match_results(cls, object_ids) -> list[AlertEvent]:
+        from .models import Page
+
+        pages = Page.objects.select_related("document").in_bulk(object_ids)
+        return [
+            AlertEvent(
+                title=pages[pk].document.title,
+                url=settings.SITE_URL + pages[pk].get_absolute_url(),
+                content=Truncator(pages[pk].content).words(30),
+            )
+            for pk in object_ids
+            if pk in pages and pages[pk].document.is_public()
+        ]
+
+    @classmethod
+    def get_match_dates(cls, object_ids):
+        from .models import Page
+
+        # Same as PageDocument.prepare_created_at
+        qs = Page.objects.filter(id__in=object_ids).values_list(
+            "id", "document__published_at", "document__created_at"
+        )
+        return {pk: published_at or created_at for pk, published_at, created_at in qs}
+
     @classmethod
     def get_search_link(cls, query, start_date) -> str:
         base_url = settings.SITE_URL + reverse("document-search")
@@ -122,6 +122,8 @@ class FoiMessageInline(admin.StackedInline):
         "content_rendered_anon",
         "redacted_content_auth",
         "redacted_content_anon",
+        "redacted_subject_auth",
+        "redacted_subject_anon",
     )
 
 
@@ -581,6 +583,8 @@ class FoiMessageAdmin(admin.ModelAdmin):
         "content_rendered_anon",
         "redacted_content_auth",
         "redacted_content_anon",
+        "redacted_subject_auth",
+        "redacted_subject_anon",
     )
     actions = [
         "mark_as_not_sent",
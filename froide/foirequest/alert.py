@@ -1,5 +1,8 @@
 from django.conf import settings
+from django.db.models import Min, Q
+from django.db.models.functions import Coalesce
 from django.urls import reverse
+from django.utils.text import Truncator
 from django.utils.translation import gettext_lazy as _
 
 from froide.helper.search.queryset import SearchQuerySetWrapper
@@ -15,6 +18,11 @@ class FoiRequestAlertConfiguration(AlertConfiguration):
     def search(
         cls, query, start_date, item_count=5, user=None, **kwargs
     ) -> list[AlertEvent]:
+        sqs = cls.get_search(query, start_date, user=user)
+        return cls.get_results(sqs, item_count=item_count)
+
+    @classmethod
+    def get_search(cls, query, start_date, user=None, **kwargs):
         from .documents import FoiRequestDocument
         from .filters import FoiRequestFilterSet
         from .models import FoiRequest
@@ -26,11 +34,14 @@ class FoiRequestAlertConfiguration(AlertConfiguration):
         s = s.sort("-first_message")
         sqs = SearchQuerySetWrapper(s, FoiRequest)
 
-        filtered = FoiRequestFilterSet(
-            {"q": query, "first_after": start_date.date().strftime("%Y-%m-%d")},
-            queryset=sqs,
-        )
-        sqs = filtered.qs
+        data = {"q": query}
+        if start_date is not None:
+            data["first_after"] = start_date.date().strftime("%Y-%m-%d")
+        filtered = FoiRequestFilterSet(data, queryset=sqs)
+        return filtered.qs
+
+    @classmethod
+    def get_results(cls, sqs, item_count=5) -> list[AlertEvent]:
         count = sqs.count()
         qs = sqs.to_queryset()
         qs = qs.select_related("public_body", "jurisdiction")
@@ -49,6 +60,46 @@ class FoiRequestAlertConfiguration(AlertConfiguration):
             ],
         )
 
+    @classmethod
+    def get_document(cls):
+        from .documents import FoiRequestDocument
+
+        return FoiRequestDocument
+
+    @classmethod
+    def get_match_results(cls, object_ids) -> list[AlertEvent]:
+        from .models import FoiRequest
+
+        foirequests = FoiRequest.published.in_bulk(object_ids)
+        return [
+            AlertEvent(
+                title=foirequests[pk].title,
+                url=foirequests[pk].get_absolute_domain_url(),
+                content=Truncator(foirequests[pk].description).words(30),
+            )
+            for pk in object_ids
+            if pk in foirequests
+        ]
+
+    @classmethod
+    def get_match_dates(cls, object_ids):
+        from .models import FoiRequest
+
+        # Same as FoiRequest.first_message
+        qs = (
+            FoiRequest.published.filter(id__in=object_ids)
+            .annotate(
+                first_sent=Coalesce(
+                    Min(
+                        "foimessage__timestamp", filter=Q(foimessage__is_response=False)
+                    ),
+                    "created_at",
+                )
+            )
+            .values_list("id", "first_sent")
+        )
+        return dict(qs)
+
     @classmethod
     def get_search_link(cls, query, start_date) -> str:
         base_url = settings.SITE_URL + reverse("foirequest-list")
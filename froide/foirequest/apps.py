@@ -43,6 +43,8 @@ class FoiRequestConfig(AppConfig):
             cancel_user,
             depublish_requests,
             export_user_data,
+            export_user_requests,
+            get_export_request_parts,
             make_account_private,
             merge_user,
         )
@@ -51,6 +53,7 @@ class FoiRequestConfig(AppConfig):
         account_canceled.connect(cancel_user)
         account_merged.connect(merge_user)
         account_made_private.connect(make_account_private)
+        registry.register(export_user_requests, get_parts=get_export_request_parts)
         registry.register(export_user_data)
         search_registry.register(add_search)
         comment_will_be_posted.connect(signals.pre_comment_foimessage)
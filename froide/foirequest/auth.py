@@ -1,4 +1,3 @@
-from functools import lru_cache
 from typing import List
 
 from django.conf import settings
@@ -16,6 +15,7 @@ from rest_framework.request import Request
 from rest_framework.viewsets import ViewSet
 
 from froide.helper.auth import (
+    cache_per_request,
     can_manage_object,
     can_moderate_object,
     can_read_object,
@@ -136,7 +136,7 @@ def get_read_foiattachment_queryset(request: HttpRequest, queryset=None):
     )
 
 
-@lru_cache()
+@cache_per_request
 def can_read_foirequest(
     foirequest: FoiRequest, request: HttpRequest, allow_code=True
 ) -> bool:
@@ -151,7 +151,7 @@ def can_read_foirequest(
     return False
 
 
-@lru_cache()
+@cache_per_request
 def can_read_foirequest_authenticated(
     foirequest: FoiRequest, request: HttpRequest, allow_code=True
 ) -> bool:
@@ -185,7 +185,7 @@ def can_read_foiproject(foiproject: FoiProject, request: HttpRequest) -> bool:
     return can_read_object(foiproject, request)
 
 
-@lru_cache()
+@cache_per_request
 def can_read_foiproject_authenticated(
     foiproject: FoiProject, request: HttpRequest
 ) -> bool:
@@ -195,7 +195,7 @@ def can_read_foiproject_authenticated(
     )
 
 
-@lru_cache()
+@cache_per_request
 def can_write_foirequest(foirequest: FoiRequest, request: HttpRequest) -> bool:
     if can_write_object(foirequest, request, scope=FoiRequestScope.WRITE_REQUEST):
         return True
@@ -205,7 +205,7 @@ def can_write_foirequest(foirequest: FoiRequest, request: HttpRequest) -> bool:
     return False
 
 
-@lru_cache()
+@cache_per_request
 def can_moderate_foirequest(foirequest: FoiRequest, request: HttpRequest) -> bool:
     if not can_read_foirequest(foirequest, request):
         return False
@@ -307,16 +307,6 @@ def is_attachment_public(foirequest: FoiRequest, attachment: FoiAttachment) -> b
     return can_read_object(foirequest) and attachment.approved
 
 
-def clear_lru_caches():
-    for f in (
-        can_write_foirequest,
-        can_read_foirequest,
-        can_read_foirequest_authenticated,
-        can_moderate_foirequest,
-    ):
-        f.cache_clear()
-
-
 def has_attachment_access(
     request: HttpRequest, foirequest: FoiRequest, attachment: FoiAttachment
 ) -> bool:
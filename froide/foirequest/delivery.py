@@ -0,0 +1,177 @@
+"""
+Routing index that resolves recipients and senders of incoming mail
+to requests and known spam senders with a fixed number of queries.
+
+Results derived from deferred messages are cached under a version
+that is bumped whenever deferred messages change.
+"""
+
+import hashlib
+from typing import Dict, Iterable, Optional, Set
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from froide.helper.name_generator import get_name_from_number
+
+from .models import DeferredMessage, FoiRequest
+
+ROUTING_CACHE_VERSION_KEY = "froide:delivery_routing:version"
+ROUTING_CACHE_TIMEOUT = 60 * 60
+# Cached marker for addresses that could not be resolved
+UNRESOLVED = 0
+
+
+def get_request_id_from_mail(email: str) -> Optional[int]:
+    """
+    Parse request id from alternative addresses like hero_123@domain
+    """
+    name, _domain = email.split("@", 1)
+    hero, num = name.rsplit("_", 1)
+    try:
+        num = int(num)
+    except ValueError:
+        return None
+    if get_name_from_number(num) != hero:
+        return None
+    return num
+
+
+def get_routing_version() -> int:
+    return cache.get_or_set(ROUTING_CACHE_VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_routing_cache():
+    try:
+        cache.incr(ROUTING_CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(ROUTING_CACHE_VERSION_KEY, 1, timeout=None)
+
+
+def make_cache_key(kind: str, email: str) -> str:
+    digest = hashlib.md5(email.encode("utf-8")).hexdigest()
+    return "froide:delivery_routing:{}:{}".format(kind, digest)
+
+
+class DeliveryRoutingIndex:
+    def __init__(
+        self,
+        recipient_request_ids: Dict[str, int],
+        spam_senders: Set[str],
+        requests: Dict[int, FoiRequest],
+    ):
+        self.recipient_request_ids = recipient_request_ids
+        self.spam_senders = spam_senders
+        self.requests = requests
+
+    @classmethod
+    def build(
+        cls, recipient_emails: Iterable[str], sender_emails: Iterable[str]
+    ) -> "DeliveryRoutingIndex":
+        recipient_emails = set(recipient_emails)
+        sender_emails = set(sender_emails)
+
+        hero_request_ids = {}
+        secret_addresses = set()
+        for email in recipient_emails:
+            if "_" in email:
+                request_id = get_request_id_from_mail(email)
+                if request_id is not None:
+                    hero_request_ids[email] = request_id
+            else:
+                secret_addresses.add(email)
+
+        # Only results derived from deferred messages are cached
+        version = get_routing_version()
+        deferred_keys = {make_cache_key("deferred", e): e for e in recipient_emails}
+        sender_keys = {make_cache_key("sender", e): e for e in sender_emails}
+        cached = cache.get_many(
+            list(deferred_keys) + list(sender_keys), version=version
+        )
+        deferred_request_ids = {
+            deferred_keys[key]: value
+            for key, value in cached.items()
+            if key in deferred_keys
+        }
+
+        requests = FoiRequest.objects.filter(
+            Q(id__in=hero_request_ids.values())
+            | Q(secret_address__in=secret_addresses)
+            | Q(id__in=[x for x in deferred_request_ids.values() if x != UNRESOLVED])
+        ).in_bulk()
+        request_id_by_secret = {r.secret_address: r.id for r in requests.values()}
+
+        recipient_request_ids = {}
+        missing_recipients = set()
+        for email in recipient_emails:
+            request_id = hero_request_ids.get(email) or request_id_by_secret.get(email)
+            if request_id is None or request_id not in requests:
+                request_id = deferred_request_ids.get(email)
+            if request_id is None:
+                missing_recipients.add(email)
+            else:
+                recipient_request_ids[email] = request_id
+
+        to_cache = {}
+        if missing_recipients:
+            resolved = cls.resolve_deferred_recipients(missing_recipients)
+            recipient_request_ids.update(resolved)
+            to_cache.update(
+                {make_cache_key("deferred", e): v for e, v in resolved.items()}
+            )
+            new_request_ids = set(resolved.values()) - set(requests) - {UNRESOLVED}
+            if new_request_ids:
+                requests.update(FoiRequest.objects.in_bulk(new_request_ids))
+
+        spam_senders = {
+            email for key, email in sender_keys.items() if cached.get(key) is True
+        }
+        missing_senders = {
+            email for key, email in sender_keys.items() if key not in cached
+        }
+        if missing_senders:
+            new_spam_senders = set(
+                DeferredMessage.objects.filter(
+                    sender__in=missing_senders, spam=True
+                ).values_list("sender", flat=True)
+            )
+            spam_senders |= new_spam_senders
+            to_cache.update(
+                {
+                    make_cache_key("sender", e): e in new_spam_senders
+                    for e in missing_senders
+                }
+            )
+
+        if to_cache:
+            cache.set_many(to_cache, timeout=ROUTING_CACHE_TIMEOUT, version=version)
+
+        return cls(recipient_request_ids, spam_senders, requests)
+
+    @staticmethod
+    def resolve_deferred_recipients(recipient_emails: Set[str]) -> Dict[str, int]:
+        """
+        Find previous non-spam matching, only unambiguous matches resolve
+        """
+        deferred_request_ids: Dict[str, Set[int]] = {}
+        deferreds = DeferredMessage.objects.filter(
+            recipient__in=recipient_emails, request__isnull=False, spam=False
+        ).values_list("recipient", "request_id")
+        for recipient, request_id in deferreds:
+            deferred_request_ids.setdefault(recipient, set()).add(request_id)
+
+        result = {}
+        for email in recipient_emails:
+            request_ids = deferred_request_ids.get(email, set())
+            if len(request_ids) == 1:
+                result[email] = next(iter(request_ids))
+            else:
+                result[email] = UNRESOLVED
+        return result
+
+    def is_spam_sender(self, sender_email: str) -> bool:
+        return sender_email in self.spam_senders
+
+    def find_foirequest(self, recipient_email: str) -> Optional[FoiRequest]:
+        request_id = self.recipient_request_ids.get(recipient_email, UNRESOLVED)
+        return self.requests.get(request_id)
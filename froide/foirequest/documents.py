@@ -1,3 +1,7 @@
+from typing import List
+
+from django.core.cache import cache
+from django.db.models import Prefetch
 from django.template.loader import render_to_string
 
 from django_elasticsearch_dsl import Document, fields
@@ -10,13 +14,67 @@ from froide.helper.search import (
     get_text_analyzer,
 )
 
-from .models import FoiRequest
+from .models import FoiAttachment, FoiMessage, FoiRequest
 
 index = get_index("foirequest")
 analyzer = get_text_analyzer()
 search_analyzer = get_search_analyzer()
 search_quote_analyzer = get_search_quote_analyzer()
 
+MESSAGE_TEXT_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def get_message_text_cache_key(message_id: int) -> str:
+    return "froide:foimessage:search_text:{}".format(message_id)
+
+
+def clear_message_text_cache(message_id: int):
+    cache.delete(get_message_text_cache_key(message_id))
+
+
+def get_message_text_fragments(foirequest: FoiRequest) -> List[str]:
+    """
+    Return search text of all messages of the request.
+    Fragments are cached per message and only re-rendered for
+    messages that were modified since.
+    """
+    versions = list(
+        foirequest.foimessage_set.filter(is_draft=False)
+        .order_by("timestamp")
+        .values_list("id", "last_modified_at")
+    )
+    keys = {
+        message_id: get_message_text_cache_key(message_id) for message_id, _ in versions
+    }
+    cached = cache.get_many(list(keys.values()))
+
+    fragments = {}
+    stale_ids = []
+    for message_id, last_modified_at in versions:
+        entry = cached.get(keys[message_id])
+        if entry is not None and entry[0] == last_modified_at:
+            fragments[message_id] = entry[1]
+        else:
+            stale_ids.append(message_id)
+
+    if stale_ids:
+        messages = FoiMessage.objects.filter(id__in=stale_ids).prefetch_related(
+            Prefetch(
+                "foiattachment_set",
+                queryset=FoiAttachment.objects.only("id", "name", "belongs_to_id"),
+            )
+        )
+        to_cache = {}
+        for message in messages:
+            text = render_to_string(
+                "foirequest/search/foimessage_text.txt", {"message": message}
+            )
+            fragments[message.id] = text
+            to_cache[keys[message.id]] = (message.last_modified_at, text)
+        cache.set_many(to_cache, MESSAGE_TEXT_CACHE_TIMEOUT)
+
+    return [fragments[message_id] for message_id, _ in versions]
+
 
 @registry.register_document
 @index.document
@@ -71,11 +129,13 @@ class FoiRequestDocument(Document):
         return FoiRequest.objects.select_related(
             "jurisdiction",
             "public_body",
-        )
+            "public_body__classification",
+        ).prefetch_related("tags", "public_body__categories")
 
     def prepare_content(self, obj):
         return render_to_string(
-            "foirequest/search/foirequest_text.txt", {"object": obj}
+            "foirequest/search/foirequest_text.txt",
+            {"object": obj, "message_fragments": get_message_text_fragments(obj)},
         )
 
     def prepare_tags(self, obj):
@@ -1,11 +1,18 @@
 import base64
+import imaplib
+import logging
+import os
 import random
-import zipfile
+import time
+import uuid
 from contextlib import closing, contextmanager
+from dataclasses import dataclass, field
 from io import BytesIO
 from typing import Iterator, Optional, Tuple
 
 from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.mail import EmailMessage, get_connection, mail_managers
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
@@ -15,15 +22,22 @@ from froide.foirequest.models import DeferredMessage, FoiMessage, FoiRequest
 from froide.helper.email_parsing import ParsedEmail, parse_email, parse_email_address
 from froide.helper.email_utils import (
     get_mail_client,
+    get_pooled_mail_client,
+    get_unread_mail_batches,
     get_unread_mails,
     make_address,
     unflag_mail,
+    wait_for_new_mail,
 )
 from froide.helper.name_generator import get_name_from_number
+from froide.helper.zip_utils import stream_zip
 from froide.publicbody.models import PublicBody
 
+from .delivery import DeliveryRoutingIndex, get_request_id_from_mail
 from .utils import get_foi_mail_domains, get_publicbody_for_email
 
+logger = logging.getLogger(__name__)
+
 unknown_foimail_subject = _("Unknown FoI-Mail Recipient")
 unknown_foimail_message = _(
     """We received an FoI mail from <%(from_address)s> to this address: %(address)s.
@@ -38,6 +52,7 @@ Please investigate! %(url)s
 )
 
 DSN_RCPT_OPTIONS = ["NOTIFY=SUCCESS,DELAY,FAILURE"]
+MAIL_SPOOL_PREFIX = "mailspool"
 
 
 def send_foi_mail(
@@ -110,6 +125,24 @@ def _process_mail(mail_bytes, mail_uid=None, manual=False):
             unflag_mail(mailbox, mail_uid)
 
 
+def spool_mail(mail_bytes: bytes) -> str:
+    """
+    Store raw mail in storage so tasks only need to carry the path
+    """
+    path = os.path.join(MAIL_SPOOL_PREFIX, "{}.eml".format(uuid.uuid4().hex))
+    return default_storage.save(path, ContentFile(mail_bytes))
+
+
+def read_spooled_mail(spool_path: str) -> bytes:
+    with default_storage.open(spool_path, "rb") as f:
+        return f.read()
+
+
+def delete_spooled_mail(spool_path: str):
+    if default_storage.exists(spool_path):
+        default_storage.delete(spool_path)
+
+
 def create_deferred(
     secret_mail: str,
     mail_bytes: bytes,
@@ -158,14 +191,8 @@ def get_alternative_mail(req):
 
 def get_foirequest_from_mail(email: str) -> Optional[FoiRequest]:
     if "_" in email:
-        name, domain = email.split("@", 1)
-        hero, num = name.rsplit("_", 1)
-        try:
-            num = int(num)
-        except ValueError:
-            return None
-        hero_name = get_name_from_number(num)
-        if hero_name != hero:
+        num = get_request_id_from_mail(email)
+        if num is None:
             return None
         try:
             return FoiRequest.objects.get(pk=num)
@@ -185,7 +212,7 @@ class DeferredMessageNeeded(Exception):
         super().__init__(*args, **kwargs)
 
 
-def _deliver_mail(email: ParsedEmail, mail_bytes=None, manual=False):
+def get_foi_recipients(email: ParsedEmail):
     received_list = (
         email.to + email.cc + email.resent_to + email.resent_cc + email.x_original_to
     )
@@ -199,9 +226,21 @@ def _deliver_mail(email: ParsedEmail, mail_bytes=None, manual=False):
     received_list = [r for r in received_list if mail_filter(r)]
 
     # normalize to first FOI_EMAIL_DOMAIN
-    received_list = [x.replace_email_domain(domains[0]) for x in received_list]
+    return [x.replace_email_domain(domains[0]) for x in received_list]
+
 
+def _deliver_mail(
+    email: ParsedEmail,
+    mail_bytes=None,
+    manual=False,
+    routing: Optional[DeliveryRoutingIndex] = None,
+):
+    received_list = get_foi_recipients(email)
     sender_email = email.from_.email
+    if routing is None:
+        routing = DeliveryRoutingIndex.build(
+            [r.email for r in received_list], [sender_email]
+        )
 
     if not received_list:
         # Create a deferred message if the message is otherwise not handled
@@ -221,7 +260,11 @@ def _deliver_mail(email: ParsedEmail, mail_bytes=None, manual=False):
 
         try:
             foirequest, publicbody = check_delivery_conditions(
-                recipient_email, sender_email, parsed_email=email, manual=manual
+                recipient_email,
+                sender_email,
+                parsed_email=email,
+                manual=manual,
+                routing=routing,
             )
             if foirequest:
                 if foirequest in already_foirequests:
@@ -246,11 +289,12 @@ def check_delivery_conditions(
     sender_email: str,
     parsed_email: ParsedEmail,
     manual: bool = False,
+    routing: Optional[DeliveryRoutingIndex] = None,
 ) -> DeliveryConditionResult:
-    if should_drop_email(recipient_email, sender_email):
+    if should_drop_email(recipient_email, sender_email, routing=routing):
         return None, None
 
-    foirequest = find_foirequest_for_delivery(recipient_email)
+    foirequest = find_foirequest_for_delivery(recipient_email, routing=routing)
     if not foirequest:
         raise DeferredMessageNeeded
 
@@ -278,7 +322,15 @@ def check_delivery_conditions(
     raise DeferredMessageNeeded(foirequest=foirequest)
 
 
-def find_foirequest_for_delivery(recipient_email: str) -> Optional[FoiRequest]:
+def find_foirequest_for_delivery(
+    recipient_email: str, routing: Optional[DeliveryRoutingIndex] = None
+) -> Optional[FoiRequest]:
+    if routing is not None:
+        foirequest = routing.find_foirequest(recipient_email)
+        if foirequest is None:
+            raise DeferredMessageNeeded
+        return foirequest
+
     foirequest = get_foirequest_from_mail(recipient_email)
     if foirequest:
         return foirequest
@@ -302,7 +354,11 @@ def add_message_from_email(
     service.process()
 
 
-def should_drop_email(recipient_email: str, sender_email: str) -> bool:
+def should_drop_email(
+    recipient_email: str,
+    sender_email: str,
+    routing: Optional[DeliveryRoutingIndex] = None,
+) -> bool:
     from .models import DeferredMessage
 
     if (
@@ -312,9 +368,12 @@ def should_drop_email(recipient_email: str, sender_email: str) -> bool:
         # foi mailbox email, but custom email required, dropping
         return True
 
-    previous_spam_sender = DeferredMessage.objects.filter(
-        sender=sender_email, spam=True
-    ).exists()
+    if routing is not None:
+        previous_spam_sender = routing.is_spam_sender(sender_email)
+    else:
+        previous_spam_sender = DeferredMessage.objects.filter(
+            sender=sender_email, spam=True
+        ).exists()
     if previous_spam_sender:
         # Drop previous spammer
         return True
@@ -323,8 +382,11 @@ def should_drop_email(recipient_email: str, sender_email: str) -> bool:
 
 
 @contextmanager
-def get_foi_mail_client():
-    with get_mail_client(
+def get_foi_mail_client(pooled=None):
+    if pooled is None:
+        pooled = settings.FOI_EMAIL_PERSISTENT_CONNECTION
+    client_func = get_pooled_mail_client if pooled else get_mail_client
+    with client_func(
         settings.FOI_EMAIL_HOST_IMAP,
         settings.FOI_EMAIL_PORT_IMAP,
         settings.FOI_EMAIL_ACCOUNT_NAME,
@@ -339,6 +401,70 @@ def _fetch_mail(flag_in_process=True) -> Iterator[Tuple[Optional[str], bytes]]:
         yield from get_unread_mails(mailbox, flag=flag_in_process)
 
 
+@dataclass
+class MailFetchStats:
+    count: int = 0
+    size: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def add(self, mail_bytes: bytes):
+        self.count += 1
+        self.size += len(mail_bytes)
+
+    @property
+    def duration(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.count / max(self.duration, 1e-6)
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.size / max(self.duration, 1e-6)
+
+    def __str__(self):
+        return "{} mails ({} bytes) in {:.2f}s: {:.1f} mails/s, {:.0f} bytes/s".format(
+            self.count,
+            self.size,
+            self.duration,
+            self.messages_per_second,
+            self.bytes_per_second,
+        )
+
+
+def _fetch_mail_batched(
+    batch_size: int, flag_in_process=True, stats: Optional[MailFetchStats] = None
+) -> Iterator[Tuple[Optional[str], bytes]]:
+    with get_foi_mail_client() as mailbox:
+        for batch in get_unread_mail_batches(
+            mailbox, flag=flag_in_process, batch_size=batch_size
+        ):
+            for mail_uid, rfc_data in batch:
+                if stats is not None:
+                    stats.add(rfc_data)
+                yield mail_uid, rfc_data
+
+
+def listen_for_mail(on_new_mail, idle_timeout=5 * 60, reconnect_delay=30):
+    """
+    Keep a dedicated IMAP connection in IDLE and call on_new_mail
+    initially, whenever the server reports new mail and after every
+    idle_timeout as a fallback.
+    """
+    while True:
+        try:
+            with get_foi_mail_client(pooled=False) as mailbox:
+                while True:
+                    on_new_mail()
+                    mailbox.select("Inbox", readonly=True)
+                    wait_for_new_mail(mailbox, timeout=idle_timeout)
+                    mailbox.close()
+        except (imaplib.IMAP4.abort, OSError) as e:
+            logger.warning("IMAP IDLE connection lost, reconnecting: %s", e)
+            time.sleep(reconnect_delay)
+
+
 def fetch_and_process():
     count = 0
     for _mail_uid, rfc_data in _fetch_mail(flag_in_process=False):
@@ -356,9 +482,10 @@ def generate_foirequest_files(foirequest):
     yield from get_message_attachments_for_package(foirequest)
 
 
-def get_message_and_attachments(
-    foimessage: FoiMessage, date_prefix: Optional[str] = None
-):
+def get_message_files(foimessage: FoiMessage, date_prefix: Optional[str] = None):
+    """
+    Yield message PDF as bytes and attachments as unread files
+    """
     from .pdf_generator import FoiRequestMessagePDFGenerator
 
     if date_prefix is None:
@@ -375,23 +502,46 @@ def get_message_and_attachments(
         if not attachment.file:
             continue
         filename = "%s-%s" % (date_prefix, attachment.name)
-        with open(attachment.file.path, "rb") as f:
-            yield (filename, f.read(), attachment.filetype)
+        yield (filename, attachment.file, attachment.filetype)
+
+
+def get_message_and_attachments(
+    foimessage: FoiMessage, date_prefix: Optional[str] = None
+):
+    for filename, source, filetype in get_message_files(foimessage, date_prefix):
+        if not isinstance(source, bytes):
+            with source.open("rb") as f:
+                source = f.read()
+        yield (filename, source, filetype)
+
+
+def with_default_language(generator):
+    """
+    Run each step of generator with the default language active
+    without leaking it into code that consumes the items
+    """
+    while True:
+        with override(settings.LANGUAGE_CODE):
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+        yield item
+
+
+def stream_message_package(foimessage: FoiMessage):
+    path = str(foimessage.request_id)
+    files = with_default_language(get_message_files(foimessage))
+    return stream_zip(
+        ("%s/%s" % (path, filename), source) for filename, source, _ct in files
+    )
 
 
 def package_message(foimessage: FoiMessage):
-    zfile_obj = BytesIO()
-    with override(settings.LANGUAGE_CODE):
-        zfile = zipfile.ZipFile(zfile_obj, "w")
-        path = str(foimessage.request_id)
-        atts = get_message_and_attachments(foimessage)
-        for filename, filebytes, _ct in atts:
-            zfile.writestr("%s/%s" % (path, filename), filebytes)
-        zfile.close()
-    return zfile_obj.getvalue()
+    return b"".join(stream_message_package(foimessage))
 
 
-def get_message_attachments_for_package(foirequest):
+def get_message_date_prefixes(foirequest):
     last_date = None
     date_count = 1
 
@@ -406,21 +556,29 @@ def get_message_attachments_for_package(foirequest):
             date_prefix += "_%d" % date_count
 
         last_date = current_date
+        yield foimessage, date_prefix
+
+
+def get_message_attachments_for_package(foirequest):
+    for foimessage, date_prefix in get_message_date_prefixes(foirequest):
         yield from get_message_and_attachments(foimessage, date_prefix=date_prefix)
 
 
-def package_foirequest(foirequest: FoiRequest):
+def get_foirequest_package_files(foirequest: FoiRequest):
     from .pdf_generator import FoiRequestPDFGenerator
 
-    zfile_obj = BytesIO()
-    with override(settings.LANGUAGE_CODE):
-        zfile = zipfile.ZipFile(zfile_obj, "w")
-        path = str(foirequest.pk)
-        pdf_generator = FoiRequestPDFGenerator(foirequest)
-        correspondence_bytes = pdf_generator.get_pdf_bytes()
-        zfile.writestr("%s/_%s.pdf" % (path, foirequest.pk), correspondence_bytes)
-        atts = get_message_attachments_for_package(foirequest)
-        for filename, filebytes, _ct in atts:
-            zfile.writestr("%s/%s" % (path, filename), filebytes)
-        zfile.close()
-    return zfile_obj.getvalue()
+    path = str(foirequest.pk)
+    pdf_generator = FoiRequestPDFGenerator(foirequest)
+    yield ("%s/_%s.pdf" % (path, foirequest.pk), pdf_generator.get_pdf_bytes())
+    for foimessage, date_prefix in get_message_date_prefixes(foirequest):
+        files = get_message_files(foimessage, date_prefix=date_prefix)
+        for filename, source, _ct in files:
+            yield ("%s/%s" % (path, filename), source)
+
+
+def stream_foirequest_package(foirequest: FoiRequest):
+    return stream_zip(with_default_language(get_foirequest_package_files(foirequest)))
+
+
+def package_foirequest(foirequest: FoiRequest):
+    return b"".join(stream_foirequest_package(foirequest))
@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import translation
+
+from froide.foirequest.models import FoiMessage, FoiRequest
+from froide.foirequest.models.message import REDACTION_DIFF_FIELDS
+
+
+class Command(BaseCommand):
+    help = "Computes missing redaction diffs of messages and request descriptions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="Queue diff tasks instead of computing them here",
+        )
+
+    def handle(self, *args, **options):
+        translation.activate(settings.LANGUAGE_CODE)
+        from froide.foirequest.tasks import (
+            update_message_redaction_diffs,
+            update_request_redaction_diffs,
+        )
+
+        batch_size = options["batch_size"]
+        queue = options["queue"]
+
+        missing = Q()
+        for field in REDACTION_DIFF_FIELDS:
+            missing |= Q(**{"{}__isnull".format(field): True})
+        messages = FoiMessage.objects.filter(missing).select_related("request")
+        count = 0
+        for message in messages.iterator(chunk_size=batch_size):
+            if queue:
+                update_message_redaction_diffs.delay(message.id)
+            else:
+                message.update_redaction_diffs()
+            count += 1
+            if count % batch_size == 0:
+                self.stdout.write("{} messages".format(count))
+        self.stdout.write("{} messages done".format(count))
+
+        foirequests = FoiRequest.objects.exclude(description="").filter(
+            Q(redacted_description_auth__isnull=True)
+            | Q(redacted_description_anon__isnull=True)
+        )
+        count = 0
+        for foirequest in foirequests.iterator(chunk_size=batch_size):
+            if queue:
+                update_request_redaction_diffs.delay(foirequest.id)
+            else:
+                foirequest.update_redaction_diffs()
+            count += 1
+        self.stdout.write("{} requests done".format(count))
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import translation
+
+from ...foi_mail import listen_for_mail
+from ...tasks import fetch_mail
+
+
+class Command(BaseCommand):
+    help = "Waits for new mail with IMAP IDLE and dispatches it for processing"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--idle-timeout",
+            type=int,
+            default=5 * 60,
+            help="Seconds after which the mailbox is checked without notification",
+        )
+
+    def handle(self, *args, **options):
+        translation.activate(settings.LANGUAGE_CODE)
+
+        self.stdout.write("Listening for new FoI mail...")
+        listen_for_mail(fetch_mail, idle_timeout=options["idle_timeout"])
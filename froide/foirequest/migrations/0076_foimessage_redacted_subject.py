@@ -0,0 +1,23 @@
+# Generated by Django 5.2.12 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foirequest', '0075_alter_foiproject_language_alter_foirequest_language'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foimessage',
+            name='redacted_subject_anon',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='foimessage',
+            name='redacted_subject_auth',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
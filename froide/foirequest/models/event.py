@@ -169,6 +169,24 @@ class FoiEventManager(models.Manager):
         event.save()
         return event
 
+    def create_events(self, event_name, foirequests):
+        """
+        Create the same context free event for many requests at once.
+        """
+        assert event_name in EVENT_KEYS
+
+        return self.bulk_create(
+            [
+                FoiEvent(
+                    request=foirequest,
+                    public=foirequest.is_public(),
+                    event_name=event_name,
+                    context={},
+                )
+                for foirequest in foirequests
+            ]
+        )
+
 
 class FoiEvent(models.Model):
     EVENTS = EventName
@@ -1,6 +1,6 @@
 import calendar
 from email.utils import formatdate
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 from django.conf import settings
 from django.core.mail import EmailMessage, EmailMultiAlternatives
@@ -27,6 +27,13 @@ AUTO_REPLY_TAG = "auto-reply"
 BOUNCE_RESENT_TAG = "bounce-resent"
 BULK_TAG = "bulk"
 
+REDACTION_DIFF_FIELDS = (
+    "redacted_content_auth",
+    "redacted_content_anon",
+    "redacted_subject_auth",
+    "redacted_subject_anon",
+)
+
 
 class FoiMessageManager(models.Manager):
     def get_throttle_filter(self, queryset, user, extra_filters=None):
@@ -172,6 +179,8 @@ class FoiMessage(models.Model):
     content_rendered_anon = models.TextField(blank=True, null=True)
     redacted_content_auth = models.JSONField(blank=True, null=True)
     redacted_content_anon = models.JSONField(blank=True, null=True)
+    redacted_subject_auth = models.JSONField(blank=True, null=True)
+    redacted_subject_anon = models.JSONField(blank=True, null=True)
     redacted = models.BooleanField(_("Was Redacted?"), default=False)
     not_publishable = models.BooleanField(_("Not publishable"), default=False)
     email_headers = models.JSONField(null=True, default=None, blank=True)
@@ -532,6 +541,8 @@ class FoiMessage(models.Model):
         self.content_rendered_anon = None
         self.redacted_content_auth = None
         self.redacted_content_anon = None
+        self.redacted_subject_auth = None
+        self.redacted_subject_anon = None
 
     def get_content(self):
         from ..utils import redact_plaintext_with_request
@@ -726,13 +737,58 @@ class FoiMessage(models.Model):
                 self.plaintext,
                 "redacted_content_anon",
             )
+        return self._get_redacted_differences(show, hide, cache_field)
 
-        if getattr(self, cache_field) is None:
-            redacted_content = [list(x) for x in get_differences(show, hide)]
-            setattr(self, cache_field, redacted_content)
-            FoiMessage.objects.filter(id=self.id).update(
-                **{cache_field: redacted_content}
+    def get_redacted_subject(self, auth: bool) -> List[Tuple[bool, str]]:
+        if auth:
+            show, hide, cache_field = (
+                self.subject,
+                self.subject_redacted,
+                "redacted_subject_auth",
+            )
+        else:
+            show, hide, cache_field = (
+                self.subject_redacted,
+                self.subject,
+                "redacted_subject_anon",
             )
+        return self._get_redacted_differences(show, hide, cache_field)
+
+    def get_redaction_diff_texts(self) -> Dict[str, Tuple[str, str]]:
+        content = self.get_content()
+        return {
+            "redacted_content_auth": (self.plaintext, content),
+            "redacted_content_anon": (content, self.plaintext),
+            "redacted_subject_auth": (self.subject, self.subject_redacted),
+            "redacted_subject_anon": (self.subject_redacted, self.subject),
+        }
+
+    def needs_redaction_diffs(self) -> bool:
+        return any(getattr(self, field) is None for field in REDACTION_DIFF_FIELDS)
+
+    def update_redaction_diffs(self) -> bool:
+        """
+        Compute missing redaction diffs and store them in one update,
+        unless the message has been saved again in the meantime.
+        """
+        update = {}
+        for field, (show, hide) in self.get_redaction_diff_texts().items():
+            if getattr(self, field) is None:
+                update[field] = [list(x) for x in get_differences(show, hide)]
+                setattr(self, field, update[field])
+        if not update:
+            return False
+        return bool(
+            FoiMessage.objects.filter(
+                id=self.id, last_modified_at=self.last_modified_at
+            ).update(**update)
+        )
+
+    def _get_redacted_differences(self, show, hide, cache_field):
+        if getattr(self, cache_field) is None:
+            redacted = [list(x) for x in get_differences(show, hide)]
+            setattr(self, cache_field, redacted)
+            FoiMessage.objects.filter(id=self.id).update(**{cache_field: redacted})
         return getattr(self, cache_field)
 
     def get_cached_rendered_content(self, authenticated_read):
@@ -66,6 +66,25 @@ class FoiRequestManager(CurrentSiteManager):
     def get_to_be_asleep(self):
         return self.get_asleep().exclude(status=Status.ASLEEP)
 
+    def bulk_set_overdue(self, requests):
+        """
+        Like FoiRequest.set_overdue for a batch of requests.
+        """
+        FoiRequest.requests_became_overdue.send(sender=FoiRequest, requests=requests)
+
+    def bulk_set_asleep(self, requests):
+        """
+        Like FoiRequest.set_asleep for a batch of requests with one update.
+        """
+        now = timezone.now()
+        self.get_queryset().filter(id__in=[r.id for r in requests]).update(
+            status=Status.ASLEEP, last_modified_at=now
+        )
+        for foirequest in requests:
+            foirequest.status = Status.ASLEEP
+            foirequest.last_modified_at = now
+        FoiRequest.requests_became_asleep.send(sender=FoiRequest, requests=requests)
+
     def get_unclassified(self, offset=None):
         if offset is None:
             offset = timedelta(days=4)
@@ -449,6 +468,9 @@ class FoiRequest(models.Model):
     costs_reported = django.dispatch.Signal()  # args: ["costs"]
     became_overdue = django.dispatch.Signal()  # args: []
     became_asleep = django.dispatch.Signal()  # args: []
+    # Sent once per batch by the bulk transitions of FoiRequestManager
+    requests_became_overdue = django.dispatch.Signal()  # args: ["requests"]
+    requests_became_asleep = django.dispatch.Signal()  # args: ["requests"]
     public_body_suggested = django.dispatch.Signal()  # args: ["suggestion"]
     set_concrete_law = django.dispatch.Signal()  # args: ['name', 'user']
     made_public = django.dispatch.Signal()  # args: ['user']
@@ -697,6 +719,34 @@ class FoiRequest(models.Model):
                 )
         return getattr(self, cache_field)
 
+    def needs_redaction_diffs(self) -> bool:
+        if not self.description:
+            return False
+        return not self.redacted_description_auth or not self.redacted_description_anon
+
+    def update_redaction_diffs(self) -> bool:
+        """
+        Compute missing description redaction diffs and store them in
+        one update, unless the request has been saved again in the meantime.
+        """
+        description_redacted = self.get_description()
+        texts = {
+            "redacted_description_auth": (self.description, description_redacted),
+            "redacted_description_anon": (description_redacted, self.description),
+        }
+        update = {}
+        for field, (show, hide) in texts.items():
+            if not getattr(self, field):
+                update[field] = [list(x) for x in get_differences(show, hide)]
+                setattr(self, field, update[field])
+        if not update:
+            return False
+        return bool(
+            FoiRequest.objects.filter(
+                id=self.id, last_modified_at=self.last_modified_at
+            ).update(**update)
+        )
+
     def clear_render_cache(self):
         self.redacted_description_anon = None
         self.redacted_description_auth = None
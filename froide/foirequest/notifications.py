@@ -18,7 +18,7 @@ from froide.helper.notifications import Notification
 
 from .models import FoiEvent, FoiMessage
 from .models.event import EVENT_DETAILS
-from .utils import send_request_user_email
+from .utils import get_request_user_email
 
 update_requester_email = mail_registry.register(
     "foirequest/emails/request_update", ("count", "user", "request_list")
@@ -157,9 +157,9 @@ def send_update(notifications: List[Notification], user):
     )
 
 
-def send_classification_reminder(foirequest):
+def get_classification_reminder(foirequest):
     if foirequest.user is None:
-        return
+        return None
     req_url = foirequest.user.get_autologin_url(foirequest.get_absolute_short_url())
     subject = _("Please classify the reply to your request")
     context = {
@@ -168,10 +168,21 @@ def send_classification_reminder(foirequest):
         "action_url": req_url,
         "status_action_url": req_url + "#set-status",
     }
-    send_request_user_email(
-        classification_reminder_email,
+    return get_request_user_email(
         foirequest,
         subject=subject,
         context=context,
         priority=False,
     )
+
+
+def send_classification_reminder(foirequest):
+    message = get_classification_reminder(foirequest)
+    if message is None:
+        return
+    classification_reminder_email.send(**message)
+
+
+def send_classification_reminders(requests):
+    messages = (get_classification_reminder(foirequest) for foirequest in requests)
+    classification_reminder_email.bulk_send([m for m in messages if m is not None])
@@ -1,9 +1,16 @@
+import hashlib
 import logging
+import posixpath
+from datetime import timedelta
 from types import ModuleType
 from typing import Optional
 
 from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.translation import get_language
 
 from froide.helper.text_utils import remove_closing_inclusive
 
@@ -19,9 +26,16 @@ def get_wp() -> Optional[ModuleType]:
 
 logger = logging.getLogger(__name__)
 
+PDF_CACHE_PREFIX = "pdfcache"
+# Outdated PDFs are kept for a while for concurrent renderings
+PDF_CACHE_STALE_AGE = timedelta(hours=1)
+
 
 class PDFGenerator(object):
     template_name: str
+    # Increase when PDF output changes without changes in the rendered HTML
+    template_version = 1
+    cache_pdf = True
 
     def __init__(self, obj):
         self.obj = obj
@@ -32,9 +46,66 @@ class PDFGenerator(object):
             return b""
 
         html = self.get_html_string()
+        if not self.cache_pdf or not settings.FOI_PDF_CACHE or self.obj.pk is None:
+            return self.render_pdf(wp, html)
+
+        path = self.get_cache_path(wp, html)
+        if default_storage.exists(path):
+            with default_storage.open(path, "rb") as f:
+                return f.read()
+
+        pdf_bytes = self.render_pdf(wp, html)
+        self.delete_stale_pdfs(keep=path)
+        default_storage.save(path, ContentFile(pdf_bytes))
+        return pdf_bytes
+
+    def render_pdf(self, wp, html):
         doc = wp.HTML(string=html)
         return doc.write_pdf()
 
+    def get_cache_dir(self, language=None):
+        """
+        PDFs are rendered in the active language, every language
+        has its own cache directory
+        """
+        if language is None:
+            language = get_language() or settings.LANGUAGE_CODE
+        return posixpath.join(
+            PDF_CACHE_PREFIX,
+            self.__class__.__name__.lower(),
+            str(self.obj.pk),
+            language,
+        )
+
+    def get_cache_path(self, wp, html):
+        key = "{}:{}:{}:{}".format(
+            self.template_name, self.template_version, wp.__version__, html
+        )
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return posixpath.join(self.get_cache_dir(), "%s.pdf" % digest)
+
+    def delete_stale_pdfs(self, keep):
+        """
+        Remove outdated PDFs of the object in the language of keep
+        that have not been written recently
+        """
+        cache_dir = posixpath.dirname(keep)
+        try:
+            _dirs, filenames = default_storage.listdir(cache_dir)
+        except FileNotFoundError:
+            return
+        stale_before = timezone.now() - PDF_CACHE_STALE_AGE
+        for filename in filenames:
+            path = posixpath.join(cache_dir, filename)
+            if path == keep:
+                continue
+            try:
+                if default_storage.get_modified_time(path) < stale_before:
+                    default_storage.delete(path)
+            except FileNotFoundError:
+                # removed by a concurrent rendering
+                pass
+
     def get_html_string(self):
         ctx = self.get_context_data(self.obj)
         return render_to_string(self.template_name, ctx)
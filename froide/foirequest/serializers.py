@@ -1,6 +1,7 @@
 from typing import override
 
-from django.db.models import Prefetch
+from django.db import models
+from django.db.models import Prefetch, prefetch_related_objects
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
@@ -10,7 +11,6 @@ from rest_framework.views import PermissionDenied
 from taggit.serializers import TaggitSerializer, TagListSerializerField
 
 from froide.document.api_views import DocumentSerializer
-from froide.helper.text_diff import get_differences
 from froide.publicbody.models import PublicBody
 from froide.publicbody.serializers import (
     FoiLawSerializer,
@@ -218,6 +218,14 @@ class FoiRequestListSerializer(
         return super().update(instance, validated_data)
 
 
+class FoiRequestDetailListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        foirequests = list(iterable)
+        prefetch_request_messages(self.context["request"], foirequests)
+        return super().to_representation(foirequests)
+
+
 class FoiRequestDetailSerializer(FoiRequestListSerializer):
     public_body = PublicBodySerializer(read_only=True)
     law = FoiLawSerializer(read_only=True)
@@ -225,13 +233,13 @@ class FoiRequestDetailSerializer(FoiRequestListSerializer):
 
     class Meta(FoiRequestListSerializer.Meta):
         fields = FoiRequestListSerializer.Meta.fields + ("messages",)
+        list_serializer_class = FoiRequestDetailListSerializer
 
     def get_messages(self, obj):
-        qs = optimize_message_queryset(
-            self.context["request"], FoiMessage.objects.filter(request=obj)
-        )
+        if not hasattr(obj, "api_messages"):
+            prefetch_request_messages(self.context["request"], [obj])
         return FoiMessageSerializer(
-            qs, read_only=True, many=True, context=self.context
+            obj.api_messages, read_only=True, many=True, context=self.context
         ).data
 
 
@@ -263,6 +271,14 @@ class MakeRequestSerializer(serializers.Serializer):
         return service.execute(validated_data["request"])
 
 
+class FoiMessageListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        messages = list(iterable)
+        prefetch_visible_attachments(self.context["request"], messages)
+        return super().to_representation(messages)
+
+
 class FoiMessageSerializer(serializers.HyperlinkedModelSerializer):
     resource_uri = serializers.HyperlinkedIdentityField(view_name="api:message-detail")
     request = FoiRequestRelatedField()
@@ -316,6 +332,7 @@ class FoiMessageSerializer(serializers.HyperlinkedModelSerializer):
             "status_name",
             "last_modified_at",
         ]
+        list_serializer_class = FoiMessageListSerializer
         read_only_fields = [
             "sent",
             "is_escalation",
@@ -340,13 +357,10 @@ class FoiMessageSerializer(serializers.HyperlinkedModelSerializer):
         return obj.get_content()
 
     def get_redacted_subject(self, obj):
-        if self._is_authenticated_read(obj):
-            show, hide = obj.subject, obj.subject_redacted
-        else:
-            if obj.content_hidden:
-                return []
-            show, hide = obj.subject_redacted, obj.subject
-        return list(get_differences(show, hide))
+        authenticated_read = self._is_authenticated_read(obj)
+        if obj.content_hidden and not authenticated_read:
+            return []
+        return obj.get_redacted_subject(authenticated_read)
 
     def get_redacted_content(self, obj):
         authenticated_read = self._is_authenticated_read(obj)
@@ -356,10 +370,7 @@ class FoiMessageSerializer(serializers.HyperlinkedModelSerializer):
 
     def get_attachments(self, obj):
         if not hasattr(obj, "visible_attachments"):
-            obj.visible_attachments = get_read_foiattachment_queryset(
-                self.context["request"],
-                queryset=FoiAttachment.objects.filter(belongs_to=obj),
-            ).prefetch_related("belongs_to", "document", "converted", "redacted")
+            prefetch_visible_attachments(self.context["request"], [obj])
 
         serializer = FoiAttachmentSerializer(
             obj.visible_attachments,  # already filtered by prefetch
@@ -534,6 +545,55 @@ class ImageAttachmentConverterSerializer(serializers.Serializer):
     message = FoiMessageRelatedField()
 
 
+def get_visible_attachment_queryset(request, queryset=None):
+    if queryset is None:
+        queryset = FoiAttachment.objects.all()
+    return get_read_foiattachment_queryset(request, queryset=queryset).prefetch_related(
+        "document", "converted", "redacted"
+    )
+
+
+def prefetch_visible_attachments(request, messages):
+    """
+    Set visible_attachments on all messages that do not have them yet
+    in one query.
+    """
+    messages = [m for m in messages if not hasattr(m, "visible_attachments")]
+    if not messages:
+        return
+    prefetch_related_objects(
+        messages,
+        Prefetch(
+            "foiattachment_set",
+            queryset=get_visible_attachment_queryset(request),
+            to_attr="visible_attachments",
+        ),
+    )
+
+
+def prefetch_request_messages(request, foirequests):
+    """
+    Set api_messages with their visible attachments on all foirequests
+    in a fixed number of queries.
+    """
+    foirequests = [fr for fr in foirequests if not hasattr(fr, "api_messages")]
+    if not foirequests:
+        return
+    messages = FoiMessage.objects.prefetch_related(
+        "sender_user",
+        "sender_public_body",
+        Prefetch(
+            "foiattachment_set",
+            queryset=get_visible_attachment_queryset(request),
+            to_attr="visible_attachments",
+        ),
+    )
+    prefetch_related_objects(
+        foirequests,
+        Prefetch("foimessage_set", queryset=messages, to_attr="api_messages"),
+    )
+
+
 def optimize_message_queryset(request, qs):
     atts = get_read_foiattachment_queryset(
         request, queryset=FoiAttachment.objects.filter(belongs_to__in=qs)
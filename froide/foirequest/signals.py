@@ -1,5 +1,8 @@
+from functools import partial
 from typing import List, Optional
 
+from django.conf import settings
+from django.db import transaction
 from django.db.models import signals
 from django.dispatch import receiver
 from django.utils import timezone
@@ -9,10 +12,14 @@ from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
 from froide.helper.email_sending import mail_registry
+from froide.helper.search.queue import search_index_queue
 from froide.helper.signals import email_left_queue
 
 from .consumers import MESSAGEEDIT_ROOM_PREFIX
+from .delivery import invalidate_routing_cache
+from .documents import clear_message_text_cache
 from .models import (
+    DeferredMessage,
     DeliveryStatus,
     FoiAttachment,
     FoiEvent,
@@ -21,7 +28,13 @@ from .models import (
     FoiRequest,
 )
 from .models.message import MESSAGE_ID_PREFIX
-from .utils import send_request_user_email, short_request_url
+from .models.request import Status
+from .utils import (
+    clear_correspondent_cache,
+    get_request_user_email,
+    send_request_user_email,
+    short_request_url,
+)
 
 became_overdue_email = mail_registry.register(
     "foirequest/emails/became_overdue",
@@ -76,19 +89,17 @@ def trigger_index_update(klass, instance_pk):
     obj.save()
 
 
-@receiver(FoiRequest.became_overdue, dispatch_uid="send_notification_became_overdue")
-def send_notification_became_overdue(sender, **kwargs):
-    req_url = sender.user.get_autologin_url(sender.get_absolute_short_url())
-    upload_url = sender.user.get_autologin_url(
-        short_request_url("foirequest-upload_postal_message_create", sender)
+def get_status_email(foirequest, subject):
+    req_url = foirequest.user.get_autologin_url(foirequest.get_absolute_short_url())
+    upload_url = foirequest.user.get_autologin_url(
+        short_request_url("foirequest-upload_postal_message_create", foirequest)
     )
-    send_request_user_email(
-        became_overdue_email,
-        sender,
-        subject=_("Request became overdue"),
+    return get_request_user_email(
+        foirequest,
+        subject=subject,
         context={
-            "foirequest": sender,
-            "user": sender.user,
+            "foirequest": foirequest,
+            "user": foirequest.user,
             "action_url": req_url,
             "upload_action_url": upload_url,
             "write_action_url": req_url + "#write-message",
@@ -98,27 +109,41 @@ def send_notification_became_overdue(sender, **kwargs):
     )
 
 
+def send_status_emails(mail_intent, requests, subject):
+    messages = [
+        get_status_email(foirequest, subject)
+        for foirequest in requests
+        if foirequest.user
+    ]
+    # Batch transitions run in a transaction, only send mails
+    # once it is committed, so a rollback does not send them twice
+    transaction.on_commit(partial(mail_intent.bulk_send, messages))
+
+
+@receiver(FoiRequest.became_overdue, dispatch_uid="send_notification_became_overdue")
+def send_notification_became_overdue(sender, **kwargs):
+    became_overdue_email.send(**get_status_email(sender, _("Request became overdue")))
+
+
+@receiver(
+    FoiRequest.requests_became_overdue,
+    dispatch_uid="send_notification_requests_became_overdue",
+)
+def send_notification_requests_became_overdue(sender, requests=None, **kwargs):
+    send_status_emails(became_overdue_email, requests, _("Request became overdue"))
+
+
 @receiver(FoiRequest.became_asleep, dispatch_uid="send_notification_became_asleep")
 def send_notification_became_asleep(sender, **kwargs):
-    req_url = sender.user.get_autologin_url(sender.get_absolute_short_url())
-    upload_url = sender.user.get_autologin_url(
-        short_request_url("foirequest-upload_postal_message_create", sender)
-    )
+    became_asleep_email.send(**get_status_email(sender, _("Request became asleep")))
 
-    send_request_user_email(
-        became_asleep_email,
-        sender,
-        subject=_("Request became asleep"),
-        context={
-            "foirequest": sender,
-            "user": sender.user,
-            "action_url": req_url,
-            "upload_action_url": upload_url,
-            "write_action_url": req_url + "#write-message",
-            "status_action_url": req_url + "#set-status",
-        },
-        priority=False,
-    )
+
+@receiver(
+    FoiRequest.requests_became_asleep,
+    dispatch_uid="send_notification_requests_became_asleep",
+)
+def send_notification_requests_became_asleep(sender, requests=None, **kwargs):
+    send_status_emails(became_asleep_email, requests, _("Request became asleep"))
 
 
 @receiver(FoiRequest.message_received, dispatch_uid="notify_user_message_received")
@@ -225,15 +250,49 @@ def decrement_request_count(sender, instance=None, **kwargs):
     instance.public_body.save()
 
 
+# Redaction diffs
+
+
+@receiver(
+    signals.post_save, sender=FoiRequest, dispatch_uid="foirequest_redaction_diffs"
+)
+def foirequest_redaction_diffs(instance=None, raw=False, **kwargs):
+    if raw or not instance.needs_redaction_diffs():
+        return
+    from .tasks import update_request_redaction_diffs
+
+    transaction.on_commit(partial(update_request_redaction_diffs.delay, instance.id))
+
+
+@receiver(
+    signals.post_save, sender=FoiMessage, dispatch_uid="foimessage_redaction_diffs"
+)
+def foimessage_redaction_diffs(instance=None, raw=False, **kwargs):
+    if raw or not instance.needs_redaction_diffs():
+        return
+    from .tasks import update_message_redaction_diffs
+
+    transaction.on_commit(partial(update_message_redaction_diffs.delay, instance.id))
+
+
 # Indexing
 
 
+@receiver(FoiRequest.requests_became_asleep, dispatch_uid="foirequests_asleep_update")
+def foirequests_asleep_update(sender, requests=None, **kwargs):
+    # Status was changed by a queryset update without post_save
+    search_index_queue.add_many(
+        FoiRequest._meta.label_lower, [foirequest.id for foirequest in requests]
+    )
+
+
 @receiver(
     signals.post_save, sender=FoiMessage, dispatch_uid="foimessage_delayed_update"
 )
 def foimessage_delayed_update(instance=None, created=False, **kwargs):
     if created and kwargs.get("raw", False):
         return
+    clear_correspondent_cache(instance.request_id)
     trigger_index_update(FoiRequest, instance.request_id)
 
 
@@ -241,6 +300,7 @@ def foimessage_delayed_update(instance=None, created=False, **kwargs):
     signals.post_delete, sender=FoiMessage, dispatch_uid="foimessage_delayed_remove"
 )
 def foimessage_delayed_remove(instance, **kwargs):
+    clear_correspondent_cache(instance.request_id)
     trigger_index_update(FoiRequest, instance.request_id)
 
 
@@ -250,6 +310,7 @@ def foimessage_delayed_remove(instance, **kwargs):
 def foiattachment_delayed_update(instance, created=False, **kwargs):
     if created and kwargs.get("raw", False):
         return
+    clear_message_text_cache(instance.belongs_to_id)
     trigger_index_update(FoiRequest, instance.belongs_to.request_id)
 
 
@@ -259,6 +320,7 @@ def foiattachment_delayed_update(instance, created=False, **kwargs):
     dispatch_uid="foiattachment_delayed_remove",
 )
 def foiattachment_delayed_remove(instance, **kwargs):
+    clear_message_text_cache(instance.belongs_to_id)
     try:
         has_request = instance.belongs_to.request_id is not None
         if instance.belongs_to is not None and has_request:
@@ -267,6 +329,27 @@ def foiattachment_delayed_remove(instance, **kwargs):
         pass
 
 
+# Delivery routing
+
+
+@receiver(
+    signals.post_save,
+    sender=DeferredMessage,
+    dispatch_uid="deferredmessage_invalidate_routing",
+)
+def deferredmessage_invalidate_routing(**kwargs):
+    invalidate_routing_cache()
+
+
+@receiver(
+    signals.post_delete,
+    sender=DeferredMessage,
+    dispatch_uid="deferredmessage_delete_invalidate_routing",
+)
+def deferredmessage_delete_invalidate_routing(**kwargs):
+    invalidate_routing_cache()
+
+
 # Event creation
 
 
@@ -382,6 +465,15 @@ def create_event_status_changed(sender, user=None, request=None, **kwargs):
     )
 
 
+@receiver(FoiRequest.status_changed, dispatch_uid="pregenerate_pdfs_status_changed")
+def pregenerate_pdfs_status_changed(sender, **kwargs):
+    if not settings.FOI_PDF_CACHE or kwargs.get("status") != Status.RESOLVED:
+        return
+    from .tasks import generate_foirequest_pdfs_task
+
+    transaction.on_commit(lambda: generate_foirequest_pdfs_task.delay(sender.id))
+
+
 @receiver(FoiRequest.costs_reported, dispatch_uid="create_event_costs_reported")
 def create_event_costs_reported(sender: FoiRequest, user=None, request=None, **kwargs):
     FoiEvent.objects.create_event(
@@ -417,6 +509,13 @@ def create_event_became_overdue(sender, **kwargs):
     FoiEvent.objects.create_event(FoiEvent.EVENTS.BECAME_OVERDUE, sender)
 
 
+@receiver(
+    FoiRequest.requests_became_overdue, dispatch_uid="create_events_became_overdue"
+)
+def create_events_became_overdue(sender, requests=None, **kwargs):
+    FoiEvent.objects.create_events(FoiEvent.EVENTS.BECAME_OVERDUE, requests)
+
+
 @receiver(FoiRequest.set_concrete_law, dispatch_uid="create_event_set_concrete_law")
 def create_event_set_concrete_law(sender, user=None, **kwargs):
     FoiEvent.objects.create_event(
@@ -29,8 +29,10 @@ class EmailBackend(DjangoEmailBackend):
             return False
         encoding = email_message.encoding or settings.DEFAULT_CHARSET
         email_message.from_email = fix_address(email_message.from_email)
-        if self.return_path:
-            from_email = sanitize_address(self.return_path, encoding)
+        # Bulk mails carry their own return path
+        return_path = getattr(email_message, "return_path", None) or self.return_path
+        if return_path:
+            from_email = sanitize_address(return_path, encoding)
         else:
             from_email = sanitize_address(email_message.from_email, encoding)
         recipients = [
@@ -20,12 +20,23 @@ from froide.proof.models import Proof
 from froide.publicbody.models import PublicBody
 from froide.upload.models import Upload
 
-from .foi_mail import _fetch_mail, _process_mail, get_foi_mail_client
-from .models import FoiAttachment, FoiProject, FoiRequest
-from .notifications import batch_update_requester, send_classification_reminder
+from .foi_mail import (
+    MailFetchStats,
+    _fetch_mail,
+    _fetch_mail_batched,
+    _process_mail,
+    delete_spooled_mail,
+    get_foi_mail_client,
+    read_spooled_mail,
+    spool_mail,
+)
+from .models import FoiAttachment, FoiMessage, FoiProject, FoiRequest
+from .notifications import batch_update_requester, send_classification_reminders
 
 logger = logging.getLogger(__name__)
 
+TRANSITION_BATCH_SIZE = 500
+
 
 @celery_app.task(name="froide.foirequest.tasks.process_mail", acks_late=True)
 def process_mail(*args, **kwargs):
@@ -35,24 +46,92 @@ def process_mail(*args, **kwargs):
         _process_mail(*args, **kwargs)
 
 
+@celery_app.task(name="froide.foirequest.tasks.process_spooled_mail", acks_late=True)
+def process_spooled_mail(spool_path, mail_uid=None):
+    translation.activate(settings.LANGUAGE_CODE)
+
+    with transaction.atomic():
+        _process_mail(read_spooled_mail(spool_path), mail_uid=mail_uid)
+        transaction.on_commit(partial(delete_spooled_mail, spool_path))
+
+
 @celery_app.task(name="froide.foirequest.tasks.fetch_mail", expires=60)
 def fetch_mail():
-    for mail_uid, rfc_data in _fetch_mail():
-        process_mail.delay(rfc_data, mail_uid=mail_uid)
+    batch_size = settings.FOI_EMAIL_FETCH_BATCH_SIZE
+    if not batch_size:
+        for mail_uid, rfc_data in _fetch_mail():
+            process_mail.delay(rfc_data, mail_uid=mail_uid)
+        return
+
+    stats = MailFetchStats()
+    for mail_uid, rfc_data in _fetch_mail_batched(batch_size, stats=stats):
+        process_spooled_mail.delay(spool_mail(rfc_data), mail_uid=mail_uid)
+    if stats.count:
+        logger.info("Fetched %s", stats)
+
+
+def get_request_batches(qs, batch_size=TRANSITION_BATCH_SIZE):
+    """
+    Yield batches of the requests of `qs` with their users. Ids are
+    collected upfront as transitions take requests out of `qs`.
+    """
+    ids = list(qs.order_by("id").values_list("id", flat=True))
+    for pos in range(0, len(ids), batch_size):
+        yield list(
+            FoiRequest.objects.filter(id__in=ids[pos : pos + batch_size])
+            .select_related("user")
+            .order_by("id")
+        )
 
 
 @celery_app.task
 def detect_overdue():
     translation.activate(settings.LANGUAGE_CODE)
-    for foirequest in FoiRequest.objects.get_to_be_overdue():
-        foirequest.set_overdue()
+    for batch in get_request_batches(FoiRequest.objects.get_to_be_overdue()):
+        with transaction.atomic():
+            FoiRequest.objects.bulk_set_overdue(batch)
 
 
 @celery_app.task
 def detect_asleep():
     translation.activate(settings.LANGUAGE_CODE)
-    for foirequest in FoiRequest.objects.get_to_be_asleep():
-        foirequest.set_asleep()
+    for batch in get_request_batches(FoiRequest.objects.get_to_be_asleep()):
+        with transaction.atomic():
+            FoiRequest.objects.bulk_set_asleep(batch)
+
+
+@celery_app.task(name="froide.foirequest.tasks.update_message_redaction_diffs")
+def update_message_redaction_diffs(message_id):
+    try:
+        message = FoiMessage.objects.select_related("request").get(id=message_id)
+    except FoiMessage.DoesNotExist:
+        return
+    message.update_redaction_diffs()
+
+
+@celery_app.task(name="froide.foirequest.tasks.update_request_redaction_diffs")
+def update_request_redaction_diffs(foirequest_id):
+    try:
+        foirequest = FoiRequest.objects.get(id=foirequest_id)
+    except FoiRequest.DoesNotExist:
+        return
+    foirequest.update_redaction_diffs()
+
+
+@celery_app.task(name="froide.foirequest.tasks.generate_foirequest_pdfs_task")
+def generate_foirequest_pdfs_task(foirequest_id):
+    from .pdf_generator import FoiRequestMessagePDFGenerator, FoiRequestPDFGenerator
+
+    translation.activate(settings.LANGUAGE_CODE)
+    try:
+        foirequest = FoiRequest.objects.get(id=foirequest_id)
+    except FoiRequest.DoesNotExist:
+        return
+
+    # Fills the PDF cache for package and PDF downloads
+    FoiRequestPDFGenerator(foirequest).get_pdf_bytes()
+    for message in foirequest.messages:
+        FoiRequestMessagePDFGenerator(message).get_pdf_bytes()
 
 
 @celery_app.task
@@ -63,8 +142,8 @@ def batch_update_requester_task():
 @celery_app.task
 def classification_reminder():
     translation.activate(settings.LANGUAGE_CODE)
-    for foirequest in FoiRequest.objects.get_unclassified():
-        send_classification_reminder(foirequest)
+    for batch in get_request_batches(FoiRequest.objects.get_unclassified()):
+        send_classification_reminders(batch)
 
 
 @celery_app.task
@@ -15,10 +15,13 @@ from django.utils import timezone
 import pytest
 from oauth2_provider.models import get_access_token_model, get_application_model
 
-from froide.foirequest.models import FoiAttachment, FoiRequest
+from froide.foirequest.models import FoiAttachment, FoiMessage, FoiRequest
 from froide.foirequest.models.event import FoiEvent
 from froide.foirequest.models.request import Resolution, Status
-from froide.foirequest.serializers import FoiMessageSerializer
+from froide.foirequest.serializers import (
+    FoiMessageSerializer,
+    FoiRequestDetailSerializer,
+)
 from froide.foirequest.tests import factories
 from froide.publicbody.models import PublicBody
 from froide.upload.models import Upload
@@ -460,6 +463,54 @@ def test_foi_message_serializer_performance(world, client, many_attachment_foime
             assert selective_equal_dicts(a, b, {"file_url"})
 
 
+def get_message_queries(foirequests, request):
+    foirequests = list(FoiRequest.objects.filter(id__in=[fr.id for fr in foirequests]))
+    with CaptureQueriesContext(connection) as ctx:
+        data = FoiRequestDetailSerializer(
+            foirequests, many=True, context={"request": request}
+        ).data
+    queries = [
+        q["sql"]
+        for q in ctx.captured_queries
+        if 'FROM "foirequest_foimessage"' in q["sql"]
+        or 'FROM "foirequest_foiattachment"' in q["sql"]
+    ]
+    return queries, data
+
+
+@pytest.mark.django_db
+def test_foirequest_detail_serializer_queries(world):
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+
+    foirequests = factories.FoiRequestFactory.create_batch(3, site=world)
+    for foirequest in foirequests:
+        for _ in range(3):
+            message = factories.FoiMessageFactory.create(
+                request=foirequest,
+                subject="Request for Max Mustermann",
+                subject_redacted="Request for << Name removed >>",
+            )
+            factories.FoiAttachmentFactory.create_batch(
+                2, belongs_to=message, approved=True
+            )
+
+    single_queries, _ = get_message_queries(foirequests[:1], request)
+    page_queries, data = get_message_queries(foirequests, request)
+    assert len(page_queries) == len(single_queries)
+    assert [len(d["messages"]) for d in data] == [3, 3, 3]
+    for message in data[0]["messages"]:
+        assert len(message["attachments"]) == 2
+        assert message["redacted_subject"] == [
+            [False, "Request for "],
+            [True, "<< Name removed >>"],
+        ]
+
+    # Subject redaction diffs are stored with the message
+    message = FoiMessage.objects.get(id=data[0]["messages"][0]["id"])
+    assert message.redacted_subject_anon == data[0]["messages"][0]["redacted_subject"]
+
+
 @pytest.mark.django_db
 def test_foirequest_update(client, user):
     request = factories.FoiRequestFactory.create(user=user)
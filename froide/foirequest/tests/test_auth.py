@@ -2,7 +2,9 @@ from datetime import timedelta
 
 from django.contrib.auth.models import AnonymousUser, Group, Permission
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.http import HttpRequest
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 import pytest
@@ -11,9 +13,13 @@ from oauth2_provider.models import get_access_token_model, get_application_model
 from froide.account.factories import UserFactory
 from froide.campaign.models import Campaign
 from froide.foirequest.auth import (
+    can_read_foirequest,
+    can_read_foirequest_authenticated,
+    can_write_foirequest,
     get_read_foirequest_queryset,
     get_write_foirequest_queryset,
 )
+from froide.helper.auth import clear_permission_cache, get_permission_cache
 from froide.team.models import TeamMembership
 from froide.team.tests import TeamMembershipFactory
 
@@ -268,3 +274,42 @@ def test_campaign_access(foirequest_campaign, other_user, campaign_user):
     req = HttpRequest()
     req.user = campaign_user
     assert get_write_foirequest_queryset(req).get() == foirequest_campaign
+
+
+@pytest.mark.django_db
+def test_permission_cache_per_request(team_member, team_member_write):
+    foirequests = FoiRequestFactory.create_batch(
+        5,
+        visibility=FoiRequest.VISIBILITY.VISIBLE_TO_REQUESTER,
+        team=team_member.team,
+    )
+    req = HttpRequest()
+    req.user = team_member.user
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(3):
+            for foirequest in foirequests:
+                assert can_read_foirequest(foirequest, req)
+                assert can_read_foirequest_authenticated(
+                    foirequest, req, allow_code=False
+                )
+                assert not can_write_foirequest(foirequest, req)
+    membership_queries = [
+        q for q in ctx.captured_queries if "team_teammembership" in q["sql"]
+    ]
+    # Team memberships of the user are loaded once for all requests
+    assert len(membership_queries) == 1
+
+    cache = get_permission_cache(req)
+    assert cache.evaluations["can_read_foirequest"] == len(foirequests)
+    assert cache.hits["can_read_foirequest"] == 2 * len(foirequests)
+    assert cache.evaluations["can_write_foirequest"] == len(foirequests)
+
+    # Results are not shared with other requests or users
+    other_req = HttpRequest()
+    other_req.user = team_member_write.user
+    assert can_write_foirequest(foirequests[0], other_req)
+    req.user = team_member_write.user
+    assert can_write_foirequest(foirequests[0], req)
+
+    clear_permission_cache(req)
+    assert not get_permission_cache(req).evaluations
@@ -12,7 +12,8 @@ from django.utils.translation import gettext_lazy as _
 import pytest
 from factory.django import mute_signals
 
-from froide.foirequest.foi_mail import add_message_from_email
+from froide.foirequest.delivery import DeliveryRoutingIndex
+from froide.foirequest.foi_mail import add_message_from_email, get_alternative_mail
 from froide.foirequest.models import DeferredMessage, FoiMessage, FoiRequest
 from froide.foirequest.services import BOUNCE_TAG
 from froide.foirequest.tasks import process_mail
@@ -388,6 +389,42 @@ def test_double_deferred(deferred_message_setup):
     assert DeferredMessage.objects.count() == 3
 
 
+@pytest.mark.django_db
+def test_delivery_routing_index(deferred_message_setup, django_assert_num_queries):
+    req = deferred_message_setup["req"]
+    other_req = deferred_message_setup["other_req"]
+    alternative_mail = get_alternative_mail(other_req)
+    deferred_mail = "deferred@fragdenstaat.de"
+    ambiguous_mail = "ambiguous@fragdenstaat.de"
+    DeferredMessage.objects.create(recipient=deferred_mail, request=req)
+    DeferredMessage.objects.create(recipient=ambiguous_mail, request=req)
+    DeferredMessage.objects.create(recipient=ambiguous_mail, request=other_req)
+    DeferredMessage.objects.create(sender="spam@example.org", spam=True)
+
+    recipients = [req.secret_address, alternative_mail, deferred_mail, ambiguous_mail]
+    senders = ["spam@example.org", "hb@example.com"]
+    # request lookup, deferred recipients, spam senders
+    with django_assert_num_queries(3):
+        routing = DeliveryRoutingIndex.build(recipients, senders)
+
+    assert routing.find_foirequest(recipients[0]) == req
+    assert routing.find_foirequest(recipients[1]) == other_req
+    assert routing.find_foirequest(deferred_mail) == req
+    assert routing.find_foirequest(ambiguous_mail) is None
+    assert routing.is_spam_sender("spam@example.org")
+    assert not routing.is_spam_sender("hb@example.com")
+
+    # Deferred results are cached
+    with django_assert_num_queries(1):
+        routing = DeliveryRoutingIndex.build(recipients, senders)
+    assert routing.find_foirequest(deferred_mail) == req
+
+    # New deferred messages invalidate the cache
+    DeferredMessage.objects.create(sender="hb@example.com", spam=True)
+    routing = DeliveryRoutingIndex.build(recipients, senders)
+    assert routing.is_spam_sender("hb@example.com")
+
+
 @pytest.mark.django_db
 def test_pb_unknown(deferred_message_setup):
     count_messages = len(deferred_message_setup["req"].get_messages())
@@ -1,3 +1,4 @@
+import os
 from datetime import timedelta
 from unittest.mock import MagicMock, patch
 
@@ -5,18 +6,23 @@ from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 from django.core import mail
 from django.test import TestCase
-from django.utils import timezone
+from django.utils import timezone, translation
 from django.utils.safestring import SafeString
 
 import pytest
 
 from froide.comments.models import FroideComment
-from froide.foirequest.models import FoiMessage, FoiRequest
+from froide.foirequest.documents import get_message_text_fragments
+from froide.foirequest.models import FoiEvent, FoiMessage, FoiRequest
 from froide.foirequest.notifications import (
     Notification,
     batch_update_requester,
     send_update,
 )
+from froide.foirequest.pdf_generator import (
+    PDF_CACHE_STALE_AGE,
+    FoiRequestMessagePDFGenerator,
+)
 from froide.foirequest.tasks import (
     classification_reminder,
     detect_asleep,
@@ -67,7 +73,8 @@ class TaskTest(TestCase):
         fr.status = FoiRequest.STATUS.AWAITING_RESPONSE
         fr.save()
         mail.outbox = []
-        detect_asleep.delay()
+        with self.captureOnCommitCallbacks(execute=True):
+            detect_asleep.delay()
         fr = FoiRequest.objects.get(pk=fr.pk)
         self.assertEqual(fr.status, FoiRequest.STATUS.ASLEEP)
         self.assertEqual(len(mail.outbox), 1)
@@ -83,12 +90,61 @@ class TaskTest(TestCase):
         self.assertIn("1 day late", message_form["message"].value())
         self.assertIn("#%d" % fr.pk, message_form["message"].value())
         mail.outbox = []
-        detect_overdue.delay()
+        with self.captureOnCommitCallbacks(execute=True):
+            detect_overdue.delay()
         fr = FoiRequest.objects.get(pk=fr.pk)
         self.assertEqual(fr.status, FoiRequest.STATUS.AWAITING_RESPONSE)
         self.assertEqual(len(mail.outbox), 1)
         self.assertIn("Request became overdue", mail.outbox[0].subject)
 
+    def test_detect_overdue_batch(self):
+        due_date = timezone.now() - timedelta(hours=5)
+        requests = factories.FoiRequestFactory.create_batch(
+            3,
+            site=self.site,
+            status=FoiRequest.STATUS.AWAITING_RESPONSE,
+            due_date=due_date,
+        )
+        ids = {fr.id for fr in requests}
+        handler = MagicMock()
+        FoiRequest.requests_became_overdue.connect(handler)
+        mail.outbox = []
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                detect_overdue.delay()
+        finally:
+            FoiRequest.requests_became_overdue.disconnect(handler)
+        handler.assert_called_once()
+        self.assertTrue(ids <= {fr.id for fr in handler.call_args[1]["requests"]})
+        events = FoiEvent.objects.filter(
+            request_id__in=ids, event_name=FoiEvent.EVENTS.BECAME_OVERDUE
+        )
+        self.assertEqual(events.count(), 3)
+        recipients = {m.to[0] for m in mail.outbox}
+        self.assertTrue({fr.user.email for fr in requests} <= recipients)
+
+    def test_detect_overdue_rollback_sends_no_mails(self):
+        fr = factories.FoiRequestFactory.create(
+            site=self.site,
+            status=FoiRequest.STATUS.AWAITING_RESPONSE,
+            due_date=timezone.now() - timedelta(hours=5),
+        )
+        handler = MagicMock(side_effect=ValueError)
+        FoiRequest.requests_became_overdue.connect(handler)
+        mail.outbox = []
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                with self.assertRaises(ValueError):
+                    detect_overdue.delay()
+        finally:
+            FoiRequest.requests_became_overdue.disconnect(handler)
+        self.assertFalse(
+            FoiEvent.objects.filter(
+                request=fr, event_name=FoiEvent.EVENTS.BECAME_OVERDUE
+            ).exists()
+        )
+        self.assertEqual(len(mail.outbox), 0)
+
     def test_classification_reminder(self):
         fr = FoiRequest.objects.all()[0]
         fr.last_message = timezone.now() - timedelta(days=5)
@@ -366,6 +422,39 @@ def test_redacted_content_cache(foi_message_factory, django_assert_num_queries,
         assert redacted_content == expected_redacted_content[auth]
 
 
+@pytest.mark.django_db
+def test_redaction_diffs_on_save(
+    foi_message_factory, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        message = foi_message_factory(
+            subject="Request Alex Example",
+            subject_redacted="Request <<Redacted>>",
+            plaintext="Dear Mx. Example,\n\nGreetings,\nAlex Example",
+            plaintext_redacted="Dear <<Redacted>>,\n\nGreetings,\n<<Redacted>>",
+        )
+
+    message = FoiMessage.objects.get(id=message.id)
+    assert not message.needs_redaction_diffs()
+    with django_assert_num_queries(0):
+        assert message.get_redacted_subject(auth=True) == [
+            [False, "Request "],
+            [True, "Alex Example"],
+        ]
+        assert message.get_redacted_content(auth=False)[1] == [True, "<<Redacted>>"]
+
+    message.plaintext_redacted = "Dear <<Redacted>>,\n\nGreetings,\nAlex Example"
+    message.clear_render_cache()
+    with django_capture_on_commit_callbacks(execute=True):
+        message.save()
+    message = FoiMessage.objects.get(id=message.id)
+    assert message.redacted_content_anon == [
+        [False, "Dear "],
+        [True, "<<Redacted>>"],
+        [False, ",\n\nGreetings,\nAlex Example"],
+    ]
+
+
 @pytest.mark.django_db
 @pytest.mark.parametrize("auth", [True, False])
 def test_cached_rendered_content(
@@ -399,3 +488,66 @@ def test_cached_rendered_content(
         redacted_content = render_message_content(redacted_foi_message, auth)
         assert redacted_content == expected_redacted_content[auth]
         assert redacted_content == expected_redacted_content[auth]
+
+
+@pytest.mark.django_db
+def test_search_text_fragments(
+    foi_request_factory, foi_message_factory, django_assert_num_queries
+):
+    foirequest = foi_request_factory()
+    messages = [
+        foi_message_factory(request=foirequest, plaintext_redacted="message %d" % i)
+        for i in range(3)
+    ]
+    content = "".join(get_message_text_fragments(foirequest))
+    assert all("message %d" % i in content for i in range(3))
+
+    # Unchanged messages are not rendered again
+    with django_assert_num_queries(1):
+        get_message_text_fragments(foirequest)
+
+    messages[1].plaintext_redacted = "changed text"
+    messages[1].save()
+    # message versions, changed message, its attachments
+    with django_assert_num_queries(3):
+        content = "".join(get_message_text_fragments(foirequest))
+    assert "changed text" in content
+    assert "message 1" not in content
+
+
+@pytest.mark.django_db
+def test_cached_pdf(foi_message_factory, settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.FOI_PDF_CACHE = True
+    message = foi_message_factory.create()
+    generator = FoiRequestMessagePDFGenerator(message)
+
+    wp = MagicMock(__version__="1")
+    wp.HTML.return_value.write_pdf.return_value = b"%PDF-1"
+    with patch("froide.foirequest.pdf_generator.get_wp", return_value=wp):
+        assert generator.get_pdf_bytes() == b"%PDF-1"
+        assert generator.get_pdf_bytes() == b"%PDF-1"
+        assert wp.HTML.call_count == 1
+
+        # Other languages have their own PDFs
+        with translation.override("en"):
+            wp.HTML.return_value.write_pdf.return_value = b"%PDF-en"
+            assert generator.get_pdf_bytes() == b"%PDF-en"
+            assert wp.HTML.call_count == 2
+        assert generator.get_pdf_bytes() == b"%PDF-1"
+        assert wp.HTML.call_count == 2
+
+        cache_dir = tmp_path / generator.get_cache_dir()
+        outdated = timezone.now() - PDF_CACHE_STALE_AGE - timedelta(minutes=1)
+        for path in cache_dir.iterdir():
+            os.utime(path, (outdated.timestamp(), outdated.timestamp()))
+
+        message.timestamp -= timedelta(days=1)
+        wp.HTML.return_value.write_pdf.return_value = b"%PDF-2"
+        assert generator.get_pdf_bytes() == b"%PDF-2"
+        assert wp.HTML.call_count == 3
+
+    # Outdated version was removed, other languages are kept
+    assert [p.read_bytes() for p in cache_dir.iterdir()] == [b"%PDF-2"]
+    en_cache_dir = tmp_path / generator.get_cache_dir("en")
+    assert [p.read_bytes() for p in en_cache_dir.iterdir()] == [b"%PDF-en"]
@@ -1,7 +1,12 @@
 from django.test import TestCase
 
+from froide.foirequest.models import FoiRequest
 from froide.foirequest.tests import factories
-from froide.foirequest.utils import get_publicbody_for_email
+from froide.foirequest.utils import (
+    get_correspondent_emails,
+    get_emails_from_request,
+    get_publicbody_for_email,
+)
 from froide.publicbody.factories import FoiLawFactory, PublicBodyFactory
 
 
@@ -38,3 +43,26 @@ class FoiRequestPublicBodyInfoTest(TestCase):
 
         pb = get_publicbody_for_email(self.mediator.email, self.req)
         self.assertEqual(pb, self.mediator)
+
+    def test_get_publicbody_for_email_by_host(self):
+        other_pb = PublicBodyFactory(email="info@ministry.example.org")
+        pb = get_publicbody_for_email("press@ministry.example.org", self.req)
+        self.assertEqual(pb, other_pb)
+
+        # Subdomains of the sender host match as well
+        other_pb.email = "info@office.ministry.example.org"
+        other_pb.save()
+        pb = get_publicbody_for_email("press@ministry.example.org", self.req)
+        self.assertEqual(pb, other_pb)
+
+        # Hosts only sharing a suffix do not match
+        pb = get_publicbody_for_email("press@otherministry.example.org", self.req)
+        self.assertIsNone(pb)
+
+    def test_correspondent_emails_cached(self):
+        list(get_emails_from_request(self.req))
+        with self.assertNumQueries(2):
+            # request and public bodies of cached entries
+            req = FoiRequest.objects.get(id=self.req.id)
+            emails = [info.email for info in get_correspondent_emails(req)]
+        self.assertIn(self.pb1_alt_email, emails)
@@ -2,6 +2,7 @@ import datetime
 import json
 import re
 import zipfile
+from collections import defaultdict
 from dataclasses import dataclass
 from datetime import timedelta
 from functools import lru_cache
@@ -11,6 +12,7 @@ from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple, Union
 
 from django import forms
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.files import File
 from django.core.mail import mail_managers
@@ -36,7 +38,7 @@ from froide.helper.text_utils import (
     redact_subject,
     redact_user_strings,
 )
-from froide.publicbody.models import FoiLaw, PublicBody
+from froide.publicbody.models import FoiLaw, PublicBody, PublicBodyEmailHost
 
 from .models import FoiAttachment, FoiRequest
 
@@ -45,6 +47,7 @@ if TYPE_CHECKING:
 
 MAX_ATTACHMENT_SIZE = settings.FROIDE_CONFIG["max_attachment_size"]
 RECIPIENT_BLOCKLIST = settings.FROIDE_CONFIG.get("recipient_blocklist_regex", None)
+CORRESPONDENT_CACHE_TIMEOUT = 60 * 60 * 24
 
 
 @dataclass
@@ -323,7 +326,7 @@ def get_publicbody_for_email(
     email_host = get_host(email)
     if email_host is None:
         return None
-    pbs = PublicBody.objects.filter(email__endswith=email_host)
+    pbs = PublicBodyEmailHost.objects.find_publicbodies(email_host)
     if len(pbs) == 1:
         return pbs[0]
     elif foirequest.public_body in pbs:
@@ -350,8 +353,34 @@ def send_request_user_email(
     start_thread=False,
     **kwargs,
 ):
-    if not foirequest.user:
+    message = get_request_user_email(
+        foirequest,
+        subject=subject,
+        context=context,
+        add_idmark=add_idmark,
+        priority=priority,
+        start_thread=start_thread,
+        **kwargs,
+    )
+    if message is None:
         return
+    mail_intent.send(**message)
+
+
+def get_request_user_email(
+    foirequest,
+    subject=None,
+    context=None,
+    add_idmark=True,
+    priority=True,
+    start_thread=False,
+    **kwargs,
+):
+    """
+    Return the send kwargs of a mail to the requester, e.g. for bulk_send.
+    """
+    if not foirequest.user:
+        return None
     if subject and add_idmark:
         subject = "{} [#{}]".format(subject, foirequest.pk)
 
@@ -370,7 +399,7 @@ def send_request_user_email(
     )
     headers["List-Archive"] = foirequest.get_absolute_domain_short_url()
 
-    mail_intent.send(
+    return dict(
         user=foirequest.user,
         subject=subject,
         context=context,
@@ -421,15 +450,15 @@ def get_publicbody_emails(publicbody: PublicBody, include_mediator=True):
             )
 
 
-def get_emails_from_request_iterator(
-    foirequest, include_mediator=True
-) -> Iterator[PublicBodyEmailInfo]:
-    if foirequest.public_body:
-        # Get emails from public body / mediator
-        yield from get_publicbody_emails(
-            foirequest.public_body, include_mediator=include_mediator
-        )
+def get_correspondent_cache_key(foirequest_id: int) -> str:
+    return "froide:foirequest:correspondents:{}".format(foirequest_id)
 
+
+def clear_correspondent_cache(foirequest_id: int):
+    cache.delete(get_correspondent_cache_key(foirequest_id))
+
+
+def extract_correspondent_emails(foirequest) -> Iterator[PublicBodyEmailInfo]:
     # Get emails from response messages,
     domains = tuple(get_foi_mail_domains())
     messages = foirequest.response_messages()
@@ -463,6 +492,43 @@ def get_emails_from_request_iterator(
                 continue
             yield PublicBodyEmailInfo(email=email, name=email, publicbody=None)
 
+
+def get_correspondent_emails(foirequest) -> List[PublicBodyEmailInfo]:
+    """
+    Addresses extracted from response messages, cached per request
+    """
+    cache_key = get_correspondent_cache_key(foirequest.id)
+    entries = cache.get(cache_key)
+    if entries is None:
+        infos = list(extract_correspondent_emails(foirequest))
+        entries = [
+            (info.email, info.name, info.publicbody.id if info.publicbody else None)
+            for info in infos
+        ]
+        cache.set(cache_key, entries, CORRESPONDENT_CACHE_TIMEOUT)
+        return infos
+
+    publicbody_ids = {pb_id for _email, _name, pb_id in entries if pb_id}
+    publicbodies = {}
+    if publicbody_ids:
+        publicbodies = PublicBody.non_filtered_objects.in_bulk(publicbody_ids)
+    return [
+        PublicBodyEmailInfo(email=email, name=name, publicbody=publicbodies.get(pb_id))
+        for email, name, pb_id in entries
+    ]
+
+
+def get_emails_from_request_iterator(
+    foirequest, include_mediator=True
+) -> Iterator[PublicBodyEmailInfo]:
+    if foirequest.public_body:
+        # Get emails from public body / mediator
+        yield from get_publicbody_emails(
+            foirequest.public_body, include_mediator=include_mediator
+        )
+
+    yield from get_correspondent_emails(foirequest)
+
     if foirequest.public_body.parent and foirequest.public_body.parent.email:
         email = foirequest.public_body.parent.email.lower()
         yield PublicBodyEmailInfo(
@@ -616,9 +682,12 @@ def make_account_private(sender, user=None, **kwargs):
 
 
 def rerun_message_redaction(foirequests):
+    replacements_by_user = {}
     for foirequest in foirequests:
         user = foirequest.user
-        user_replacements = user.get_redactions()
+        if user.pk not in replacements_by_user:
+            replacements_by_user[user.pk] = user.get_redactions()
+        user_replacements = replacements_by_user[user.pk]
         for message in foirequest.messages:
             message.subject_redacted = redact_subject(
                 message.subject, user_replacements
@@ -754,10 +823,28 @@ def add_ical_events(foirequest, cal):
             cal.add_component(event)
 
 
-def export_user_data(user):
+EXPORT_REQUEST_BATCH_SIZE = 100
+
+
+def get_export_request_parts(user):
+    request_ids = list(user.foirequest_set.order_by("id").values_list("id", flat=True))
+    for i in range(0, len(request_ids), EXPORT_REQUEST_BATCH_SIZE):
+        batch = request_ids[i : i + EXPORT_REQUEST_BATCH_SIZE]
+        yield [batch[0], batch[-1]]
+
+
+def export_user_requests(user, part=None):
+    foirequests = user.foirequest_set.all()
+    if part is not None:
+        foirequests = foirequests.filter(id__gte=part[0], id__lte=part[1])
+    request_ids = list(foirequests.order_by("id").values_list("id", flat=True))
+    for i in range(0, len(request_ids), EXPORT_REQUEST_BATCH_SIZE):
+        yield from export_request_batch(request_ids[i : i + EXPORT_REQUEST_BATCH_SIZE])
+
+
+def export_request_batch(request_ids):
     from froide.helper.api_utils import get_fake_api_context
 
-    from .models import FoiAttachment, FoiProject
     from .serializers import (
         FoiAttachmentSerializer,
         FoiMessageSerializer,
@@ -765,7 +852,25 @@ def export_user_data(user):
     )
 
     ctx = get_fake_api_context()
-    foirequests = user.foirequest_set.all().iterator()
+    foirequests = (
+        FoiRequest.objects.filter(id__in=request_ids)
+        .select_related("public_body", "law", "jurisdiction", "user")
+        .prefetch_related("tags")
+        .order_by("id")
+    )
+    messages = defaultdict(list)
+    for message in (
+        FoiMessage.objects.filter(request_id__in=request_ids, is_draft=False)
+        .select_related("sender_user", "sender_public_body", "recipient_public_body")
+        .prefetch_related("tags")
+        .order_by("timestamp")
+    ):
+        messages[message.request_id].append(message)
+    attachments = defaultdict(list)
+    for attachment in FoiAttachment.objects.select_related(
+        "belongs_to", "redacted"
+    ).filter(belongs_to__request_id__in=request_ids):
+        attachments[attachment.belongs_to.request_id].append(attachment)
 
     for foirequest in foirequests:
         data = FoiRequestListSerializer(foirequest, context=ctx).data
@@ -775,35 +880,52 @@ def export_user_data(user):
             json.dumps(data).encode("utf-8"),
         )
 
-        messages = foirequest.get_messages(with_tags=True)
-        for message in messages:
+        all_attachments = attachments[foirequest.id]
+        public = foirequest.visibility == FoiRequest.VISIBILITY.VISIBLE_TO_PUBLIC
+        for attachment in all_attachments:
+            attachment.belongs_to.request = foirequest
+        message = None
+        for message in messages[foirequest.id]:
+            message.request = foirequest
+            # Same as the anonymous attachment query of the serializer
+            message.visible_attachments = [
+                att
+                for att in all_attachments
+                if public and att.approved and att.belongs_to_id == message.id
+            ]
             data = FoiMessageSerializer(message, context=ctx).data
             yield (
                 "requests/%s/%s/message.json" % (foirequest.id, message.id),
                 json.dumps(data).encode("utf-8"),
             )
 
-        all_attachments = FoiAttachment.objects.select_related("redacted").filter(
-            belongs_to__request=foirequest
+        if not all_attachments:
+            continue
+        # Attachments are filed under the last message like before
+        message_id = message.id if message else all_attachments[0].belongs_to_id
+        yield (
+            "requests/%s/%s/attachments.json" % (foirequest.id, message_id),
+            json.dumps(
+                [
+                    FoiAttachmentSerializer(att, context=ctx).data
+                    for att in all_attachments
+                ]
+            ).encode("utf-8"),
         )
-        if all_attachments:
+        for attachment in all_attachments:
+            # Files are copied in chunks when the zip is written
+            if not attachment.file or not attachment.file.storage.exists(
+                attachment.file.name
+            ):
+                continue
             yield (
-                "requests/%s/%s/attachments.json" % (foirequest.id, message.id),
-                json.dumps(
-                    [
-                        FoiAttachmentSerializer(att, context=ctx).data
-                        for att in all_attachments
-                    ]
-                ).encode("utf-8"),
+                "requests/%s/%s/%s" % (foirequest.id, message_id, attachment.name),
+                attachment.file,
             )
-        for attachment in all_attachments:
-            try:
-                yield (
-                    "requests/%s/%s/%s" % (foirequest.id, message.id, attachment.name),
-                    attachment.get_bytes(),
-                )
-            except IOError:
-                pass
+
+
+def export_user_data(user):
+    from .models import FoiProject
 
     drafts = user.requestdraft_set.all()
     if drafts:
@@ -24,6 +24,7 @@ from froide.helper.content_urls import get_content_url
 from froide.helper.storage import make_unique_filename
 from froide.helper.text_utils import slugify
 from froide.helper.utils import is_ajax, render_400, render_403
+from froide.helper.zip_utils import zip_response
 from froide.proof.forms import handle_proof_form
 from froide.upload.forms import get_uppy_i18n
 
@@ -1111,16 +1112,14 @@ def download_message_letter_pdf(request, foirequest, message_id):
 
 @allow_read_foirequest_authenticated
 def download_message_package(request, foirequest, message_id):
-    from ..foi_mail import package_message
+    from ..foi_mail import stream_message_package
 
     message = get_object_or_404(FoiMessage, request=foirequest, pk=message_id)
-    response = HttpResponse(package_message(message), content_type="application/zip")
     name = "%s-%s" % (
         foirequest.slug,
         message.pk,
     )
-    response["Content-Disposition"] = 'attachment; filename="%s.zip"' % name
-    return response
+    return zip_response(stream_message_package(message), "%s.zip" % name)
 
 
 @allow_write_foirequest
@@ -5,10 +5,11 @@ from django.shortcuts import render
 
 from froide.frontpage.models import FeaturedRequest
 from froide.helper.cache import cache_anonymous_page
+from froide.helper.zip_utils import zip_response
 from froide.publicbody.models import PublicBody
 
 from ..decorators import allow_read_foirequest_authenticated
-from ..foi_mail import package_foirequest
+from ..foi_mail import stream_foirequest_package
 from ..models import FoiRequest
 from ..pdf_generator import FoiRequestPDFGenerator
 
@@ -33,15 +34,11 @@ def index(request):
 
 @allow_read_foirequest_authenticated
 def download_foirequest_zip(request, foirequest):
-    response = HttpResponse(
-        package_foirequest(foirequest), content_type="application/zip"
-    )
     name = "%s-%s" % (
         foirequest.slug,
         foirequest.pk,
     )
-    response["Content-Disposition"] = 'attachment; filename="%s.zip"' % name
-    return response
+    return zip_response(stream_foirequest_package(foirequest), "%s.zip" % name)
 
 
 @allow_read_foirequest_authenticated
@@ -1,4 +1,5 @@
 import json
+from collections import defaultdict
 from urllib.parse import quote
 
 from django.shortcuts import get_object_or_404, redirect, render
@@ -136,51 +137,49 @@ def get_foirequest_context(request, obj):
 
     messages = obj.get_messages(with_tags=can_write)
 
+    attachments_by_message = defaultdict(list)
+    for attachment in all_attachments:
+        attachments_by_message[attachment.belongs_to_id].append(attachment)
+
     for message in messages:
         message.request = obj
-        message.all_attachments = [
-            a for a in all_attachments if a.belongs_to_id == message.id
-        ]
+        message.all_attachments = attachments_by_message[message.id]
 
         # Preempt attribute access
         for att in message.all_attachments:
             att.belongs_to = message
 
         message.listed_attachments = [
-            a
-            for a in all_attachments
-            if a.belongs_to_id == message.id and can_see_attachment(a, can_write)
-        ]
-        message.hidden_attachments = [
-            a for a in message.listed_attachments if a.is_irrelevant
+            a for a in message.all_attachments if can_see_attachment(a, can_write)
         ]
-        message.can_edit_attachments = message.can_edit or bool(
-            [a for a in message.listed_attachments if a.can_edit]
+        message.hidden_attachments = []
+        message.approved_attachments = []
+        message.unapproved_attachments = []
+        for a in message.listed_attachments:
+            if a.is_irrelevant:
+                message.hidden_attachments.append(a)
+            elif a.approved:
+                message.approved_attachments.append(a)
+            else:
+                message.unapproved_attachments.append(a)
+        message.can_edit_attachments = message.can_edit or any(
+            a.can_edit for a in message.listed_attachments
         )
-        message.approved_attachments = [
-            a
-            for a in message.listed_attachments
-            if a.approved and a not in message.hidden_attachments
-        ]
-        message.unapproved_attachments = [
-            a
-            for a in message.listed_attachments
-            if not a.approved and a not in message.hidden_attachments
-        ]
 
-    events = (
+    events = list(
         FoiEvent.objects.filter(request=obj)
         .select_related("user", "request", "public_body")
         .order_by("timestamp")
     )
 
-    event_count = len(events)
-    last_index = event_count
+    # Events since a message up to the next message, walking backwards
+    end = len(events)
     for message in reversed(obj.messages):
-        message.events = [
-            ev for ev in events[:last_index] if ev.timestamp >= message.timestamp
-        ]
-        last_index = last_index - len(message.events)
+        start = end
+        while start > 0 and events[start - 1].timestamp >= message.timestamp:
+            start -= 1
+        message.events = events[start:end]
+        end = start
 
     # TODO: remove active_tab
     active_tab = "info"
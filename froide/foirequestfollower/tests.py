@@ -15,7 +15,8 @@ from froide.foirequest.models import FoiRequest
 from froide.foirequest.models.message import MessageKind
 from froide.foirequest.tests import factories
 from froide.foirequest.tests.test_api_request import OAuthAPIMixin
-from froide.follow.notifications import run_batch_update
+from froide.follow.notifications import get_follower_updates, run_batch_update
+from froide.helper.notifications import Notification, TemplatedEvent
 
 from .configuration import FoiRequestFollowConfiguration
 from .models import FoiRequestFollower
@@ -306,6 +307,32 @@ class FoiRequestFollowerTest(TestCase):
         # Don't send updates to dummy for dummy's own comment
         self.assertEqual(len(mail.outbox), 0)
 
+    def test_follower_updates_single_query(self):
+        requests = factories.FoiRequestFactory.create_batch(3, site=self.site)
+        for req in requests:
+            FoiRequestFollowerFactory.create_batch(2, content_object=req)
+        now = timezone.now()
+        notifications = [
+            Notification(
+                section="requests",
+                event_type="test",
+                object=req,
+                object_label=req.title,
+                timestamp=now,
+                event=TemplatedEvent("Update of {title}", title=req.title),
+                user_id=req.user_id,
+            )
+            for req in requests
+        ]
+        with self.assertNumQueries(1):
+            follower_updates = get_follower_updates(notifications)
+        self.assertEqual(len(follower_updates), 6)
+        for update_list in follower_updates.values():
+            self.assertEqual(len(update_list), 1)
+            item = update_list[0]
+            self.assertEqual(item.events, ["Update of {}".format(item.object_label)])
+            self.assertIn("/unfollow/", item.unfollow_link)
+
 
 class ApiTest(OAuthAPIMixin, TestCase):
     def setUp(self):
@@ -191,7 +191,7 @@ class Follower(models.Model):
         to_sign = [
             self.email,
             self.configuration.model_name,
-            str(self.content_object.id),
+            str(self.content_object_id),
             str(self.id),
         ]
         return hmac.new(
@@ -21,16 +21,24 @@ batch_update_follower_email = mail_registry.register(
 )
 
 
-def get_follower_updates(
-    notifications: List[Notification],
-) -> Dict[FollowerIdent, FollowerItem]:
-    follower_updates = defaultdict(list)
+def get_follower_language(follower) -> str:
+    if follower.user and follower.user.language:
+        return follower.user.language
+    return settings.LANGUAGE_CODE
+
+
+def get_update_groups(notifications: List[Notification]):
+    """
+    Group notifications by section and object and collect the groups
+    each follow configuration wants to send.
+    """
 
     def key_func(n):
         return (n.section, n.object.id, n.timestamp)
 
     notifications = sorted(notifications, key=key_func)
 
+    groups_by_configuration = defaultdict(list)
     for (section, _obj_id), update_list_generator in itertools.groupby(
         notifications, lambda n: (n.section, n.object.id)
     ):
@@ -44,36 +52,57 @@ def get_follower_updates(
         for configuration in configurations:
             if not configuration.wants_update(update_list):
                 continue
+            groups_by_configuration[configuration].append(
+                (section, content_object, update_list)
+            )
+    return groups_by_configuration
+
+
+def get_followers_by_object(configuration, content_objects):
+    followers_by_object = defaultdict(lambda: defaultdict(list))
+    followers = configuration.model.objects.filter(
+        content_object__in=content_objects, confirmed=True
+    ).select_related("user")
+    for follower in followers:
+        followers_by_object[follower.content_object_id][
+            get_follower_language(follower)
+        ].append(follower)
+    return followers_by_object
+
+
+def get_follower_updates(
+    notifications: List[Notification],
+) -> Dict[FollowerIdent, FollowerItem]:
+    follower_updates = defaultdict(list)
 
-            follower_model = configuration.model
-
-            followers = follower_model.objects.filter(
-                content_object=content_object, confirmed=True
-            ).select_related("user")
-            for follower in followers:
-                if not any(
-                    n
-                    for n in update_list
-                    if n.user_id is None or n.user_id != follower.user_id
-                ):
-                    continue
-                ident = follower.get_ident()
-
-                if follower.user and follower.user.language:
-                    lang = follower.user.language
-                else:
-                    lang = settings.LANGUAGE_CODE
+    groups_by_configuration = get_update_groups(notifications)
+    for configuration, groups in groups_by_configuration.items():
+        # All followers of all touched objects in one query
+        followers_by_object = get_followers_by_object(
+            configuration, {content_object for _, content_object, _ in groups}
+        )
+        for section, content_object, update_list in groups:
+            author_ids = {n.user_id for n in update_list}
+            # Followers are not notified about their own updates only
+            only_author = author_ids.pop() if len(author_ids) == 1 else None
 
+            followers_by_language = followers_by_object[content_object.id]
+            for lang, followers in followers_by_language.items():
                 with translation.override(lang):
-                    follower_updates[ident].append(
-                        FollowerItem(
-                            section=section,
-                            content_object=content_object,
-                            object_label=update_list[0].object_label,
-                            unfollow_link=follower.get_unfollow_link(),
-                            events=[n.event.as_text() for n in update_list],
+                    events = [n.event.as_text() for n in update_list]
+                    for follower in followers:
+                        if only_author is not None and follower.user_id == only_author:
+                            continue
+                        follower.content_object = content_object
+                        follower_updates[follower.get_ident()].append(
+                            FollowerItem(
+                                section=section,
+                                content_object=content_object,
+                                object_label=update_list[0].object_label,
+                                unfollow_link=follower.get_unfollow_link(),
+                                events=events,
+                            )
                         )
-                    )
 
     return follower_updates
 
@@ -99,19 +128,24 @@ def run_batch_update(start=None, end=None):
 
     follower_updates = get_follower_updates(notifications)
 
-    # Send out update on comments and event to followers
-    for follower_ident, update_list in follower_updates.items():
-        send_update(follower_ident, update_list, batch=True)
+    # Send out digests of comments and events to followers in bulk
+    messages = (
+        get_update_message(follower_ident, update_list)
+        for follower_ident, update_list in follower_updates.items()
+    )
+    batch_update_follower_email.bulk_send([m for m in messages if m is not None])
 
 
-def send_update(user_or_email: FollowerIdent, update_list, batch=False):
+def get_update_message(user_or_email: FollowerIdent, update_list):
     if not user_or_email:
-        return
+        return None
     user, email = None, None
+    language = None
     if isinstance(user_or_email, str):
         email = user_or_email
     else:
         user = user_or_email
+        language = user.language
 
     count = len(update_list)
     context = {
@@ -131,9 +165,17 @@ def send_update(user_or_email: FollowerIdent, update_list, batch=False):
     #         confirmed=True,
     #     )
     #     context.update(follower.get_context())
+    return {"user": user, "email": email, "context": context, "language": language}
+
+
+def send_update(user_or_email: FollowerIdent, update_list, batch=False):
+    message = get_update_message(user_or_email, update_list)
+    if message is None:
+        return
     if batch:
         mail_intent = batch_update_follower_email
     else:
         mail_intent = update_follower_email
 
-    mail_intent.send(user=user, email=email, context=context)
+    message.pop("language")
+    mail_intent.send(**message)
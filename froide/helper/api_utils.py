@@ -6,6 +6,7 @@ from django.utils.html import format_html
 
 from elasticsearch_dsl.query import Q
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
@@ -14,6 +15,7 @@ from rest_framework.reverse import reverse
 from rest_framework.serializers import ListSerializer
 from rest_framework.test import APIRequestFactory
 from rest_framework.utils.serializer_helpers import ReturnDict
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework_jsonp.renderers import JSONPRenderer
 
 
@@ -109,6 +111,42 @@ class ElasticLimitOffsetPagination(CustomLimitOffsetPagination):
         return None
 
 
+class ElasticCursorPagination(CustomLimitOffsetPagination):
+    """
+    Walks search results with opaque cursor tokens instead of offsets,
+    so deep pages cost the same as the first one.
+    Start with an empty `cursor` parameter and follow `next`.
+    """
+
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        from .search.queryset import InvalidCursor
+
+        self.limit = self.get_limit(request) or self.max_limit
+        self.offset = None
+        self.request = request
+        self.queryset = queryset
+        try:
+            queryset.set_cursor(request.GET.get(self.cursor_query_param), self.limit)
+            self.count = self.get_count(queryset)
+            self.next_cursor = queryset.get_next_cursor()
+        except InvalidCursor:
+            raise NotFound("Invalid cursor") from None
+        return None
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.offset_query_param
+        )
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        return None
+
+
 class OpenRefineReconciliationMixin(object):
     class RECONCILIATION_META:
         name = None
@@ -1,4 +1,5 @@
-from functools import lru_cache, reduce
+from collections import Counter
+from functools import reduce, wraps
 from operator import or_
 
 from django.contrib.auth import get_permission_codename
@@ -7,7 +8,7 @@ from django.core.exceptions import PermissionDenied
 from django.db.models import Q
 
 from froide.account.models import User
-from froide.team.models import Team
+from froide.team.models import Team, TeamMembership
 
 AUTH_MAPPING = {
     "read": "view",
@@ -15,6 +16,82 @@ AUTH_MAPPING = {
 }
 
 
+class PermissionCache:
+    """
+    Permission results of one request. Lives on the request, so views,
+    templates and serializers share results and they are freed with
+    the request. Counts evaluations and cache hits per function.
+    """
+
+    def __init__(self, identity):
+        self.identity = identity
+        self.results = {}
+        self.evaluations = Counter()
+        self.hits = Counter()
+        self.team_roles = None
+
+    def get_team_roles(self, user):
+        if self.team_roles is None:
+            self.team_roles = TeamMembership.objects.get_roles_for_user(user)
+        return self.team_roles
+
+
+def get_permission_cache(request):
+    # Share the cache between a DRF request and the wrapped HttpRequest
+    http_request = getattr(request, "_request", request)
+    user = getattr(request, "user", None)
+    token = getattr(request, "auth", None)
+    identity = (getattr(user, "pk", None), id(token) if token is not None else None)
+    cache = getattr(http_request, "_permission_cache", None)
+    if cache is None or cache.identity != identity:
+        # Authentication changed, e.g. by DRF token authentication
+        cache = PermissionCache(identity)
+        http_request._permission_cache = cache
+    return cache
+
+
+def clear_permission_cache(request):
+    http_request = getattr(request, "_request", request)
+    http_request._permission_cache = None
+
+
+def cache_per_request(func):
+    """
+    Cache permission function results of (obj, request, ...) calls
+    on the request.
+    """
+
+    @wraps(func)
+    def wrapper(obj, request=None, *args, **kwargs):
+        if request is None:
+            return func(obj, request, *args, **kwargs)
+        cache = get_permission_cache(request)
+        key = (func, obj, args, tuple(sorted(kwargs.items())))
+        try:
+            result = cache.results[key]
+        except KeyError:
+            cache.evaluations[func.__qualname__] += 1
+            result = func(obj, request, *args, **kwargs)
+            cache.results[key] = result
+        else:
+            cache.hits[func.__qualname__] += 1
+        return result
+
+    return wrapper
+
+
+def team_can_do(request, team_id, verb):
+    """
+    Check team membership against all active memberships of the user,
+    loaded once per request.
+    """
+    roles = get_permission_cache(request).get_team_roles(request.user)
+    role = roles.get(team_id)
+    if role is None:
+        return False
+    return TeamMembership.role_can_do(role, verb)
+
+
 def check_permission(obj, request, verb):
     user = request.user
     opts = obj._meta
@@ -54,13 +131,14 @@ def has_authenticated_access(obj, request, verb="write", scope=None):
     if token is None and check_permission(obj, request, verb):
         return True
 
-    if hasattr(obj, "team") and obj.team and obj.team.can_do(verb, user):
+    team_id = getattr(obj, "team_id", None)
+    if team_id is not None and team_can_do(request, team_id, verb):
         return True
 
     return False
 
 
-@lru_cache()
+@cache_per_request
 def can_read_object(obj, request=None, scope=None):
     if hasattr(obj, "is_public") and obj.is_public():
         return True
@@ -69,19 +147,19 @@ def can_read_object(obj, request=None, scope=None):
     return has_authenticated_access(obj, request, verb="read", scope=scope)
 
 
-@lru_cache()
+@cache_per_request
 def can_read_object_authenticated(obj, request=None, scope=None):
     if request is None:
         return False
     return has_authenticated_access(obj, request, verb="read", scope=scope)
 
 
-@lru_cache()
+@cache_per_request
 def can_write_object(obj, request, scope=None):
     return has_authenticated_access(obj, request, scope=scope)
 
 
-@lru_cache()
+@cache_per_request
 def can_manage_object(obj, request, scope=None):
     """
     Team owner permission
@@ -89,7 +167,7 @@ def can_manage_object(obj, request, scope=None):
     return has_authenticated_access(obj, request, "manage", scope=scope)
 
 
-@lru_cache()
+@cache_per_request
 def can_moderate_object(obj, request):
     return check_permission(obj, request, "moderate")
 
@@ -239,11 +317,6 @@ def require_crew(view_func):
     return decorator
 
 
-def clear_lru_caches():
-    for f in ACCESS_MAPPING.values():
-        f.cache_clear()
-
-
 def is_crew(user: User | AnonymousUser) -> bool:
     if user.is_authenticated:
         return user.is_crew
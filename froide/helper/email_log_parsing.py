@@ -1,5 +1,8 @@
 import collections
+import json
+import os
 import re
+import time
 from collections import defaultdict, namedtuple
 from pathlib import Path
 from typing import Iterable, List, Optional
@@ -27,6 +30,7 @@ class PostfixLogfileParser(collections.abc.Iterator):
     PROCESS_RE = r"(?P<process>[^:]+)"
     FIELDS_RE = r"(?P<fields>.*)"
     LINE_RE = rf"^{TIMESTAMP_RE} {USER_RE} {PROCESS_RE}: {QUEUE_ID_REGEX}: {FIELDS_RE}$"
+    LINE_PATTERN = re.compile(LINE_RE)
 
     def __init__(
         self,
@@ -80,17 +84,19 @@ class PostfixLogfileParser(collections.abc.Iterator):
             Optional[PostfixLogLine]: If the logline was parsed successfullt, a PostfixLogLine namedtuple is returned. If it could not be parsed, None is returned
         """
 
-        match = re.match(self.LINE_RE, line)
+        # We only care for postfix lines, skip others before matching
+        if "postfix" not in line:
+            return None
+        match = self.LINE_PATTERN.match(line)
         if not match:
-            return
-        line_data = match.groupdict()
-
-        # We only care for postfix lines
-        if "postfix" not in line_data["process"]:
+            return None
+        if "postfix" not in match.group("process"):
             return None
 
-        data = self._parse_fields(line_data["fields"].split(","), self.relevant_fields)
-        return PostfixLogLine(line_data["timestamp"], line_data["queue_id"], data)
+        data = self._parse_fields(
+            match.group("fields").split(","), self.relevant_fields
+        )
+        return PostfixLogLine(match.group("timestamp"), match.group("queue_id"), data)
 
     @staticmethod
     def _parse_fields(fields: list, relevant_fields: Optional[Iterable] = None) -> dict:
@@ -135,17 +141,16 @@ class PostfixLogfileParser(collections.abc.Iterator):
 class DogtailPostfixLogfileParser(PostfixLogfileParser):
     """A logfile parser that keeps track of its position in the logfile using dogtail.
 
-    It tries to ignore parts of the log that were already fully processed.
-    However it can only ignore parts at the beginning of the log where all mails
-    where queue ids seen in the logfile until then left the queue.
-    This means that if a message bounces for a longer time, the log position
-    cannot be updated until this message is either delivered successfully or is
-    deleted from the queue.
-    Until then parts of the log will be processed again and again and the messages
-    is this part will be returned by the iterator on every invocation.
+    Every run only reads the log written since the previous run.
+    Messages that are still in the queue at the end of a run are stored
+    with their log lines in a state file next to the offset file and
+    are completed when a later run sees them leave the queue.
+    Messages that were not seen for STATE_MAX_AGE seconds are dropped
+    from the state, e.g. when their log was lost in a rotation.
     """
 
     DEFAULT_DOGTAIL_OFFSET_PATH = Path("./mail_log.offset")
+    STATE_MAX_AGE = 14 * 24 * 60 * 60
 
     def __init__(
         self,
@@ -163,32 +168,50 @@ class DogtailPostfixLogfileParser(PostfixLogfileParser):
             offset_path=offset_path,
         )
         super().__init__(self.logfile_reader)
-        self._msg_log = defaultdict(lambda: {"log": [], "data": {}, "offset": None})
+        self.state_path = Path("{}.state".format(offset_path))
+        self._msg_log = defaultdict(lambda: {"log": [], "data": {}, "seen": None})
+        self._msg_log.update(self.load_state())
         self._log_read = False
 
+    def load_state(self):
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        min_seen = time.time() - self.STATE_MAX_AGE
+        return {
+            queue_id: msg
+            for queue_id, msg in state.items()
+            if msg["seen"] is None or msg["seen"] >= min_seen
+        }
+
+    def save_state(self):
+        tmp_path = Path("{}.tmp".format(self.state_path))
+        with open(tmp_path, "w") as f:
+            json.dump(self._msg_log, f, separators=(",", ":"))
+        os.replace(tmp_path, self.state_path)
+
     def iteration_done(self):
-        if not self._msg_log:
-            if self._log_read:
-                self.logfile_reader.update_offset_file()
-        else:
-            first_logoffset = min(x["offset"] for x in self._msg_log.values())
-            self.logfile_reader.write_offset_to_file(first_logoffset)
+        if not self._log_read:
+            return
+        # State first: a crash in between re-reads lines but loses none
+        self.save_state()
+        self.logfile_reader.update_offset_file()
 
     def __next__(self):
-        for line, offset in self.logfile_reader:
+        for line, _offset in self.logfile_reader:
             self._log_read = True
             parsed_line = self._parse_line(line)
             if parsed_line is None:
                 continue
 
-            self._msg_log[parsed_line.queue_id]["log"].append(line)
-            self._msg_log[parsed_line.queue_id]["data"].update(parsed_line.data)
-
-            if self._msg_log[parsed_line.queue_id]["offset"] is None:
-                self._msg_log[parsed_line.queue_id]["offset"] = offset
+            msg = self._msg_log[parsed_line.queue_id]
+            msg["log"].append(line)
+            msg["data"].update(parsed_line.data)
+            msg["seen"] = time.time()
 
-            if self._is_completed_message(self._msg_log[parsed_line.queue_id]):
-                msg = self._msg_log[parsed_line.queue_id]
+            if self._is_completed_message(msg):
                 del self._msg_log[parsed_line.queue_id]
                 return msg
 
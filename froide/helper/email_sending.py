@@ -1,10 +1,13 @@
+import itertools
 import logging
+import time
 from collections import namedtuple
 
 from django.conf import settings
 from django.core.mail import EmailMessage, EmailMultiAlternatives, get_connection
 from django.template import TemplateDoesNotExist
 from django.template.loader import render_to_string, select_template
+from django.utils import translation
 
 try:
     from froide.bounce.utils import make_bounce_address, make_unsubscribe_header
@@ -234,7 +237,13 @@ class MailIntent:
             **email_kwargs,
         )
 
-    def send(self, email=None, user=None, context=None, template_base=None, **kwargs):
+    def prepare(
+        self, email=None, user=None, context=None, template_base=None, **kwargs
+    ):
+        """
+        Return content, address, context and kwargs of the mail
+        or None if it should not be sent.
+        """
         if context is None:
             context = {}
         if user is not None:
@@ -244,7 +253,7 @@ class MailIntent:
 
         # Pre-Check
         if not mail_middleware_registry.should_mail(self.mail_intent, context, kwargs):
-            return
+            return None
 
         email_address = self.get_email_address(context)
 
@@ -262,7 +271,73 @@ class MailIntent:
         # Make sure no extra subject kwarg is present
         email_kwargs.pop("subject", None)
 
-        return self.send_mail(email_content, email_address, context, email_kwargs)
+        return email_content, email_address, context, email_kwargs
+
+    def send(self, email=None, user=None, context=None, template_base=None, **kwargs):
+        prepared = self.prepare(
+            email=email,
+            user=user,
+            context=context,
+            template_base=template_base,
+            **kwargs,
+        )
+        if prepared is None:
+            return
+        return self.send_mail(*prepared)
+
+    def bulk_send(
+        self, messages, template_base=None, sender=None, on_sent=None, **kwargs
+    ):
+        """
+        Send this mail to many recipients over one connection.
+
+        `messages` are dicts with `email`, `user`, `context` and an optional
+        `language` of each mail, other keys are used as send kwargs of that
+        mail in addition to `kwargs`. Mails are rendered grouped by language.
+        `on_sent` is called with the `sent_token` values of messages once
+        they are handled, i.e. after their batch went out and the backend
+        reported them as delivered or when they were skipped, so callers
+        can record progress per batch.
+        Returns the BulkMailStats of the run.
+        """
+
+        def get_language(message):
+            return message.get("language") or settings.LANGUAGE_CODE
+
+        messages = sorted(messages, key=get_language)
+        if sender is None:
+            sender = BulkMailSender(on_sent=on_sent)
+        with sender:
+            for language, group in itertools.groupby(messages, key=get_language):
+                with translation.override(language):
+                    for message in group:
+                        message = dict(message)
+                        message.pop("language", None)
+                        sent_token = message.pop("sent_token", None)
+                        prepared = self.prepare(
+                            template_base=template_base, **{**kwargs, **message}
+                        )
+                        if prepared is None:
+                            sender.notify_sent([sent_token])
+                            continue
+                        email_content, email_address, context, email_kwargs = prepared
+                        send_result = mail_middleware_registry.send_mail(
+                            self.mail_intent,
+                            email_content,
+                            email_address,
+                            context,
+                            email_kwargs,
+                        )
+                        if send_result is not None:
+                            sender.notify_sent([sent_token])
+                            continue
+                        sender.add(
+                            email_content,
+                            email_address,
+                            sent_token=sent_token,
+                            **email_kwargs,
+                        )
+        return sender.stats
 
 
 def get_mail_connection(**kwargs):
@@ -293,7 +368,13 @@ def send_template_email(
     return True
 
 
-def send_mail(
+def get_return_path(email_address, auto_bounce=True):
+    if HANDLE_BOUNCES and auto_bounce and make_bounce_address:
+        return make_bounce_address(email_address)
+    return None
+
+
+def make_email_message(
     subject,
     body,
     email_address,
@@ -302,34 +383,14 @@ def send_mail(
     cc=None,
     bcc=None,
     attachments=None,
-    fail_silently=False,
-    bounce_check=True,
     headers=None,
-    priority=True,
-    queue=None,
-    auto_bounce=True,
     unsubscribe_reference=None,
+    connection=None,
     **kwargs,
 ):
-    if not email_address:
-        return
-    if bounce_check:
-        # TODO: Check if this email should be sent
-        pass
     if from_email is None:
         from_email = settings.DEFAULT_FROM_EMAIL
 
-    backend_kwargs = {}
-    if HANDLE_BOUNCES and auto_bounce and make_bounce_address:
-        backend_kwargs["return_path"] = make_bounce_address(email_address)
-
-    if not priority and queue is None:
-        queue = settings.EMAIL_BULK_QUEUE
-    if queue is not None:
-        backend_kwargs["queue"] = queue
-
-    connection = get_mail_connection(**backend_kwargs)
-
     if headers is None:
         headers = {}
     headers.update(
@@ -366,4 +427,189 @@ def send_mail(
         for name, data, mime_type in attachments:
             email.attach(name, data, mime_type)
 
+    return email
+
+
+def send_mail(
+    subject,
+    body,
+    email_address,
+    html=None,
+    from_email=None,
+    cc=None,
+    bcc=None,
+    attachments=None,
+    fail_silently=False,
+    bounce_check=True,
+    headers=None,
+    priority=True,
+    queue=None,
+    auto_bounce=True,
+    unsubscribe_reference=None,
+    **kwargs,
+):
+    if not email_address:
+        return
+    if bounce_check:
+        # TODO: Check if this email should be sent
+        pass
+
+    backend_kwargs = {}
+    return_path = get_return_path(email_address, auto_bounce=auto_bounce)
+    if return_path is not None:
+        backend_kwargs["return_path"] = return_path
+
+    if not priority and queue is None:
+        queue = settings.EMAIL_BULK_QUEUE
+    if queue is not None:
+        backend_kwargs["queue"] = queue
+
+    connection = get_mail_connection(**backend_kwargs)
+
+    email = make_email_message(
+        subject,
+        body,
+        email_address,
+        html=html,
+        from_email=from_email,
+        cc=cc,
+        bcc=bcc,
+        attachments=attachments,
+        headers=headers,
+        unsubscribe_reference=unsubscribe_reference,
+        connection=connection,
+    )
     return email.send(fail_silently=fail_silently)
+
+
+class BulkMailStats:
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.duration = 0.0
+
+    @property
+    def rate(self):
+        return self.sent / self.duration if self.duration else 0.0
+
+
+class BulkMailSender:
+    """
+    Sends mails in batches over one persistent connection of
+    EMAIL_BULK_BACKEND, limited to `rate_limit` mails per second.
+    Without a bulk backend every mail gets a connection like send_mail.
+    """
+
+    def __init__(self, batch_size=None, rate_limit=None, backend=None, on_sent=None):
+        self.batch_size = batch_size or settings.EMAIL_BULK_BATCH_SIZE
+        if rate_limit is None:
+            rate_limit = settings.EMAIL_BULK_RATE_LIMIT
+        self.rate_limit = rate_limit
+        if backend is None:
+            backend = settings.EMAIL_BULK_BACKEND
+        self.connection = None
+        if backend:
+            self.connection = get_connection(
+                backend=backend, queue=settings.EMAIL_BULK_QUEUE
+            )
+        self.batch = []
+        self.sent_tokens = []
+        self.on_sent = on_sent
+        self.stats = BulkMailStats()
+
+    def __enter__(self):
+        if self.connection is not None:
+            self.connection.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.flush()
+        finally:
+            if self.connection is not None:
+                self.connection.close()
+
+    def get_connection(self, return_path=None):
+        if self.connection is not None:
+            return self.connection
+        backend_kwargs = {"queue": settings.EMAIL_BULK_QUEUE}
+        if return_path is not None:
+            backend_kwargs["return_path"] = return_path
+        return get_mail_connection(**backend_kwargs)
+
+    def notify_sent(self, sent_tokens):
+        sent_tokens = [token for token in sent_tokens if token is not None]
+        if self.on_sent is not None and sent_tokens:
+            self.on_sent(sent_tokens)
+
+    def add(
+        self,
+        email_content: EmailContent,
+        email_address,
+        sent_token=None,
+        **email_kwargs,
+    ):
+        if not email_address:
+            self.notify_sent([sent_token])
+            return
+        return_path = get_return_path(
+            email_address, auto_bounce=email_kwargs.get("auto_bounce", True)
+        )
+        email = make_email_message(
+            email_content.subject,
+            email_content.text,
+            email_address,
+            html=email_content.html,
+            connection=self.get_connection(return_path),
+            **email_kwargs,
+        )
+        # Picked up per message by froide.foirequest.smtp.EmailBackend
+        email.return_path = return_path
+        self.batch.append(email)
+        self.sent_tokens.append(sent_token)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+        sent_tokens, self.sent_tokens = self.sent_tokens, []
+        delivered = []
+        start = time.monotonic()
+        try:
+            # Backends report failed mails only in their count,
+            # so mails are handed over one by one on the open connection
+            for email, sent_token in zip(batch, sent_tokens, strict=True):
+                if self.connection is not None:
+                    result = self.connection.send_messages([email])
+                else:
+                    result = email.send()
+                if result:
+                    delivered.append(sent_token)
+        finally:
+            # Mails delivered before an error are not sent again
+            self.notify_sent(delivered)
+        sent = len(delivered)
+        duration = time.monotonic() - start
+        if self.rate_limit:
+            # Wait until the batch fits into the rate limit
+            wait = len(batch) / self.rate_limit - duration
+            if wait > 0:
+                time.sleep(wait)
+                duration += wait
+
+        self.stats.sent += sent
+        self.stats.failed += len(batch) - sent
+        self.stats.batches += 1
+        self.stats.duration += duration
+        logger.info(
+            "Sent batch %d: %d of %d mails in %.2fs (%.1f mails/s)",
+            self.stats.batches,
+            sent,
+            len(batch),
+            duration,
+            sent / duration if duration else 0.0,
+        )
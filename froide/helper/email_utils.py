@@ -1,12 +1,15 @@
 import contextlib
 import imaplib
 import re
+import select
+import ssl
+import threading
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from email.message import EmailMessage
 from enum import Enum
-from typing import Iterator, NamedTuple, Optional, Tuple, Union
+from typing import Iterator, List, NamedTuple, Optional, Tuple, Union
 
 from django.conf import settings
 from django.utils import timezone
@@ -193,19 +196,128 @@ def get_imap_message_uid(flag_bytes):
     return match.group("uid")
 
 
-@contextlib.contextmanager
-def get_mail_client(host, port, user, password, ssl=True):
+def connect_mail_client(host, port, user, password, ssl=True):
     klass = imaplib.IMAP4
     if ssl:
         klass = imaplib.IMAP4_SSL
     con = klass(host, port)
     con.login(user, password)
+    return con
+
+
+@contextlib.contextmanager
+def get_mail_client(host, port, user, password, ssl=True):
+    con = connect_mail_client(host, port, user, password, ssl=ssl)
 
     yield con
 
     con.logout()
 
 
+class MailClientPool(threading.local):
+    """
+    Keeps one logged in IMAP connection per account and thread
+    """
+
+    def __init__(self):
+        self.connections = {}
+
+    def get(self, host, port, user, password, ssl=True):
+        key = (host, port, user, ssl)
+        con = self.connections.get(key)
+        if con is not None:
+            try:
+                status, _data = con.noop()
+                if status == "OK":
+                    return con
+            except (imaplib.IMAP4.error, OSError):
+                pass
+            self.discard(key)
+        con = connect_mail_client(host, port, user, password, ssl=ssl)
+        self.connections[key] = con
+        return con
+
+    def discard(self, key):
+        con = self.connections.pop(key, None)
+        if con is None:
+            return
+        try:
+            con.logout()
+        except (imaplib.IMAP4.error, OSError):
+            pass
+
+    def close_all(self):
+        for key in list(self.connections):
+            self.discard(key)
+
+
+mail_client_pool = MailClientPool()
+
+
+@contextlib.contextmanager
+def get_pooled_mail_client(host, port, user, password, ssl=True):
+    con = mail_client_pool.get(host, port, user, password, ssl=ssl)
+    try:
+        yield con
+    except BaseException:
+        # Connection may be in an undefined state
+        mail_client_pool.discard((host, port, user, ssl))
+        raise
+
+
+def has_buffered_data(mailbox: Union[imaplib.IMAP4_SSL, imaplib.IMAP4]) -> bool:
+    """
+    Check without blocking if a response can be read from the mailbox
+    """
+    sock = mailbox.socket()
+    timeout = sock.gettimeout()
+    sock.settimeout(0)
+    try:
+        return bool(mailbox.file.peek(1))
+    except (BlockingIOError, ssl.SSLWantReadError):
+        return False
+    finally:
+        sock.settimeout(timeout)
+
+
+def wait_for_new_mail(
+    mailbox: Union[imaplib.IMAP4_SSL, imaplib.IMAP4], timeout=5 * 60
+) -> bool:
+    """
+    Wait with IMAP IDLE (RFC 2177) on selected mailbox until the server
+    reports new messages or timeout seconds have passed.
+    Returns True if the server announced new messages.
+    """
+    tag = mailbox._new_tag()
+    mailbox.send(tag + b" IDLE\r\n")
+    response = mailbox.readline()
+    if not response.startswith(b"+"):
+        raise imaplib.IMAP4.error("IDLE not accepted: %r" % response)
+
+    new_mail = False
+    sock = mailbox.socket()
+    while True:
+        if not has_buffered_data(mailbox):
+            readable, _, _ = select.select([sock], [], [], timeout)
+            if not readable:
+                break
+        line = mailbox.readline()
+        if not line:
+            raise mailbox.abort("socket closed during IDLE")
+        if line.rstrip().endswith((b"EXISTS", b"RECENT")):
+            new_mail = True
+            break
+
+    mailbox.send(b"DONE\r\n")
+    while True:
+        line = mailbox.readline()
+        if not line:
+            raise mailbox.abort("socket closed during IDLE")
+        if line.startswith(tag):
+            break
+    return new_mail
+
+
 def get_unread_mails(
     mailbox: Union[imaplib.IMAP4_SSL, imaplib.IMAP4], flag=False
 ) -> Iterator[Tuple[Optional[str], bytes]]:
@@ -221,6 +333,31 @@ def get_unread_mails(
     mailbox.close()
 
 
+def get_unread_mail_batches(
+    mailbox: Union[imaplib.IMAP4_SSL, imaplib.IMAP4], flag=False, batch_size=50
+) -> Iterator[List[Tuple[Optional[str], bytes]]]:
+    """
+    Fetch unseen mails in chunks of UIDs with one FETCH
+    and at most one STORE command per chunk.
+    """
+    status, count = mailbox.select("Inbox")
+    typ, data = mailbox.uid("SEARCH", None, "UNSEEN")
+    uids = data[0].split()
+    for pos in range(0, len(uids), batch_size):
+        uid_set = b",".join(uids[pos : pos + batch_size]).decode()
+        status, data = mailbox.uid("FETCH", uid_set, "(UID BODY[])")
+        if flag:
+            mailbox.uid("STORE", uid_set, "+FLAGS", "\\Flagged")
+        # Response alternates between (envelope, literal) tuples and b")"
+        yield [
+            (get_imap_message_uid(part[0]), part[1])
+            for part in data
+            if isinstance(part, tuple)
+        ]
+
+    mailbox.close()
+
+
 def delete_mails_by_recipient(
     mailbox: Union[imaplib.IMAP4_SSL, imaplib.IMAP4],
     recipient_mail: str,
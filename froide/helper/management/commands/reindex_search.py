@@ -0,0 +1,268 @@
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from multiprocessing import Pool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections as db_connections
+from django.db.models import Max, Min
+
+from django_elasticsearch_dsl.management.commands.search_index import (
+    Command as DESCommand,
+)
+from django_elasticsearch_dsl.registries import registry
+from elasticsearch_dsl import connections
+
+from .search_index import CHUNK_SIZE, DB_CHUNK_SIZE
+
+PARTITION_SIZE = 20000
+CHECKPOINT_FILE = "reindex_search_checkpoint.json"
+
+
+def get_document_key(doc):
+    return "{}.{}".format(doc.__module__, doc.__name__)
+
+
+def get_document(doc_key):
+    for doc in registry.get_documents():
+        if get_document_key(doc) == doc_key:
+            return doc
+    raise KeyError(doc_key)
+
+
+def get_pk_ranges(min_pk, max_pk, size):
+    """
+    Partitions of the pk range, the last one is open ended so rows
+    created during the run are indexed as well.
+    """
+    if min_pk is None:
+        return []
+    starts = range(min_pk, max_pk + 1, size)
+    return [(start, start + size) for start in starts[:-1]] + [(starts[-1], None)]
+
+
+def init_worker():
+    # Connections must not be shared with the parent process, configure()
+    # keeps inherited Elasticsearch clients if the settings are unchanged
+    db_connections.close_all()
+    for alias in settings.ELASTICSEARCH_DSL:
+        try:
+            connections.remove_connection(alias)
+        except KeyError:
+            pass
+    connections.configure(**settings.ELASTICSEARCH_DSL)
+
+
+def index_partition(task):
+    doc_key, index_name, start, end, chunk_size = task
+    document = get_document(doc_key)()
+    qs = document.get_queryset().filter(pk__gte=start)
+    if end is not None:
+        qs = qs.filter(pk__lt=end)
+    qs = qs.order_by("pk")
+
+    count = 0
+
+    def counted(iterator):
+        nonlocal count
+        for obj in iterator:
+            count += 1
+            yield obj
+
+    start_time = time.monotonic()
+    # Actions name the new index, the document keeps its alias
+    actions = (
+        dict(action, _index=index_name)
+        for action in document.get_actions(
+            counted(qs.iterator(chunk_size=DB_CHUNK_SIZE)), "index"
+        )
+    )
+    document.bulk(actions, chunk_size=chunk_size, refresh=False)
+    return doc_key, start, end, count, time.monotonic() - start_time
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild search indices into new indices with parallel workers, "
+        "resume interrupted runs and swap aliases at the end"
+    )
+
+    _get_models = DESCommand._get_models
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--models",
+            metavar="app[.model]",
+            type=str,
+            nargs="*",
+            help="Specify the model or app to be updated in elasticsearch",
+        )
+        parser.add_argument(
+            "--processes", type=int, default=os.cpu_count() or 1, dest="processes"
+        )
+        parser.add_argument(
+            "--partition-size", type=int, default=PARTITION_SIZE, dest="partition_size"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=CHUNK_SIZE, dest="chunk_size"
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=str,
+            default=CHECKPOINT_FILE,
+            help="File that records finished partitions of the current run",
+        )
+        parser.add_argument(
+            "--keep-old",
+            action="store_true",
+            help="Do not delete indices previously pointed at by the aliases",
+        )
+
+    def handle(self, *args, **options):
+        self.es_conn = connections.get_connection()
+        self.checkpoint_path = options["checkpoint"]
+        models = self._get_models(options["models"])
+        docs = registry.get_documents(models)
+
+        checkpoint = self.load_checkpoint()
+        if checkpoint is None:
+            checkpoint = self.start_run(docs, options["partition_size"])
+        else:
+            self.stdout.write(
+                "Resuming run {} from {}".format(
+                    checkpoint["suffix"], self.checkpoint_path
+                )
+            )
+
+        tasks = self.get_tasks(docs, checkpoint, options)
+        self.run_tasks(tasks, checkpoint, options["processes"])
+        self.swap_aliases(checkpoint, options["keep_old"])
+        os.remove(self.checkpoint_path)
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as f:
+            return json.load(f)
+
+    def save_checkpoint(self, checkpoint):
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def start_run(self, docs, partition_size):
+        suffix = datetime.now().strftime("%Y%m%d%H%M%S")
+        checkpoint = {"suffix": suffix, "indices": {}, "partitions": {}, "done": {}}
+        for doc in docs:
+            index = doc._index
+            alias = index._name
+            new_index = "{}-{}".format(alias[:234], suffix)
+            self.stdout.write("Creating index '{}'".format(new_index))
+            index.clone(name=new_index).create()
+            # No refreshes while bulk loading
+            self.es_conn.indices.put_settings(
+                index=new_index, settings={"index": {"refresh_interval": "-1"}}
+            )
+            checkpoint["indices"][get_document_key(doc)] = {
+                "alias": alias,
+                "index": new_index,
+            }
+            # Partitions are fixed for the run, so they match the
+            # finished ones on resume even if rows were added or deleted
+            pk_range = (
+                doc().get_queryset().aggregate(min_pk=Min("pk"), max_pk=Max("pk"))
+            )
+            checkpoint["partitions"][get_document_key(doc)] = get_pk_ranges(
+                pk_range["min_pk"], pk_range["max_pk"], partition_size
+            )
+            checkpoint["done"][get_document_key(doc)] = []
+        self.save_checkpoint(checkpoint)
+        return checkpoint
+
+    def get_tasks(self, docs, checkpoint, options):
+        tasks = []
+        for doc in docs:
+            doc_key = get_document_key(doc)
+            done = {tuple(r) for r in checkpoint["done"][doc_key]}
+            ranges = [tuple(r) for r in checkpoint["partitions"][doc_key]]
+            todo = [r for r in ranges if r not in done]
+            self.stdout.write(
+                "'{}': {} of {} partitions to index".format(
+                    doc.django.model.__name__, len(todo), len(ranges)
+                )
+            )
+            index_name = checkpoint["indices"][doc_key]["index"]
+            tasks.extend(
+                (doc_key, index_name, start, end, options["chunk_size"])
+                for start, end in todo
+            )
+        return tasks
+
+    def run_tasks(self, tasks, checkpoint, processes):
+        counts = defaultdict(int)
+        durations = defaultdict(float)
+        start_time = time.monotonic()
+
+        if processes > 1:
+            db_connections.close_all()
+            pool = Pool(processes, initializer=init_worker)
+            results = pool.imap_unordered(index_partition, tasks)
+        else:
+            pool = None
+            results = map(index_partition, tasks)
+
+        try:
+            for i, (doc_key, start, end, count, duration) in enumerate(results, 1):
+                checkpoint["done"][doc_key].append([start, end])
+                self.save_checkpoint(checkpoint)
+                counts[doc_key] += count
+                durations[doc_key] += duration
+                self.stdout.write(
+                    "Indexed partition {}/{}".format(i, len(tasks)), ending="\r"
+                )
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        elapsed = max(time.monotonic() - start_time, 1e-6)
+        for doc_key, count in counts.items():
+            self.stdout.write(
+                "{}: {} objects, {:.1f} objects/s per worker, {:.1f} objects/s total".format(
+                    doc_key,
+                    count,
+                    count / max(durations[doc_key], 1e-6),
+                    count / elapsed,
+                )
+            )
+
+    def swap_aliases(self, checkpoint, keep_old):
+        actions = []
+        old_indices = []
+        for info in checkpoint["indices"].values():
+            alias, new_index = info["alias"], info["index"]
+            self.es_conn.indices.put_settings(
+                index=new_index, settings={"index": {"refresh_interval": None}}
+            )
+            self.es_conn.indices.refresh(index=new_index)
+            actions.append({"add": {"alias": alias, "index": new_index}})
+            if self.es_conn.indices.exists_alias(name=alias):
+                indices = list(self.es_conn.indices.get_alias(name=alias).keys())
+                actions.append({"remove": {"alias": alias, "indices": indices}})
+                old_indices.extend(indices)
+            elif self.es_conn.indices.exists(index=alias):
+                # Concrete index with the alias name from a previous setup
+                actions.append({"remove_index": {"index": alias}})
+
+        # Single request so all aliases switch at once
+        self.es_conn.indices.update_aliases(actions=actions)
+        self.stdout.write("Switched {} aliases".format(len(checkpoint["indices"])))
+
+        if not keep_old:
+            for index in old_indices:
+                self.es_conn.indices.delete(index=index)
+                self.stdout.write("Deleted index '{}'".format(index))
@@ -3,7 +3,7 @@ from elasticsearch_dsl.query import Q as ESQ
 
 from froide.team.models import Team
 
-from ..api_utils import ElasticLimitOffsetPagination
+from ..api_utils import ElasticCursorPagination, ElasticLimitOffsetPagination
 from . import SearchQuerySetWrapper
 
 
@@ -34,7 +34,10 @@ class ESQueryMixin:
 
         self.override_sqs()
 
-        paginator = ElasticLimitOffsetPagination()
+        if ElasticCursorPagination.cursor_query_param in request.GET:
+            paginator = ElasticCursorPagination()
+        else:
+            paginator = ElasticLimitOffsetPagination()
         paginator.paginate_queryset(self.sqs, self.request, view=self)
 
         qs = self.optimize_query(self.sqs.to_queryset())
@@ -2,10 +2,13 @@ import difflib
 import html
 import logging
 import re
+from collections import Counter
 
+from django.core import signing
 from django.utils.safestring import mark_safe
 
-from elasticsearch_dsl import A
+from elasticsearch import NotFoundError
+from elasticsearch_dsl import A, MultiSearch, connections
 from elasticsearch_dsl.query import Q
 
 logger = logging.getLogger(__name__)
@@ -20,6 +23,29 @@ class EmtpyResponse(list):
         total = 0
 
 
+CURSOR_KEEP_ALIVE = "2m"
+CURSOR_SALT = "froide.helper.search.cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(data):
+    # Signed so clients cannot change the point in time or the total
+    return signing.dumps(data, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token):
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+    except (signing.BadSignature, ValueError) as e:
+        raise InvalidCursor(token) from e
+    if not isinstance(data, dict) or not {"pit", "after", "total"} <= set(data):
+        raise InvalidCursor(token)
+    return data
+
+
 class SearchQuerySetWrapper(object):
     """
     Decorates a SearchQuerySet object using a generator for efficient iteration
@@ -36,14 +62,20 @@ class SearchQuerySetWrapper(object):
         self.query = None
         self.aggs = []
         self.broken_query = False
+        self.cursor = None
+        self.prepared = False
 
     def count(self):
+        if self.cursor is not None and self.cursor["total"] is not None:
+            return self.cursor["total"]
         total = self.response.hits.total
         if isinstance(total, int):
             return total
         return total.value
 
     def has_more(self):
+        if self.cursor is not None:
+            return self.get_next_cursor() is not None
         total = self.response.hits.total
         if isinstance(total, int):
             return False
@@ -80,16 +112,34 @@ class SearchQuerySetWrapper(object):
     def response(self):
         return self.get_response()
 
+    def get_search(self):
+        """
+        Return the search with all filters applied without running it,
+        e.g. to run it as part of a multi search
+        """
+        if not self.prepared:
+            self.sqs = self.sqs.source(excludes=["*"])
+            self.update_query()
+            self.prepared = True
+        return self.sqs
+
+    def set_response(self, response):
+        self.sqs._response = response
+
     def get_response(self):
         if self.broken_query:
             return EmtpyResponse()
-        if not hasattr(self.sqs, "_response"):
-            self.sqs = self.sqs.source(excludes=["*"])
-        else:
+        if hasattr(self.sqs, "_response"):
             return self.sqs._response
-        self.update_query()
         try:
-            return self.sqs.execute()
+            return self.get_search().execute()
+        except NotFoundError as e:
+            if self.cursor is not None:
+                # Point in time has expired
+                raise InvalidCursor(self.cursor["pit"]) from e
+            logger.error("Elasticsearch error: %s", e)
+            self.broken_query = True
+            return EmtpyResponse()
         except Exception as e:
             logger.error("Elasticsearch error: %s", e)
             self.broken_query = True
@@ -156,10 +206,98 @@ class SearchQuerySetWrapper(object):
         self.sqs = self.sqs[key]
         return self
 
+    def set_cursor(self, token, size):
+        """
+        Fetch `size` hits after the position encoded in `token` instead of
+        using from/size slicing. An empty token opens a new point in time.
+        Page cost stays constant at any depth.
+        """
+        if token:
+            self.cursor = decode_cursor(token)
+        else:
+            es = connections.get_connection(self.sqs._using)
+            pit = es.open_point_in_time(
+                index=self.sqs._index, keep_alive=CURSOR_KEEP_ALIVE
+            )
+            self.cursor = {"pit": pit["id"], "after": None, "total": None}
+        sqs = self.sqs
+        if not sqs._sort:
+            sqs = sqs.sort("_shard_doc")
+        # Requests on a point in time must not name an index
+        sqs = sqs.index().extra(
+            size=size,
+            pit={"id": self.cursor["pit"], "keep_alive": CURSOR_KEEP_ALIVE},
+        )
+        if self.cursor["after"] is None:
+            # Exact total instead of the default 10000 hit estimate,
+            # it is carried over to the following pages
+            sqs = sqs.extra(track_total_hits=True)
+        else:
+            sqs = sqs.extra(search_after=self.cursor["after"], track_total_hits=False)
+        self.sqs = sqs
+        self.cursor_size = size
+        self._next_cursor = None
+        return self
+
+    def get_next_cursor(self):
+        """
+        Return token for the page after the current one or None on the last page
+        """
+        if self._next_cursor is not None:
+            return self._next_cursor or None
+        response = self.response
+        hits = list(response)
+        if self.broken_query or len(hits) < self.cursor_size:
+            self.close_cursor()
+            self._next_cursor = ""
+            return None
+        total = self.cursor["total"]
+        if total is None:
+            total = self.count()
+        self._next_cursor = encode_cursor(
+            {
+                # Point in time id may change between requests
+                "pit": response.to_dict().get("pit_id", self.cursor["pit"]),
+                "after": list(hits[-1].meta.sort),
+                "total": total,
+            }
+        )
+        return self._next_cursor
+
+    def close_cursor(self):
+        es = connections.get_connection(self.sqs._using)
+        try:
+            es.close_point_in_time(id=self.cursor["pit"])
+        except NotFoundError:
+            pass
+
     def __iter__(self):
         return iter(self.sqs)
 
 
+def execute_multi_search(wrappers):
+    """
+    Run the searches of many SearchQuerySetWrappers in one msearch request
+    and store the responses on the wrappers.
+    """
+    wrappers = [w for w in wrappers if not w.broken_query]
+    if not wrappers:
+        return
+    ms = MultiSearch()
+    for wrapper in wrappers:
+        ms = ms.add(wrapper.get_search())
+    try:
+        responses = ms.execute(raise_on_error=False)
+    except Exception as e:
+        logger.error("Elasticsearch error: %s", e)
+        responses = [None] * len(wrappers)
+    for wrapper, response in zip(wrappers, responses, strict=True):
+        if response is None:
+            wrapper.broken_query = True
+        else:
+            wrapper.set_response(response)
+
+
 class ESQuerySetWrapper(object):
     def __init__(self, qs, es_response):
         self.__class__ = type(qs.__class__.__name__, (self.__class__, qs.__class__), {})
@@ -180,12 +318,12 @@ class ESQuerySetWrapper(object):
 
     def _get_highlight(self, hit):
         if hasattr(hit.meta, "highlight"):
-            highlighted = set()
+            highlighted = SimilarSnippetSet()
             highlight_count = 0
             for key in hit.meta.highlight:
                 for snippet in hit.meta.highlight[key]:
                     for s in filter_highlight_snippet(snippet):
-                        if not has_similar_match(s, highlighted):
+                        if not highlighted.has_similar(s):
                             highlight_count += 1
                             yield s
 
@@ -195,22 +333,27 @@ class ESQuerySetWrapper(object):
                         highlighted.add(s)
 
 
+# Cluster of 2 or more whitespace characters
+WHITESPACE_CLUSTER = re.compile(r"\s{2,}")
+
+
 def filter_highlight_snippet(snippet):
     """
     Split a highlight snippet into sections based on whitespace clusters
     and yield only those sections that contain <em> tags but are not fully
     enclosed by them.
     """
-    # Cluster of 2 or more whitespace characters
-    whitespace_cluster = re.compile(r"\s{2,}")
-
-    sections = whitespace_cluster.split(snippet)
+    sections = WHITESPACE_CLUSTER.split(snippet)
 
     for s in sections:
         if "<em>" in s and not (s.startswith("<em>") and s.endswith("</em>")):
             yield s
 
 
+def is_highlight_junk(c):
+    return c in " \r\n\t"
+
+
 def has_similar_match(word, possibilities, cutoff=0.9):
     """
     Return True if `word` is close to any string in `possibilities`
@@ -219,7 +362,7 @@ def has_similar_match(word, possibilities, cutoff=0.9):
     Implementation inspired by difflib.get_close_matches:
     https://github.com/python/cpython/blob/3.13/Lib/difflib.py#L=666
     """
-    s = difflib.SequenceMatcher(isjunk=lambda c: c in " \r\n\t")
+    s = difflib.SequenceMatcher(isjunk=is_highlight_junk)
     s.set_seq2(word)
 
     for x in possibilities:
@@ -232,3 +375,54 @@ def has_similar_match(word, possibilities, cutoff=0.9):
             return True
 
     return False
+
+
+class SimilarSnippetSet:
+    """
+    Collection of snippets that answers the same question as
+    `has_similar_match` with fewer full difflib comparisons.
+
+    Every added snippet keeps a character count fingerprint. The overlap
+    of two fingerprints is the upper bound difflib calls `quick_ratio`,
+    so most pairs are rejected without running the matcher and the
+    result stays identical.
+    """
+
+    def __init__(self, cutoff=0.9):
+        self.cutoff = cutoff
+        self.fingerprints = {}
+
+    def __contains__(self, snippet):
+        return snippet in self.fingerprints
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    def add(self, snippet):
+        if snippet not in self.fingerprints:
+            self.fingerprints[snippet] = Counter(snippet)
+
+    def has_similar(self, word):
+        if not word:
+            return has_similar_match(word, self.fingerprints, self.cutoff)
+        if word in self.fingerprints:
+            return True
+
+        cutoff = self.cutoff
+        word_length = len(word)
+        word_counts = Counter(word)
+        matcher = None
+        for snippet, counts in self.fingerprints.items():
+            length = word_length + len(snippet)
+            # Same formulas as difflib real_quick_ratio and quick_ratio
+            if 2.0 * min(word_length, len(snippet)) / length < cutoff:
+                continue
+            if 2.0 * sum((word_counts & counts).values()) / length < cutoff:
+                continue
+            if matcher is None:
+                matcher = difflib.SequenceMatcher(isjunk=is_highlight_junk)
+                matcher.set_seq2(word)
+            matcher.set_seq1(snippet)
+            if matcher.ratio() >= cutoff:
+                return True
+        return False
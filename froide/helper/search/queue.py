@@ -0,0 +1,113 @@
+"""
+Coalescing queue for search index updates.
+
+Saves of the same (model, pk) are deduplicated within a transaction and
+across processes for the debounce window. Each commit enqueues at most one
+task that indexes all new keys through the bulk API once the window ends.
+"""
+
+import logging
+import threading
+import time
+from typing import Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+QueueKey = Tuple[str, int]
+
+PENDING_KEY_PREFIX = "froide:search_queue:pending"
+STATS_KEY_PREFIX = "froide:search_queue:stats"
+STATS_TIMEOUT = 60 * 60 * 24
+
+
+def get_pending_cache_key(key: QueueKey) -> str:
+    return "{}:{}:{}".format(PENDING_KEY_PREFIX, *key)
+
+
+def incr_stat(name: str, value: int = 1):
+    cache_key = "{}:{}".format(STATS_KEY_PREFIX, name)
+    if not cache.add(cache_key, value, timeout=STATS_TIMEOUT):
+        try:
+            cache.incr(cache_key, value)
+        except ValueError:
+            pass
+
+
+def get_search_queue_stats():
+    names = (
+        "enqueued",
+        "dropped_duplicates",
+        "flushed",
+        "flush_batches",
+        "flush_latency_ms",
+    )
+    keys = {"{}:{}".format(STATS_KEY_PREFIX, name): name for name in names}
+    values = cache.get_many(list(keys))
+    return {name: values.get(key, 0) for key, name in keys.items()}
+
+
+class SearchIndexQueue(threading.local):
+    def __init__(self):
+        self.pending = {}
+
+    def add(self, model_label: str, pk: int):
+        self.add_many(model_label, [pk])
+
+    def add_many(self, model_label: str, pks: Iterable[int]):
+        for pk in pks:
+            if pk is None:
+                continue
+            key = (model_label, pk)
+            if key in self.pending:
+                incr_stat("dropped_duplicates")
+                continue
+            self.pending[key] = True
+        # Registered for duplicates too: the callback of the transaction
+        # that first added a key is discarded if it is rolled back.
+        # Keys of rolled back transactions are flushed with the next commit.
+        if self.pending:
+            transaction.on_commit(self.flush)
+
+    def flush(self):
+        if not self.pending:
+            return
+        keys = list(self.pending)
+        self.pending = {}
+
+        debounce = settings.SEARCH_INDEX_DEBOUNCE
+        new_keys = [
+            key
+            for key in keys
+            if cache.add(get_pending_cache_key(key), 1, timeout=debounce + 60)
+        ]
+        if len(new_keys) < len(keys):
+            # An update for these keys is already scheduled
+            incr_stat("dropped_duplicates", len(keys) - len(new_keys))
+        if not new_keys:
+            return
+        incr_stat("enqueued", len(new_keys))
+
+        from ..tasks import search_instances_save
+
+        search_instances_save.apply_async(
+            args=(new_keys, time.time()), countdown=debounce
+        )
+
+
+def release_keys(keys: List[QueueKey]):
+    cache.delete_many([get_pending_cache_key(tuple(key)) for key in keys])
+
+
+def record_flush(count: int, enqueued_at: float):
+    latency_ms = int((time.time() - enqueued_at) * 1000)
+    incr_stat("flushed", count)
+    incr_stat("flush_batches")
+    incr_stat("flush_latency_ms", latency_ms)
+    logger.info("Flushed %d search index updates after %d ms", count, latency_ms)
+
+
+search_index_queue = SearchIndexQueue()
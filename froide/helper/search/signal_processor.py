@@ -7,7 +7,8 @@ from django_elasticsearch_dsl.registries import registry
 from django_elasticsearch_dsl.signals import RealTimeSignalProcessor
 from elasticsearch_dsl.connections import connections
 
-from ..tasks import search_instance_delete, search_instance_save
+from ..tasks import search_instance_delete
+from .queue import search_index_queue
 
 
 @contextmanager
@@ -47,9 +48,7 @@ class CelerySignalProcessor(RealTimeSignalProcessor):
         Given an individual model instance, update the object in the index.
         Update the related objects either.
         """
-        transaction.on_commit(
-            partial(search_instance_save.delay, instance._meta.label_lower, instance.pk)
-        )
+        search_index_queue.add(instance._meta.label_lower, instance.pk)
 
     def handle_pre_delete(self, sender, instance, **kwargs):
         """Handle removing of instance object from related models instance.
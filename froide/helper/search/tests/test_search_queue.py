@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.db import transaction
+
+import pytest
+
+from froide.helper.search.queue import SearchIndexQueue, get_search_queue_stats
+
+
+@pytest.mark.django_db
+def test_search_queue_coalesces_updates(django_capture_on_commit_callbacks):
+    queue = SearchIndexQueue()
+    with mock.patch(
+        "froide.helper.tasks.search_instances_save.apply_async"
+    ) as apply_async:
+        with django_capture_on_commit_callbacks(execute=True):
+            for _ in range(3):
+                queue.add("foirequest.foirequest", 1)
+            queue.add("foirequest.foirequest", 2)
+            queue.add("foirequest.foimessage", 1)
+            assert apply_async.call_count == 0
+
+        assert apply_async.call_count == 1
+        keys = apply_async.call_args.kwargs["args"][0]
+        assert keys == [
+            ("foirequest.foirequest", 1),
+            ("foirequest.foirequest", 2),
+            ("foirequest.foimessage", 1),
+        ]
+
+        # Update for this key is still pending
+        with django_capture_on_commit_callbacks(execute=True):
+            queue.add("foirequest.foirequest", 1)
+        assert apply_async.call_count == 1
+
+    stats = get_search_queue_stats()
+    assert stats["enqueued"] == 3
+    assert stats["dropped_duplicates"] == 3
+
+
+@pytest.mark.django_db
+def test_search_queue_flushes_after_rollback(django_capture_on_commit_callbacks):
+    queue = SearchIndexQueue()
+    with mock.patch(
+        "froide.helper.tasks.search_instances_save.apply_async"
+    ) as apply_async:
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            with pytest.raises(ValueError):
+                with transaction.atomic():
+                    queue.add("foirequest.foirequest", 1)
+                    raise ValueError
+            assert callbacks == []
+
+            # Key is still pending but needs a new commit callback
+            queue.add("foirequest.foirequest", 1)
+
+        assert apply_async.call_count == 1
+        assert apply_async.call_args.kwargs["args"][0] == [("foirequest.foirequest", 1)]
@@ -1,16 +1,10 @@
-from functools import partial
-
-from django.db import transaction
-
-from ..tasks import search_instance_save
+from .queue import search_index_queue
 
 
 def trigger_search_index_update(instance):
-    transaction.on_commit(
-        partial(search_instance_save.delay, instance._meta.label_lower, instance.pk)
-    )
+    search_index_queue.add(instance._meta.label_lower, instance.pk)
 
 
 def trigger_search_index_update_qs(queryset):
-    for instance in queryset:
-        trigger_search_index_update(instance)
+    pks = queryset.values_list("pk", flat=True)
+    search_index_queue.add_many(queryset.model._meta.label_lower, pks)
@@ -1,3 +1,5 @@
 from django.dispatch import Signal
 
 email_left_queue = Signal()  # args: ['to', 'from', 'message_id', 'status', 'log']
+# Sent with the model class as sender after instances were written to the index
+instances_indexed = Signal()  # args: ['instances']
@@ -1,14 +1,17 @@
 import logging
-from typing import Optional
+from collections import defaultdict
+from typing import List, Optional, Tuple
 
 from django.apps import apps
 from django.db import models
 
+from django_elasticsearch_dsl.apps import DEDConfig
 from django_elasticsearch_dsl.registries import registry
 from elasticsearch.exceptions import ConnectionTimeout
 
 from froide.celery import app as celery_app
 from froide.helper.email_log_parsing import check_delivery_from_log
+from froide.helper.signals import instances_indexed
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +34,40 @@ def search_instance_save(model_name: str, pk: int) -> None:
         registry.update_related(instance)
     except Exception as e:
         logger.exception(e)
+        return
+    instances_indexed.send(sender=instance.__class__, instances=[instance])
+
+
+@celery_app.task(autoretry_for=(ConnectionTimeout,), retry_backoff=True)
+def search_instances_save(keys: List[Tuple[str, int]], enqueued_at: float) -> None:
+    from .search.queue import record_flush, release_keys
+
+    # Release first so that saves during indexing schedule a new update
+    release_keys(keys)
+    if not DEDConfig.autosync_enabled():
+        return
+
+    pks_by_model = defaultdict(list)
+    for model_name, pk in keys:
+        pks_by_model[model_name].append(pk)
+
+    for model_name, pks in pks_by_model.items():
+        model = apps.get_model(model_name)
+        instances = list(model._default_manager.filter(pk__in=pks))
+        if not instances:
+            continue
+        try:
+            for doc in registry.get_documents(models=[model]):
+                if not doc.django.ignore_signals:
+                    doc().update(instances)
+            for instance in instances:
+                registry.update_related(instance)
+        except Exception as e:
+            logger.exception(e)
+            continue
+        instances_indexed.send(sender=model, instances=instances)
+
+    record_flush(len(keys), enqueued_at)
 
 
 @celery_app.task
@@ -3,6 +3,7 @@ import os.path
 import shutil
 import tempfile
 from pathlib import Path
+from unittest import mock
 
 import pytest
 
@@ -11,6 +12,7 @@ from froide.foirequest.tests import factories
 from froide.problem.models import ProblemReport
 
 from ..email_log_parsing import (
+    DogtailPostfixLogfileParser,
     PostfixLogfileParser,
     PostfixLogLine,
     check_delivery_from_log,
@@ -251,6 +253,44 @@ def test_logfile_rotation():
         assert invocations[0]["log"] == MAIL_1_LOG
 
 
+def test_pending_messages_are_not_reread():
+    invocations = []
+
+    def callback(**kwargs):
+        invocations.append(kwargs)
+
+    email_left_queue.connect(callback)
+
+    with open(p("maillog_004.txt")) as f:
+        lines = f.readlines()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        logfile_path = Path(tmpdir + "/mail.log")
+        offset_file_path = Path(tmpdir + "/mail_log.offset")
+        with open(logfile_path, "w") as logfile:
+            logfile.write("".join(lines[:4]))
+            logfile.flush()
+            check_delivery_from_log([logfile_path], offset_file_path)
+            assert len(invocations) == 0
+            assert Path(tmpdir + "/mail_log.offset.state").exists()
+
+            logfile.write("".join(lines[4:]))
+            logfile.flush()
+            parse_line = DogtailPostfixLogfileParser._parse_line
+            with mock.patch.object(
+                DogtailPostfixLogfileParser,
+                "_parse_line",
+                autospec=True,
+                side_effect=parse_line,
+            ) as mock_parse_line:
+                check_delivery_from_log([logfile_path], offset_file_path)
+
+    assert mock_parse_line.call_count == len(lines[4:])
+    assert len(invocations) == 1
+    assert invocations[0]["message_id"] == MAIL_1_ID
+    assert invocations[0]["log"] == MAIL_1_LOG
+
+
 @pytest.mark.django_db
 def test_bouncing_email(req_with_msgs: FoiRequest):
     msg = req_with_msgs.messages[0]
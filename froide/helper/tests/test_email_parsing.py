@@ -1,7 +1,15 @@
+import socket
+import threading
 from io import BytesIO
 from pathlib import Path
+from unittest import mock
 
 from ..email_parsing import get_address_list, parse_email
+from ..email_utils import (
+    MailClientPool,
+    get_unread_mail_batches,
+    wait_for_new_mail,
+)
 from .test_email_log_parsing import TEST_DATA_ROOT
 
 
@@ -40,3 +48,106 @@ def test_parse_broken_to_fields():
     assert result[0].email == "info@zdf.de"
     assert result[1].name == ""
     assert result[1].email == "Borked enst@aat.de"
+
+
+class FakeMailbox:
+    def __init__(self, mails):
+        self.mails = mails
+        self.commands = []
+
+    def select(self, name):
+        return "OK", [str(len(self.mails)).encode()]
+
+    def uid(self, command, *args):
+        self.commands.append((command,) + args)
+        if command == "SEARCH":
+            return "OK", [b" ".join(self.mails.keys())]
+        if command == "FETCH":
+            data = []
+            for uid in args[0].encode().split(b","):
+                envelope = b"1 (UID " + uid + b" BODY[] {%d}" % len(self.mails[uid])
+                data.extend([(envelope, self.mails[uid]), b")"])
+            return "OK", data
+        return "OK", [None]
+
+    def close(self):
+        pass
+
+
+def test_get_unread_mail_batches():
+    mails = {str(uid).encode(): b"mail %d" % uid for uid in range(1, 6)}
+    mailbox = FakeMailbox(mails)
+
+    batches = list(get_unread_mail_batches(mailbox, flag=True, batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [m for batch in batches for m in batch] == [
+        (uid.decode(), mail) for uid, mail in mails.items()
+    ]
+    fetches = [c for c in mailbox.commands if c[0] == "FETCH"]
+    stores = [c for c in mailbox.commands if c[0] == "STORE"]
+    assert len(fetches) == 3
+    assert [c[1] for c in stores] == ["1,2", "3,4", "5"]
+
+
+def test_mail_client_pool_reuses_connection():
+    pool = MailClientPool()
+    con = mock.Mock()
+    con.noop.return_value = ("OK", [b""])
+    with mock.patch(
+        "froide.helper.email_utils.connect_mail_client", return_value=con
+    ) as connect:
+        assert pool.get("imap", 993, "user", "pw") is con
+        assert pool.get("imap", 993, "user", "pw") is con
+        assert connect.call_count == 1
+
+        con.noop.side_effect = OSError
+        pool.get("imap", 993, "user", "pw")
+        assert connect.call_count == 2
+        con.logout.assert_called_once()
+
+
+class SocketMailbox:
+    """
+    Minimal client side of an IMAP connection on a local socket
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.file = sock.makefile("rb")
+
+    def _new_tag(self):
+        return b"A001"
+
+    def socket(self):
+        return self.sock
+
+    def send(self, data):
+        self.sock.sendall(data)
+
+    def readline(self):
+        return self.file.readline()
+
+
+def run_idle_server(sock, new_mail):
+    server_file = sock.makefile("rb")
+    assert server_file.readline() == b"A001 IDLE\r\n"
+    sock.sendall(b"+ idling\r\n")
+    if new_mail:
+        sock.sendall(b"* 4 EXISTS\r\n")
+    assert server_file.readline() == b"DONE\r\n"
+    sock.sendall(b"A001 OK IDLE terminated\r\n")
+
+
+def test_wait_for_new_mail():
+    for new_mail in (True, False):
+        client_sock, server_sock = socket.socketpair()
+        server = threading.Thread(target=run_idle_server, args=(server_sock, new_mail))
+        server.start()
+        try:
+            mailbox = SocketMailbox(client_sock)
+            assert wait_for_new_mail(mailbox, timeout=0.2) is new_mail
+        finally:
+            server.join()
+            client_sock.close()
+            server_sock.close()
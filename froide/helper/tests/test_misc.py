@@ -1,6 +1,10 @@
 import re
+import zipfile
 from datetime import datetime, timedelta
+from io import BytesIO
+from unittest import mock
 
+from django.core.files.base import ContentFile
 from django.test import TestCase
 from django.test.utils import override_settings
 
@@ -8,8 +12,17 @@ from ..csv_utils import dict_to_csv_stream
 from ..date_utils import calc_easter, calculate_month_range_de
 from ..email_sending import mail_registry
 from ..storage import make_unique_filename
-from ..text_diff import mark_differences
-from ..text_utils import remove_closing, replace_email_name, split_text_by_separator
+from ..text_diff import get_differences, get_patience_opcodes, mark_differences
+from ..text_utils import (
+    RedactionEngine,
+    redact_user_strings,
+    remove_closing,
+    replace_custom,
+    replace_email_name,
+    replace_word,
+    split_text_by_separator,
+)
+from ..zip_utils import stream_zip
 
 
 def rec(x):
@@ -61,6 +74,33 @@ Mit freundlichen Grüßen"""
         differences = mark_differences(original, redacted)
         self.assertEqual(2, differences.count("</span>"))
 
+    def test_patience_diff(self):
+        paragraph = (
+            "Sehr geehrter Herr Mustermann, anbei erhalten Sie die Unterlagen "
+            "zu Ihrer Anfrage vom {}. Mit freundlichen Grüßen Max Mustermann\n"
+        )
+        content = "".join(paragraph.format(i) for i in range(10))
+        redacted = content.replace("Mustermann", "<< Name entfernt >>")
+        with mock.patch("froide.helper.text_diff.PATIENCE_DIFF_THRESHOLD", 10**9):
+            expected = list(get_differences(redacted, content))
+        with mock.patch("froide.helper.text_diff.PATIENCE_DIFF_THRESHOLD", 0):
+            self.assertEqual(list(get_differences(redacted, content)), expected)
+
+        # Repetitive text without unique chunks between the redactions
+        content = "ja nein " * 1000
+        redacted = content[:2000] + "XX" + content[2007:6000] + "YY" + content[6007:]
+        with mock.patch("froide.helper.text_diff.PATIENCE_DIFF_THRESHOLD", 0):
+            differences = list(get_differences(redacted, content))
+        self.assertEqual("".join(part for _changed, part in differences), redacted)
+        self.assertLess(sum(len(part) for changed, part in differences if changed), 10)
+
+        a, b = list("abcxdefyg"), list("abcdezfg")
+        opcodes = get_patience_opcodes(a, b)
+        self.assertEqual(
+            "".join(a[i1:i2] for tag, i1, i2, _j1, _j2 in opcodes if tag == "equal"),
+            "".join(b[j1:j2] for tag, _i1, _i2, j1, j2 in opcodes if tag == "equal"),
+        )
+
     def test_email_redaction(self):
         content = """Sehr geehrte(r) Anfragende(r),
 
@@ -92,6 +132,38 @@ Mit freundlichen Grüßen"""
         )
         self.assertEqual(fake_res, res)
 
+    def test_redaction_engine_matches_sequential_replacement(self):
+        user_replacements = [
+            ("Musterstr. 1", "<< Address removed >>"),
+            ("max@example.org", "<< Email removed >>"),
+            (rec(r"Hallo (\w+)"), "<< Name removed >>"),
+            ("Mustermann", "<< Name removed >>"),
+            ("Max", "<< Name removed >>"),
+            ("Max Mustermann", "<< Name removed >>"),
+            ("removed", "<< Name removed >>"),
+            ("", "<< Name removed >>"),
+        ]
+        contents = [
+            "Hallo Max,\n\nMax Max Mustermann\nMusterstr. 1\nmax@example.org",
+            "MAX_MUSTERMANN maxi Maximilian max",
+            "Nothing to see here",
+            "",
+        ]
+        for content in contents:
+            expected = content
+            for needle, repl in user_replacements:
+                if isinstance(needle, str):
+                    expected = replace_word(needle, repl, expected)
+                else:
+                    expected = replace_custom(needle, repl, expected)
+            self.assertEqual(redact_user_strings(content, user_replacements), expected)
+
+        engine = RedactionEngine(user_replacements)
+        self.assertEqual(
+            engine.replace_word(engine.steps[4][0], "X", "max max\n_MAX_\n"),
+            "X max\n_X_\n",
+        )
+
 
 class TestTextSplitting(TestCase):
     def test_no_text_split(self):
@@ -228,3 +300,25 @@ class TestUniqueFilename(TestCase):
         actual_new_filename = make_unique_filename(filename, [filename, filename_2])
 
         self.assertEqual(actual_new_filename, "test123_2.pdf")
+
+
+class TestZipStream(TestCase):
+    def test_stream_zip(self):
+        file_data = bytes(range(256)) * 100
+        chunks = list(
+            stream_zip(
+                [
+                    ("1/_1.pdf", b"pdf"),
+                    ("1/attachment.bin", ContentFile(file_data, name="attachment.bin")),
+                ],
+                chunk_size=1000,
+            )
+        )
+        # File content is copied chunk by chunk
+        self.assertLess(max(len(chunk) for chunk in chunks), 1200)
+
+        zfile = zipfile.ZipFile(BytesIO(b"".join(chunks)), "r")
+        self.assertEqual(zfile.namelist(), ["1/_1.pdf", "1/attachment.bin"])
+        self.assertEqual(zfile.read("1/_1.pdf"), b"pdf")
+        self.assertEqual(zfile.read("1/attachment.bin"), file_data)
+        self.assertIsNone(zfile.testzip())
@@ -3,9 +3,19 @@ from unittest.mock import MagicMock
 from django.utils.safestring import SafeString
 
 import pytest
+from elasticsearch_dsl import Search
 
 from froide.helper.search.filters import BaseSearchFilterSet
-from froide.helper.search.queryset import ESQuerySetWrapper
+from froide.helper.search.queryset import (
+    ESQuerySetWrapper,
+    InvalidCursor,
+    SearchQuerySetWrapper,
+    SimilarSnippetSet,
+    decode_cursor,
+    encode_cursor,
+    filter_highlight_snippet,
+    has_similar_match,
+)
 from froide.helper.tests.testdata.search_highlights import search_highlight_tests
 
 
@@ -113,3 +123,65 @@ def test_es_queryset_wrapper_iter_no_highlight():
     result = list(wrapper)
 
     assert result[0].query_highlight == ""
+
+
+def test_search_cursor_roundtrip():
+    data = {"pit": "abc==", "after": [1.5, "x", 42], "total": 123}
+    token = encode_cursor(data)
+    assert "=" not in token
+    assert decode_cursor(token) == data
+
+    # Payload of another cursor with the signature of this one
+    signature = token.rsplit(":", 1)[1]
+    payload = encode_cursor(dict(data, total=1)).rsplit(":", 1)[0]
+    tampered = "{}:{}".format(payload, signature)
+    for token in (
+        "not-base64!",
+        tampered,
+        encode_cursor([1, 2]),
+        encode_cursor({"pit": 1}),
+    ):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(token)
+
+
+def test_search_cursor_query():
+    token = encode_cursor({"pit": "pit-id", "after": [3.2, 17], "total": 50})
+    sqs = SearchQuerySetWrapper(Search(index="froide_test").sort("_score"), DummyModel)
+    sqs.set_cursor(token, 20)
+
+    assert sqs.count() == 50
+    assert sqs.sqs._index is None
+    body = sqs.sqs.to_dict()
+    assert body["size"] == 20
+    assert "from" not in body
+    assert body["search_after"] == [3.2, 17]
+    assert body["pit"]["id"] == "pit-id"
+    assert body["sort"] == ["_score"]
+    assert body["track_total_hits"] is False
+
+
+def test_reindex_pk_ranges():
+    from froide.helper.management.commands.reindex_search import get_pk_ranges
+
+    assert get_pk_ranges(None, None, 10) == []
+    assert get_pk_ranges(1, 1, 10) == [(1, None)]
+    ranges = get_pk_ranges(5, 31, 10)
+    assert ranges == [(5, 15), (15, 25), (25, None)]
+    covered = {pk for start, end in ranges for pk in range(start, end or 40)}
+    assert set(range(5, 40)) <= covered
+
+
+def test_similar_snippet_set_matches_difflib():
+    snippets = [
+        s
+        for highlight_list, _ in search_highlight_tests
+        for snippet in highlight_list
+        for s in filter_highlight_snippet(snippet)
+    ]
+    snippet_set = SimilarSnippetSet()
+    kept = set()
+    for snippet in snippets:
+        assert snippet_set.has_similar(snippet) == has_similar_match(snippet, kept)
+        snippet_set.add(snippet)
+        kept.add(snippet)
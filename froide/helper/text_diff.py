@@ -1,6 +1,8 @@
 import re
+from bisect import bisect_left
+from collections import Counter
 from difflib import SequenceMatcher
-from typing import Iterator, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 from django.utils.html import escape
 from django.utils.safestring import SafeString, mark_safe
@@ -9,6 +11,14 @@ SPLITTER = r"([\u0000-\u002C\u003B-\u003F\u005B-\u005e\u0060\u007B-\u007E])"
 SPLITTER_RE = re.compile(SPLITTER)
 SPLITTER_MATCH_RE = re.compile("^%s$" % SPLITTER)
 CONTENT_CACHE_THRESHOLD = 5000
+# Above this number of chunks texts are compared with a patience diff
+PATIENCE_DIFF_THRESHOLD = 2000
+# Largest gap between patience anchors compared with SequenceMatcher
+PATIENCE_GAP_SIZE = 10000
+# Window of SequenceMatcher on larger gaps without common chunks
+PATIENCE_WINDOW_SIZE = 200
+
+Opcode = Tuple[str, int, int, int, int]
 
 
 def get_diff_chunks(content: str) -> List[str]:
@@ -19,14 +29,193 @@ def is_diff_separator(s: str) -> bool:
     return bool(SPLITTER_MATCH_RE.match(s))
 
 
+def get_increasing_pairs(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Longest subsequence of `pairs` (sorted by i) that is increasing in j.
+    """
+    # Patience sorting on j, remembering the predecessor of each pair
+    pile_tops: List[int] = []
+    pile_pairs: List[int] = []
+    previous: List[int] = []
+    for index, (_i, j) in enumerate(pairs):
+        pile = bisect_left(pile_tops, j)
+        previous.append(pile_pairs[pile - 1] if pile > 0 else -1)
+        if pile == len(pile_tops):
+            pile_tops.append(j)
+            pile_pairs.append(index)
+        else:
+            pile_tops[pile] = j
+            pile_pairs[pile] = index
+
+    increasing = []
+    index = pile_pairs[-1] if pile_pairs else -1
+    while index != -1:
+        increasing.append(pairs[index])
+        index = previous[index]
+    increasing.reverse()
+    return increasing
+
+
+def get_rare_anchors(
+    a: Sequence[str],
+    alo: int,
+    ahi: int,
+    b: Sequence[str],
+    blo: int,
+    bhi: int,
+    unique: bool = True,
+) -> List[Tuple[int, int]]:
+    """
+    Anchors from the chunks that occur least often, but equally often,
+    in a[alo:ahi] and b[blo:bhi], pairing their occurrences in order.
+    These are the unique chunks of a patience diff if there are any,
+    more frequent chunks are only used if `unique` is False.
+    """
+    a_counts = Counter(a[alo:ahi])
+    b_counts = Counter(b[blo:bhi])
+    counts = [count for chunk, count in a_counts.items() if b_counts[chunk] == count]
+    if not counts:
+        return []
+    rarest = min(counts)
+    if unique and rarest > 1:
+        return []
+    b_positions: Dict[str, List[int]] = {}
+    for j in range(blo, bhi):
+        if a_counts[b[j]] == rarest and b_counts[b[j]] == rarest:
+            b_positions.setdefault(b[j], []).append(j)
+    occurrence: Counter = Counter()
+    pairs = []
+    for i in range(alo, ahi):
+        positions = b_positions.get(a[i])
+        if positions is not None:
+            pairs.append((i, positions[occurrence[a[i]]]))
+            occurrence[a[i]] += 1
+    return get_increasing_pairs(pairs)
+
+
+def get_window_matches(
+    a: Sequence[str], alo: int, ahi: int, b: Sequence[str], blo: int, bhi: int
+) -> Iterator[Tuple[int, int]]:
+    """
+    Matches of a large gap without anchors from SequenceMatcher over
+    windows of PATIENCE_WINDOW_SIZE chunks moving along both sides.
+    Only matches in the first half of a window are kept unless it
+    reaches the end, the next window starts after them.
+    """
+    while alo < ahi and blo < bhi:
+        a_end = min(alo + PATIENCE_WINDOW_SIZE, ahi)
+        b_end = min(blo + PATIENCE_WINDOW_SIZE, bhi)
+        last_window = a_end == ahi and b_end == bhi
+        matcher = SequenceMatcher(None, a[alo:a_end], b[blo:b_end], autojunk=False)
+        blocks = [block for block in matcher.get_matching_blocks() if block.size]
+        if not blocks:
+            alo, blo = a_end, b_end
+            continue
+        half = PATIENCE_WINDOW_SIZE // 2
+        kept = [
+            block
+            for block in blocks
+            if last_window or (block.a < half and block.b < half)
+        ] or blocks[:1]
+        for block in kept:
+            for k in range(block.size):
+                yield alo + block.a + k, blo + block.b + k
+        last = kept[-1]
+        alo, blo = alo + last.a + last.size, blo + last.b + last.size
+
+
+def get_patience_matches(a: Sequence[str], b: Sequence[str]) -> List[Tuple[int, int]]:
+    """
+    Matching (i, j) chunk positions of a patience diff: common prefix
+    and suffix, then chunks that are unique on both sides as anchors,
+    recursing between anchors. Gaps without unique chunks are anchored
+    on their rarest common chunks, small gaps without any fall back to
+    SequenceMatcher and large ones to windows of SequenceMatcher.
+    """
+    matches = []
+    ranges = [(0, len(a), 0, len(b))]
+    while ranges:
+        alo, ahi, blo, bhi = ranges.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo += 1
+            blo += 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+            matches.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+        small_gap = (ahi - alo) * (bhi - blo) <= PATIENCE_GAP_SIZE
+        anchors = get_rare_anchors(a, alo, ahi, b, blo, bhi, unique=small_gap)
+        if not anchors:
+            if small_gap:
+                matcher = SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+                for block in matcher.get_matching_blocks():
+                    for k in range(block.size):
+                        matches.append((alo + block.a + k, blo + block.b + k))
+            else:
+                matches.extend(get_window_matches(a, alo, ahi, b, blo, bhi))
+            continue
+        for i, j in anchors:
+            matches.append((i, j))
+            ranges.append((alo, i, blo, j))
+            alo, blo = i + 1, j + 1
+        ranges.append((alo, ahi, blo, bhi))
+    matches.sort()
+    return matches
+
+
+def get_patience_opcodes(a: Sequence[str], b: Sequence[str]) -> List[Opcode]:
+    """
+    Opcodes like SequenceMatcher.get_opcodes from a patience diff.
+    """
+    opcodes = []
+    i = j = 0
+    matches = get_patience_matches(a, b)
+    matches.append((len(a), len(b)))
+    k = 0
+    while k < len(matches):
+        ai, bj = matches[k]
+        tag = ""
+        if i < ai and j < bj:
+            tag = "replace"
+        elif i < ai:
+            tag = "delete"
+        elif j < bj:
+            tag = "insert"
+        if tag:
+            opcodes.append((tag, i, ai, j, bj))
+        if ai == len(a) and bj == len(b):
+            break
+        # Extend to a block of consecutive matches
+        size = 1
+        while (
+            k + size < len(matches)
+            and matches[k + size] == (ai + size, bj + size)
+            and ai + size < len(a)
+        ):
+            size += 1
+        opcodes.append(("equal", ai, ai + size, bj, bj + size))
+        i, j = ai + size, bj + size
+        k += size
+    return opcodes
+
+
+def get_chunk_opcodes(a_list: List[str], b_list: List[str]) -> List[Opcode]:
+    if max(len(a_list), len(b_list)) > PATIENCE_DIFF_THRESHOLD:
+        return get_patience_opcodes(a_list, b_list)
+    matcher = SequenceMatcher(None, a_list, b_list, autojunk=False)
+    return matcher.get_opcodes()
+
+
 def get_differences_by_chunk(
     content_a: str, content_b: str
 ) -> Iterator[Tuple[bool, str]]:
     a_list = get_diff_chunks(content_a)
     b_list = get_diff_chunks(content_b)
-    matcher = SequenceMatcher(None, a_list, b_list, autojunk=False)
     last_same = False
-    for tag, i1, i2, _j1, _j2 in matcher.get_opcodes():
+    for tag, i1, i2, _j1, _j2 in get_chunk_opcodes(a_list, b_list):
         if i1 == i2:
             continue
         is_same = tag == "equal"
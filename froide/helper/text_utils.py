@@ -93,13 +93,89 @@ ReplacementsDict = Dict[Union[str, Pattern[str]], str]
 
 
 def redact_user_strings(content: str, user_replacements: Replacements) -> str:
-    for needle, repl in user_replacements:
-        if isinstance(needle, str):
-            content = replace_word(needle, repl, content)
-        else:
-            content = replace_custom(needle, repl, content)
+    engine = get_redaction_engine(
+        tuple((needle, str(repl)) for needle, repl in user_replacements)
+    )
+    return engine.redact(content)
 
-    return content
+
+class RedactionEngine:
+    """
+    Compiled form of user replacements that gives the same result as
+    applying `replace_word` and `replace_custom` for every needle in order.
+
+    Word patterns start with a boundary group that the regex engine has to
+    try at every position. Instead the needle itself is searched, which is
+    an optimized scan, and the boundaries are checked only around the hits.
+    """
+
+    def __init__(self, user_replacements: Replacements):
+        self.steps = []
+        for needle, repl in user_replacements:
+            if isinstance(needle, str):
+                if not needle:
+                    continue
+                self.steps.append(
+                    (
+                        re.compile(re.escape(needle), flags=re.U | re.I),
+                        get_word_pattern(needle),
+                        repl,
+                    )
+                )
+            else:
+                self.steps.append((None, needle, repl))
+
+    def redact(self, content: str) -> str:
+        for word, pattern, repl in self.steps:
+            if word is None:
+                content = replace_custom(pattern, repl, content)
+            elif "\\" in repl:
+                # Replacement is a template, leave expansion to re
+                content = pattern.sub("\\1%s\\2" % repl, content)
+            else:
+                content = self.replace_word(word, repl, content)
+        return content
+
+    @staticmethod
+    def replace_word(word: Pattern[str], repl: str, content: str) -> str:
+        """
+        Same result as the sub of `get_word_pattern`: boundary characters
+        are consumed, so a hit right after the previous one is skipped.
+        """
+        parts = []
+        last = 0
+        length = len(content)
+        match = word.search(content)
+        while match is not None:
+            start, end = match.span()
+            if start == 0:
+                before = ""
+            elif start > last and WORD_BOUNDARY.match(content, start - 1):
+                before = content[start - 1]
+            else:
+                match = word.search(content, start + 1)
+                continue
+            if end == length or (end == length - 1 and content[end] == "\n"):
+                # $ also matches before a trailing newline
+                after = ""
+            elif WORD_BOUNDARY.match(content, end):
+                after = content[end]
+            else:
+                match = word.search(content, start + 1)
+                continue
+            parts.append(content[last : start - len(before)])
+            parts.append(before + repl + after)
+            last = end + len(after)
+            match = word.search(content, last)
+        if not parts:
+            return content
+        parts.append(content[last:])
+        return "".join(parts)
+
+
+@functools.lru_cache(maxsize=256)
+def get_redaction_engine(user_replacements: Tuple) -> RedactionEngine:
+    return RedactionEngine(user_replacements)
 
 
 def redact_subject(
@@ -159,15 +235,17 @@ def redact_content(content: Union[str, SafeString]) -> str:
     return content
 
 
+WORD_BOUNDARY = re.compile(r"[\W_]", flags=re.U | re.I)
+
+
+def get_word_pattern(needle: str) -> Pattern[str]:
+    return re.compile(r"(^|[\W_])%s($|[\W_])" % re.escape(needle), flags=re.U | re.I)
+
+
 def replace_word(needle: str, replacement: str, content: str) -> str:
     if not needle:
         return content
-    return re.sub(
-        r"(^|[\W_])%s($|[\W_])" % re.escape(needle),
-        "\\1%s\\2" % replacement,
-        content,
-        flags=re.U | re.I,
-    )
+    return get_word_pattern(needle).sub("\\1%s\\2" % replacement, content)
 
 
 EMAIL = r"\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b"
@@ -0,0 +1,106 @@
+import io
+import time
+import zipfile
+from typing import Iterable, Iterator, Tuple, Union
+
+from django.core.files import File
+from django.http import StreamingHttpResponse
+
+ZIP_CHUNK_SIZE = 256 * 1024
+
+ZipSource = Union[bytes, File]
+
+
+class ZipStreamBuffer:
+    """
+    Write-only file object without tell/seek, so zipfile writes data
+    descriptors instead of seeking back to patch local headers.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(
+    members: Iterable[Tuple[str, ZipSource]], chunk_size: int = ZIP_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """
+    Yield a stored zip archive of `members` chunk by chunk.
+    Members are bytes or Django files that are copied in chunks,
+    so at most one chunk of a file is held in memory.
+    """
+    buffer = ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as zfile:
+        for name, source in members:
+            info = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            if isinstance(source, bytes):
+                zfile.writestr(info, source)
+                yield buffer.drain()
+                continue
+            # Size decides whether zip64 headers are needed
+            info.file_size = source.size
+            with zfile.open(info, "w") as dest:
+                with source.open("rb") as f:
+                    for chunk in f.chunks(chunk_size):
+                        dest.write(chunk)
+                        yield buffer.drain()
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+class ChunkReader(io.RawIOBase):
+    """
+    Non-seekable file object reading from an iterator of byte chunks,
+    e.g. to save the output of stream_zip to storage.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self.chunks = iter(chunks)
+        self.pending = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self.pending:
+            try:
+                self.pending = memoryview(next(self.chunks))
+            except StopIteration:
+                return 0
+        size = min(len(b), len(self.pending))
+        b[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def get_zip_members(zfile: zipfile.ZipFile) -> Iterator[Tuple[str, File]]:
+    """
+    Yield the members of an open zip file as files for stream_zip.
+    """
+    for info in zfile.infolist():
+        if info.is_dir():
+            continue
+        member = File(zfile.open(info), name=info.filename)
+        member.size = info.file_size
+        yield info.filename, member
+
+
+def zip_response(chunks: Iterable[bytes], name: str) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(
+        (chunk for chunk in chunks if chunk), content_type="application/zip"
+    )
+    response["Content-Disposition"] = 'attachment; filename="%s"' % name
+    return response
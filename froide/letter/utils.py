@@ -15,6 +15,8 @@ from froide.helper.text_utils import slugify
 
 class LetterPDFGenerator(BaseLetterPDFGenerator):
     template_name = "letter/pdf/default.html"
+    # Letters are rendered for sending, not for repeated downloads
+    cache_pdf = False
 
     def __init__(self, obj, template=None, extra_context=None):
         self.obj = obj
@@ -17,6 +17,7 @@ class PublicBodyConfig(AppConfig):
         from froide.account import account_merged
         from froide.account.export import registry
         from froide.helper.search import search_registry
+        from froide.publicbody import signals  # noqa
 
         from .utils import export_user_data
 
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.12 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_email_host_index(apps, schema_editor):
+    PublicBody = apps.get_model('publicbody', 'PublicBody')
+    PublicBodyContact = apps.get_model('publicbody', 'PublicBodyContact')
+    PublicBodyEmailHost = apps.get_model('publicbody', 'PublicBodyEmailHost')
+
+    def get_hosts(emails):
+        return {email.rsplit('@', 1)[1].lower() for email in emails if email and '@' in email}
+
+    hosts = {}
+    for pb_id, email in PublicBody.objects.exclude(email='').values_list('id', 'email').iterator():
+        hosts.setdefault(pb_id, set()).update(get_hosts([email]))
+    contacts = PublicBodyContact.objects.filter(confirmed=True).exclude(email='')
+    for pb_id, email in contacts.values_list('publicbody_id', 'email').iterator():
+        hosts.setdefault(pb_id, set()).update(get_hosts([email]))
+
+    PublicBodyEmailHost.objects.bulk_create(
+        [
+            PublicBodyEmailHost(
+                publicbody_id=pb_id,
+                host=host,
+                domain='.'.join(host.split('.')[-2:]),
+            )
+            for pb_id, pb_hosts in hosts.items()
+            for host in pb_hosts
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publicbody', '0055_alter_foilawtranslation_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PublicBodyEmailHost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('host', models.CharField(max_length=255)),
+                ('domain', models.CharField(db_index=True, max_length=255)),
+                ('publicbody', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='email_hosts', to='publicbody.publicbody')),
+            ],
+            options={
+                'verbose_name': 'Public Body Email Host',
+                'verbose_name_plural': 'Public Body Email Hosts',
+                'constraints': [models.UniqueConstraint(fields=('publicbody', 'host'), name='unique_publicbody_email_host')],
+            },
+        ),
+        migrations.RunPython(build_email_host_index, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,7 @@ from .changeproposal import (
 )
 from .classification import Classification
 from .contact import ProposedPublicBodyContact, PublicBodyContact
+from .emailhost import PublicBodyEmailHost
 from .foilaw import FoiLaw
 from .jurisdiction import Jurisdiction
 from .publicbody import (
@@ -26,5 +27,6 @@ __all__ = [
     "PublicBody",
     "PublicBodyChangeProposal",
     "PublicBodyContact",
+    "PublicBodyEmailHost",
     "PublicBodyManager",
 ]
@@ -0,0 +1,103 @@
+from typing import List, Optional
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .contact import PublicBodyContact
+from .publicbody import PublicBody
+
+
+def get_email_host(email: Optional[str]) -> Optional[str]:
+    if email and "@" in email:
+        return email.rsplit("@", 1)[1].lower()
+    return None
+
+
+def get_registrable_domain(host: str) -> str:
+    """
+    Last two labels of host, used as lookup bucket of email hosts.
+
+    This is not the registrable domain for multi-part public suffixes:
+    hosts under e.g. .co.uk or .gv.at all share the bucket "co.uk" or
+    "gv.at". Lookups stay correct as find_publicbodies matches hosts
+    within the bucket, these buckets are only larger.
+    """
+    return ".".join(host.split(".")[-2:])
+
+
+class PublicBodyEmailHostManager(models.Manager):
+    def update_for_publicbody(self, publicbody: PublicBody):
+        self.update_for_publicbody_id(publicbody.id, email=publicbody.email)
+
+    def update_for_publicbody_id(
+        self, publicbody_id: int, email: Optional[str] = None, add=True
+    ):
+        emails = list(
+            PublicBodyContact.objects.filter(publicbody_id=publicbody_id)
+            .exclude(email="")
+            .values_list("email", flat=True)
+        )
+        if email is None:
+            emails.extend(
+                PublicBody.non_filtered_objects.filter(id=publicbody_id).values_list(
+                    "email", flat=True
+                )
+            )
+        else:
+            emails.append(email)
+        hosts = {get_email_host(email) for email in emails} - {None}
+        existing = set(
+            self.filter(publicbody_id=publicbody_id).values_list("host", flat=True)
+        )
+        if existing - hosts:
+            self.filter(publicbody_id=publicbody_id, host__in=existing - hosts).delete()
+        if add and hosts - existing:
+            self.bulk_create(
+                [
+                    self.model(
+                        publicbody_id=publicbody_id,
+                        host=host,
+                        domain=get_registrable_domain(host),
+                    )
+                    for host in hosts - existing
+                ]
+            )
+
+    def find_publicbodies(self, email_host: str) -> List[PublicBody]:
+        """
+        Find public bodies with an email address on this host or its subdomains
+        """
+        email_host = email_host.lower()
+        entries = self.filter(domain=get_registrable_domain(email_host)).values_list(
+            "host", "publicbody_id"
+        )
+        publicbody_ids = {
+            pb_id
+            for host, pb_id in entries
+            if host == email_host or host.endswith("." + email_host)
+        }
+        if not publicbody_ids:
+            return []
+        return list(PublicBody.objects.filter(id__in=publicbody_ids))
+
+
+class PublicBodyEmailHost(models.Model):
+    publicbody = models.ForeignKey(
+        PublicBody, on_delete=models.CASCADE, related_name="email_hosts"
+    )
+    host = models.CharField(max_length=255)
+    domain = models.CharField(max_length=255, db_index=True)
+
+    objects = PublicBodyEmailHostManager()
+
+    class Meta:
+        verbose_name = _("Public Body Email Host")
+        verbose_name_plural = _("Public Body Email Hosts")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["publicbody", "host"], name="unique_publicbody_email_host"
+            ),
+        ]
+
+    def __str__(self):
+        return "{}: {}".format(self.publicbody_id, self.host)
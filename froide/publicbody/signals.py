@@ -0,0 +1,57 @@
+from django.db.models import signals
+from django.dispatch import receiver
+
+from .models import (
+    ProposedPublicBody,
+    ProposedPublicBodyContact,
+    PublicBody,
+    PublicBodyContact,
+    PublicBodyEmailHost,
+)
+
+
+@receiver(
+    signals.post_save, sender=PublicBody, dispatch_uid="publicbody_update_email_hosts"
+)
+@receiver(
+    signals.post_save,
+    sender=ProposedPublicBody,
+    dispatch_uid="proposedpublicbody_update_email_hosts",
+)
+def publicbody_update_email_hosts(instance=None, raw=False, **kwargs):
+    if raw:
+        return
+    PublicBodyEmailHost.objects.update_for_publicbody(instance)
+
+
+@receiver(
+    signals.post_save,
+    sender=PublicBodyContact,
+    dispatch_uid="publicbodycontact_update_email_hosts",
+)
+@receiver(
+    signals.post_save,
+    sender=ProposedPublicBodyContact,
+    dispatch_uid="proposedpublicbodycontact_update_email_hosts",
+)
+def publicbodycontact_update_email_hosts(instance=None, raw=False, **kwargs):
+    if raw:
+        return
+    PublicBodyEmailHost.objects.update_for_publicbody(instance.publicbody)
+
+
+@receiver(
+    signals.post_delete,
+    sender=PublicBodyContact,
+    dispatch_uid="publicbodycontact_delete_update_email_hosts",
+)
+@receiver(
+    signals.post_delete,
+    sender=ProposedPublicBodyContact,
+    dispatch_uid="proposedpublicbodycontact_delete_update_email_hosts",
+)
+def publicbodycontact_delete_update_email_hosts(instance=None, **kwargs):
+    # Only remove hosts, the public body itself may be deleted
+    PublicBodyEmailHost.objects.update_for_publicbody_id(
+        instance.publicbody_id, add=False
+    )
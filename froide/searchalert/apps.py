@@ -15,6 +15,7 @@ class AlertConfig(AppConfig):
         from froide.account.export import registry
         from froide.bounce.signals import email_unsubscribed
 
+        from . import signals  # noqa
         from .utils import (
             cancel_user,
             email_changed,
@@ -89,6 +89,33 @@ class AlertConfiguration:
         self, query: str, start_date: datetime, user=None
     ) -> tuple[int, list[AlertEvent]]: ...
 
+    def get_search(self, query: str, start_date: datetime, user=None):
+        """
+        Return the SearchQuerySetWrapper for `search` without running it,
+        so due alerts can be searched together in one multi search.
+        Configurations returning None are searched one by one.
+        Without `start_date` the search is not limited by date.
+        """
+        return None
+
+    def get_results(self, sqs, item_count=5) -> tuple[int, list[AlertEvent]]: ...
+
+    def get_document(self):
+        """
+        Return the search document whose indexed objects are matched
+        against alerts when SEARCH_ALERT_PERCOLATE is enabled.
+        """
+        return None
+
+    def get_match_results(self, object_ids: list[int]) -> list[AlertEvent]: ...
+
+    def get_match_dates(self, object_ids: list[int]) -> dict[int, datetime]:
+        """
+        Return the date alert searches filter on by id of matched objects.
+        Objects that cannot be shown in alerts are left out.
+        """
+        ...
+
     def get_search_link(self, query: str, start_date: datetime) -> str: ...
 
 
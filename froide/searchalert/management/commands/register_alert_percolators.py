@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from froide.searchalert.percolator import (
+    create_percolator_indices,
+    register_all_alerts,
+)
+
+
+class Command(BaseCommand):
+    help = "Create search alert percolator indices and register all active alerts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recreate",
+            action="store_true",
+            help="Delete existing percolator indices, e.g. after mapping changes",
+        )
+
+    def handle(self, *args, **options):
+        create_percolator_indices(recreate=options["recreate"])
+        count = register_all_alerts()
+        self.stdout.write("Registered {} alerts".format(count))
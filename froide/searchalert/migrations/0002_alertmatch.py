@@ -0,0 +1,53 @@
+# Generated by Django 5.2.12 on 2026-10-18 14:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("searchalert", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AlertMatch",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("section", models.CharField(max_length=50)),
+                ("object_id", models.PositiveIntegerField()),
+                (
+                    "timestamp",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "alert",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="matches",
+                        to="searchalert.alert",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "search alert match",
+                "verbose_name_plural": "search alert matches",
+                "ordering": ("-timestamp",),
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("alert", "section", "object_id"),
+                        name="unique_alert_match",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -259,3 +259,28 @@ class Alert(models.Model):
         return Alert.objects.exclude(id=self.id).filter(
             email=self.email, email_confirmed__isnull=False
         )
+
+
+class AlertMatch(models.Model):
+    """
+    Search result that matched an alert when it was indexed, kept until
+    the next update of the alert is sent.
+    """
+
+    alert = models.ForeignKey(Alert, on_delete=models.CASCADE, related_name="matches")
+    section = models.CharField(max_length=50)
+    object_id = models.PositiveIntegerField()
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ("-timestamp",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["alert", "section", "object_id"], name="unique_alert_match"
+            )
+        ]
+        verbose_name = _("search alert match")
+        verbose_name_plural = _("search alert matches")
+
+    def __str__(self):
+        return "{} {} {}".format(self.alert_id, self.section, self.object_id)
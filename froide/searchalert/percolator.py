@@ -0,0 +1,137 @@
+"""
+Match newly indexed objects against search alerts.
+
+Every active alert is stored as a percolator query per section. When
+objects are indexed they are percolated together against all stored
+queries and matches are kept as AlertMatch until the next update of the
+alert. Stored queries are not limited by date, matches are filtered by
+the date of the object when the update is sent.
+"""
+
+from django.conf import settings
+
+from elasticsearch_dsl import Mapping, Search, connections
+
+from .configuration import AlertConfiguration, alert_registry
+from .models import Alert, AlertMatch
+
+
+def get_percolator_index_name(config: AlertConfiguration) -> str:
+    return "{}_searchalert_{}".format(settings.ELASTICSEARCH_INDEX_PREFIX, config.key)
+
+
+def get_percolator_configs() -> list[AlertConfiguration]:
+    return [
+        config
+        for config in alert_registry.get_entries()
+        if config.get_document() is not None
+    ]
+
+
+def get_percolator_index(config: AlertConfiguration):
+    # Queries need the field mapping of the documents they are run against
+    index = config.get_document()._index.clone(name=get_percolator_index_name(config))
+    mapping = Mapping()
+    mapping.field("query", "percolator")
+    index.mapping(mapping)
+    return index
+
+
+def create_percolator_indices(recreate=False):
+    for config in get_percolator_configs():
+        index = get_percolator_index(config)
+        if recreate and index.exists():
+            index.delete()
+        if not index.exists():
+            index.create()
+
+
+def get_percolator_query(config: AlertConfiguration, alert: Alert):
+    # Same query as the alert search, the start date moves with every update
+    sqs = config.get_search(alert.query, None)
+    if sqs.broken_query:
+        return None
+    return sqs.get_search().to_dict().get("query", {"match_all": {}})
+
+
+def is_alert_active(alert: Alert) -> bool:
+    if alert.user:
+        return alert.user.is_active
+    return alert.email_confirmed is not None
+
+
+def register_alert(alert: Alert):
+    es = connections.get_connection()
+    sections = alert.get_section_keys() if is_alert_active(alert) else set()
+    for config in get_percolator_configs():
+        index_name = get_percolator_index_name(config)
+        query = None
+        if config.key in sections:
+            query = get_percolator_query(config, alert)
+        if query is None:
+            es.options(ignore_status=404).delete(index=index_name, id=alert.id)
+            continue
+        es.index(index=index_name, id=alert.id, document={"query": query})
+
+
+def unregister_alert(alert_id: int):
+    es = connections.get_connection().options(ignore_status=404)
+    for config in get_percolator_configs():
+        es.delete(index=get_percolator_index_name(config), id=alert_id)
+
+
+def register_all_alerts():
+    count = 0
+    for alert in Alert.objects.filter_active().select_related("user").iterator():
+        register_alert(alert)
+        count += 1
+    return count
+
+
+def percolate(model, object_ids: list[int]):
+    """
+    Match indexed objects against all alert queries and buffer the matches.
+    """
+    es = connections.get_connection()
+    for config in get_percolator_configs():
+        document = config.get_document()
+        if document.django.model is not model:
+            continue
+        response = es.mget(
+            index=document._index._name, ids=[str(pk) for pk in object_ids]
+        )
+        indexed = [
+            (int(doc["_id"]), doc["_source"])
+            for doc in response["docs"]
+            if doc.get("found")
+        ]
+        if not indexed:
+            continue
+        # One query for all objects, hits name the matched documents by slot
+        s = Search(index=get_percolator_index_name(config))
+        s = s.query(
+            "percolate",
+            field="query",
+            documents=[source for _pk, source in indexed],
+        ).source(False)
+        matches = [
+            (int(hit.meta.id), indexed[slot][0])
+            for hit in s.scan()
+            for slot in hit["_percolator_document_slot"]
+        ]
+        if not matches:
+            continue
+        # Alerts may have been deleted since their query was stored
+        alert_ids = set(
+            Alert.objects.filter(
+                id__in={alert_id for alert_id, _ in matches}
+            ).values_list("id", flat=True)
+        )
+        AlertMatch.objects.bulk_create(
+            [
+                AlertMatch(alert_id=alert_id, section=config.key, object_id=object_id)
+                for alert_id, object_id in matches
+                if alert_id in alert_ids
+            ],
+            ignore_conflicts=True,
+        )
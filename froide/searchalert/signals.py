@@ -0,0 +1,44 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import signals
+from django.dispatch import receiver
+
+from froide.helper.signals import instances_indexed
+
+from .models import Alert
+from .percolator import get_percolator_configs
+from .tasks import (
+    percolate_search_alerts,
+    register_alert_percolator,
+    unregister_alert_percolator,
+)
+
+
+@receiver(signals.post_save, sender=Alert, dispatch_uid="alert_register_percolator")
+def register_percolator_alert_saved(sender, instance, raw=False, **kwargs):
+    if raw or not settings.SEARCH_ALERT_PERCOLATE:
+        return
+    transaction.on_commit(partial(register_alert_percolator.delay, instance.id))
+
+
+@receiver(signals.post_delete, sender=Alert, dispatch_uid="alert_unregister_percolator")
+def unregister_percolator_alert_deleted(sender, instance, **kwargs):
+    if not settings.SEARCH_ALERT_PERCOLATE:
+        return
+    transaction.on_commit(partial(unregister_alert_percolator.delay, instance.id))
+
+
+@receiver(instances_indexed, dispatch_uid="alert_percolate_indexed")
+def percolate_indexed_instances(sender, instances, **kwargs):
+    if not settings.SEARCH_ALERT_PERCOLATE:
+        return
+    if not any(
+        config.get_document().django.model is sender
+        for config in get_percolator_configs()
+    ):
+        return
+    percolate_search_alerts.delay(
+        sender._meta.label_lower, [instance.pk for instance in instances]
+    )
@@ -1,3 +1,7 @@
+from django.apps import apps
+
+from elasticsearch.exceptions import ConnectionTimeout
+
 from froide.celery import app as celery_app
 
 
@@ -22,11 +26,9 @@ def update_alert_subscription(alert_id: int, preview=False):
 
 @celery_app.task
 def search_alert_update_due():
-    from .models import Alert
+    from .updates import send_due_updates
 
-    due_alert_ids = Alert.objects.filter_due().values_list("id", flat=True)
-    for alert_id in due_alert_ids:
-        update_alert_subscription.delay(alert_id)
+    send_due_updates()
 
 
 @celery_app.task
@@ -34,3 +36,30 @@ def cleanup_unconfirmed_email_search_alerts():
     from .utils import cleanup_unconfirmed_email_alerts
 
     cleanup_unconfirmed_email_alerts()
+
+
+@celery_app.task(autoretry_for=(ConnectionTimeout,), retry_backoff=True)
+def register_alert_percolator(alert_id: int):
+    from .models import Alert
+    from .percolator import register_alert, unregister_alert
+
+    try:
+        alert = Alert.objects.select_related("user").get(id=alert_id)
+    except Alert.DoesNotExist:
+        unregister_alert(alert_id)
+        return
+    register_alert(alert)
+
+
+@celery_app.task(autoretry_for=(ConnectionTimeout,), retry_backoff=True)
+def unregister_alert_percolator(alert_id: int):
+    from .percolator import unregister_alert
+
+    unregister_alert(alert_id)
+
+
+@celery_app.task(autoretry_for=(ConnectionTimeout,), retry_backoff=True)
+def percolate_search_alerts(model_name: str, object_ids: list[int]):
+    from .percolator import percolate
+
+    percolate(apps.get_model(model_name), object_ids)
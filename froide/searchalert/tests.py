@@ -1,11 +1,21 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.mail.backends.locmem import EmailBackend
 from django.urls import reverse
+from django.utils import timezone
 
 import pytest
 
-from froide.searchalert.updates import collect_updates, send_update
+from froide.searchalert import updates
+from froide.searchalert.updates import (
+    collect_updates,
+    send_due_updates,
+    send_update,
+)
 
 from .configuration import AlertConfiguration, AlertEvent, alert_registry
-from .models import Alert
+from .models import Alert, AlertMatch
 
 
 @pytest.mark.django_db
@@ -216,3 +226,228 @@ def test_empty_update(alert_config, mailoutbox):
     send_update(alert)
 
     assert len(mailoutbox) == 0
+
+
+@pytest.mark.django_db
+def test_send_due_updates_groups_searches(alert_config, mailoutbox):
+    last_alert = timezone.now() - timedelta(days=2)
+    for i, query in enumerate(["same query", " same  query", "other"]):
+        Alert.objects.create(
+            email="test{}@example.com".format(i),
+            email_confirmed=timezone.now(),
+            query=query,
+            interval="daily",
+            sections={"test": True},
+            last_alert=last_alert,
+        )
+    config = alert_registry.entries["test"]
+    with mock.patch.object(config, "search", wraps=config.search) as search:
+        send_due_updates()
+
+    assert search.call_count == 2
+    assert len(mailoutbox) == 3
+    assert not Alert.objects.filter_due().exists()
+
+
+@pytest.mark.django_db
+def test_send_due_updates_drains_matches(alert_config, settings, mailoutbox):
+    settings.SEARCH_ALERT_PERCOLATE = True
+    alert = Alert.objects.create(
+        email="test@example.com",
+        email_confirmed=timezone.now(),
+        query="test",
+        interval="daily",
+        sections={"test": True},
+        last_alert=timezone.now() - timedelta(days=2),
+    )
+    AlertMatch.objects.bulk_create(
+        [AlertMatch(alert=alert, section="test", object_id=i) for i in range(7)]
+    )
+    config = alert_registry.entries["test"]
+    events = [AlertEvent(title="Match", url="http://example.org/match", content="")]
+    dates = {i: timezone.now() for i in range(7)}
+    with (
+        mock.patch.object(config, "get_document", return_value=object()),
+        mock.patch.object(config, "get_match_results", return_value=events),
+        mock.patch.object(config, "get_match_dates", return_value=dates),
+        mock.patch.object(config, "search") as search,
+    ):
+        send_due_updates()
+
+    search.assert_not_called()
+    assert len(mailoutbox) == 1
+    assert "http://example.org/match" in mailoutbox[0].body
+    assert "There are 6 more results." in mailoutbox[0].body
+    assert not AlertMatch.objects.exists()
+
+
+@pytest.mark.django_db
+def test_send_due_updates_filters_matches_by_date(alert_config, settings, mailoutbox):
+    settings.SEARCH_ALERT_PERCOLATE = True
+    now = timezone.now()
+    recent = Alert.objects.create(
+        email="recent@example.com",
+        email_confirmed=now,
+        query="test",
+        interval="daily",
+        sections={"test": True},
+        last_alert=now - timedelta(days=2),
+    )
+    old = Alert.objects.create(
+        email="old@example.com",
+        email_confirmed=now,
+        query="test",
+        interval="weekly",
+        sections={"test": True},
+        last_alert=now - timedelta(days=8),
+    )
+    # Object 1 is dated before the start of the recent alert
+    dates = {1: now - timedelta(days=5), 2: now}
+    for alert in (recent, old):
+        for object_id in dates:
+            AlertMatch.objects.create(alert=alert, section="test", object_id=object_id)
+    # Object 3 is no longer public
+    AlertMatch.objects.create(alert=recent, section="test", object_id=3)
+    config = alert_registry.entries["test"]
+    events = [AlertEvent(title="Match", url="http://example.org/match", content="")]
+    with (
+        mock.patch.object(config, "get_document", return_value=object()),
+        mock.patch.object(
+            config, "get_match_results", return_value=events
+        ) as get_match_results,
+        mock.patch.object(config, "get_match_dates", return_value=dates),
+    ):
+        send_due_updates()
+
+    assert len(mailoutbox) == 2
+    get_match_results.assert_any_call([2])
+    get_match_results.assert_any_call([2, 1])
+    bodies = {m.to[0]: m.body for m in mailoutbox}
+    assert "more result" not in bodies["recent@example.com"]
+    assert "There is one more result." in bodies["old@example.com"]
+    assert not AlertMatch.objects.exists()
+
+
+@pytest.mark.django_db
+def test_send_due_updates_bulk_connection(alert_config, settings, mailoutbox):
+    settings.EMAIL_BULK_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+    settings.EMAIL_BULK_BATCH_SIZE = 2
+    for i in range(3):
+        Alert.objects.create(
+            email="test{}@example.com".format(i),
+            email_confirmed=timezone.now(),
+            query="test",
+            interval="daily",
+            sections={"test": True},
+            last_alert=timezone.now() - timedelta(days=2),
+        )
+    with mock.patch(
+        "froide.helper.email_sending.get_mail_connection"
+    ) as get_mail_connection:
+        send_due_updates()
+
+    get_mail_connection.assert_not_called()
+    assert sorted(m.to[0] for m in mailoutbox) == [
+        "test0@example.com",
+        "test1@example.com",
+        "test2@example.com",
+    ]
+    assert not Alert.objects.filter_due().exists()
+
+
+@pytest.mark.django_db
+def test_send_due_updates_failing_batch(alert_config, settings, mailoutbox):
+    settings.EMAIL_BULK_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+    settings.EMAIL_BULK_BATCH_SIZE = 2
+    for i in range(3):
+        Alert.objects.create(
+            email="test{}@example.com".format(i),
+            email_confirmed=timezone.now(),
+            query="test",
+            interval="daily",
+            sections={"test": True},
+            last_alert=timezone.now() - timedelta(days=2),
+        )
+    send_messages = EmailBackend.send_messages
+    calls = []
+
+    def fail_second_batch(backend, messages):
+        calls.extend(messages)
+        if len(calls) > settings.EMAIL_BULK_BATCH_SIZE:
+            raise OSError("SMTP connection lost")
+        return send_messages(backend, messages)
+
+    with mock.patch.object(EmailBackend, "send_messages", fail_second_batch):
+        with pytest.raises(OSError):
+            send_due_updates()
+
+    # Alerts of the delivered batch are not sent again
+    assert len(mailoutbox) == 2
+    due = Alert.objects.filter_due()
+    assert due.count() == 1
+    assert due.get().email not in [m.to[0] for m in mailoutbox]
+
+
+@pytest.mark.django_db
+def test_send_due_updates_refused_mail(alert_config, settings, mailoutbox):
+    settings.EMAIL_BULK_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+    for i in range(2):
+        Alert.objects.create(
+            email="test{}@example.com".format(i),
+            email_confirmed=timezone.now(),
+            query="test",
+            interval="daily",
+            sections={"test": True},
+            last_alert=timezone.now() - timedelta(days=2),
+        )
+    send_messages = EmailBackend.send_messages
+
+    def refuse_first_recipient(backend, messages):
+        # Like the SMTP backend, failures are only visible in the count
+        messages = [m for m in messages if m.to != ["test0@example.com"]]
+        return send_messages(backend, messages)
+
+    with mock.patch.object(EmailBackend, "send_messages", refuse_first_recipient):
+        send_due_updates()
+
+    assert [m.to[0] for m in mailoutbox] == ["test1@example.com"]
+    assert Alert.objects.filter_due().get().email == "test0@example.com"
+
+
+@pytest.mark.django_db
+def test_send_due_updates_keeps_matches_of_failed_alerts(
+    alert_config, settings, mailoutbox
+):
+    settings.SEARCH_ALERT_PERCOLATE = True
+    alerts = [
+        Alert.objects.create(
+            email="test{}@example.com".format(i),
+            email_confirmed=timezone.now(),
+            query="test",
+            interval="daily",
+            sections={"test": True},
+            last_alert=timezone.now() - timedelta(days=2),
+        )
+        for i in range(2)
+    ]
+    for alert in alerts:
+        AlertMatch.objects.create(alert=alert, section="test", object_id=1)
+    config = alert_registry.entries["test"]
+    events = [AlertEvent(title="Match", url="http://example.org/match", content="")]
+    get_update_message = updates.get_update_message
+
+    def fail_first_alert(alert, *args):
+        if alert.id == alerts[0].id:
+            raise ValueError("broken alert")
+        return get_update_message(alert, *args)
+
+    with (
+        mock.patch.object(config, "get_document", return_value=object()),
+        mock.patch.object(config, "get_match_results", return_value=events),
+        mock.patch.object(config, "get_match_dates", return_value={1: timezone.now()}),
+        mock.patch.object(updates, "get_update_message", fail_first_alert),
+    ):
+        send_due_updates()
+
+    assert len(mailoutbox) == 1
+    assert list(AlertMatch.objects.values_list("alert_id", flat=True)) == [alerts[0].id]
@@ -1,39 +1,62 @@
-from datetime import datetime
+import logging
+from collections import defaultdict
+from datetime import date, datetime
 
-from django.utils import formats, timezone
+from django.conf import settings
+from django.utils import formats, timezone, translation
 from django.utils.translation import gettext as _
 
-from .configuration import AlertSection, alert_registry
-from .models import Alert, alert_update_email
+from froide.helper.search.queryset import execute_multi_search
 
+from .configuration import AlertConfiguration, AlertEvent, AlertSection, alert_registry
+from .models import Alert, AlertMatch, alert_update_email
 
-def send_update(alert: Alert, preview=False):
-    if preview:
-        start_date = timezone.now() - alert.get_relative_delta()
-    else:
-        start_date = alert.get_search_start_date()
-    updates = list(collect_updates(alert.query, start_date, alert.get_section_keys()))
-    if not updates:
-        return
+logger = logging.getLogger(__name__)
 
-    total_count = sum([section.result_count for section in updates])
+ALERT_BATCH_SIZE = 1000
+MULTI_SEARCH_SIZE = 50
+MATCH_ITEM_COUNT = 5
 
-    date_str = formats.date_format(start_date, "SHORT_DATE_FORMAT")
+SearchKey = tuple[str, str, date]
 
-    alert_update_email.send(
-        email=alert.get_email(),
-        subject=_("New search results for “{query}” since {date}").format(
+
+def get_update_message(alert: Alert, updates, start_date: datetime):
+    language = alert.user.language if alert.user else None
+    with translation.override(language or settings.LANGUAGE_CODE):
+        total_count = sum([section.result_count for section in updates])
+        date_str = formats.date_format(start_date, "SHORT_DATE_FORMAT")
+        subject = _("New search results for “{query}” since {date}").format(
             query=alert.query, date=date_str
-        ),
-        context={
+        )
+    return {
+        "email": alert.get_email(),
+        "subject": subject,
+        "context": {
             "user": alert.user,
             "alert": alert,
             "total_count": total_count,
             "sections": updates,
             "since_date": date_str,
         },
-        priority=True,
-    )
+        "language": language,
+    }
+
+
+def send_update(alert: Alert, preview=False, updates=None):
+    if preview:
+        start_date = timezone.now() - alert.get_relative_delta()
+    else:
+        start_date = alert.get_search_start_date()
+    if updates is None:
+        updates = list(
+            collect_updates(alert.query, start_date, alert.get_section_keys())
+        )
+    if not updates:
+        return
+
+    message = get_update_message(alert, updates, start_date)
+    message.pop("language")
+    alert_update_email.send(priority=True, **message)
     if not preview:
         alert.last_alert = timezone.now()
         alert.save(update_fields=["last_alert"])
@@ -53,3 +76,171 @@ def collect_updates(query: str, start_date: datetime, sections: list[str]):
             results=results,
             result_count=result_count,
         )
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split())
+
+
+def get_search_key(query: str, section: str, start_date: datetime) -> SearchKey:
+    # Alert searches filter by day, so alerts starting on the same day match
+    return (normalize_query(query), section, start_date.date())
+
+
+def run_searches(
+    searches: dict[SearchKey, tuple[AlertConfiguration, str, datetime]],
+) -> dict[SearchKey, tuple[int, list[AlertEvent]]]:
+    results = {}
+    pending = []
+    for key, (config, query, start_date) in searches.items():
+        sqs = config.get_search(query, start_date)
+        if sqs is None:
+            results[key] = config.search(query, start_date)
+        else:
+            pending.append((key, config, sqs))
+
+    for i in range(0, len(pending), MULTI_SEARCH_SIZE):
+        batch = pending[i : i + MULTI_SEARCH_SIZE]
+        execute_multi_search([sqs for _key, _config, sqs in batch])
+        for key, config, sqs in batch:
+            results[key] = config.get_results(sqs)
+    return results
+
+
+def uses_matches(config: AlertConfiguration) -> bool:
+    return settings.SEARCH_ALERT_PERCOLATE and config.get_document() is not None
+
+
+def get_alert_matches(alerts: list[Alert]):
+    """
+    Return object ids matched at index time by alert and section,
+    most recent first, and the ids of the matches read.
+    """
+    matches = defaultdict(list)
+    match_ids = []
+    qs = AlertMatch.objects.filter(alert__in=alerts).values_list(
+        "id", "alert_id", "section", "object_id"
+    )
+    for match_id, alert_id, section, object_id in qs:
+        matches[(alert_id, section)].append(object_id)
+        match_ids.append(match_id)
+    return matches, match_ids
+
+
+def get_match_dates(matches) -> dict[str, dict[int, datetime]]:
+    object_ids = defaultdict(set)
+    for (_alert_id, section), section_ids in matches.items():
+        object_ids[section].update(section_ids)
+    return {
+        config.key: config.get_match_dates(list(object_ids[config.key]))
+        for config in alert_registry.get_for_keys(object_ids)
+        if uses_matches(config)
+    }
+
+
+def collect_due_updates(
+    alerts: list[Alert], results=None, matches=None
+) -> dict[int, list[AlertSection]]:
+    """
+    Collect updates of many alerts, running each distinct combination of
+    query, section and start day only once. `results` can be shared
+    between calls to reuse searches across batches of alerts.
+    Sections matched at index time take their results from `matches`
+    of objects dated on or after the start day of the alert.
+    """
+    if results is None:
+        results = {}
+    if matches is None:
+        matches = {}
+    match_dates = get_match_dates(matches)
+    searches = {}
+    for alert in alerts:
+        start_date = alert.get_search_start_date()
+        for config in alert.get_sections():
+            if uses_matches(config):
+                continue
+            key = get_search_key(alert.query, config.key, start_date)
+            if key not in results:
+                searches[key] = (config, key[0], start_date)
+    results.update(run_searches(searches))
+
+    updates = {}
+    for alert in alerts:
+        start_date = alert.get_search_start_date()
+        sections = []
+        for config in alert.get_sections():
+            if uses_matches(config):
+                dates = match_dates.get(config.key, {})
+                object_ids = [
+                    pk
+                    for pk in matches.get((alert.id, config.key), [])
+                    if pk in dates and dates[pk].date() >= start_date.date()
+                ]
+                # Alerts with the same recent matches share their results
+                key = (config.key, tuple(object_ids[:MATCH_ITEM_COUNT]))
+                if key not in results:
+                    results[key] = config.get_match_results(list(key[1]))
+                result_count, events = len(object_ids), results[key]
+            else:
+                key = get_search_key(alert.query, config.key, start_date)
+                result_count, events = results[key]
+            if result_count == 0:
+                continue
+            sections.append(
+                AlertSection(
+                    key=config.key,
+                    title=config.title,
+                    url=config.get_search_link(alert.query, start_date),
+                    results=events,
+                    result_count=result_count,
+                )
+            )
+        updates[alert.id] = sections
+    return updates
+
+
+def send_due_updates():
+    alerts = Alert.objects.filter_due().select_related("user").order_by("query")
+    results = {}
+    batch = []
+    for alert in alerts.iterator(chunk_size=ALERT_BATCH_SIZE):
+        batch.append(alert)
+        if len(batch) == ALERT_BATCH_SIZE:
+            send_batch_updates(batch, results)
+            batch = []
+    if batch:
+        send_batch_updates(batch, results)
+
+
+def send_batch_updates(alerts: list[Alert], results):
+    matches, match_ids = None, []
+    if settings.SEARCH_ALERT_PERCOLATE:
+        matches, match_ids = get_alert_matches(alerts)
+    updates = collect_due_updates(alerts, results=results, matches=matches)
+    outdated = [alert.id for alert in alerts if not updates[alert.id]]
+    if match_ids and outdated:
+        # Matches of alerts without updates are too old or no longer public
+        AlertMatch.objects.filter(id__in=match_ids, alert_id__in=outdated).delete()
+    messages = []
+    for alert in alerts:
+        if not updates[alert.id]:
+            continue
+        try:
+            message = get_update_message(
+                alert, updates[alert.id], alert.get_search_start_date()
+            )
+        except Exception:
+            logger.exception("Could not send update of search alert %s", alert.id)
+            continue
+        message["sent_token"] = alert.id
+        messages.append(message)
+
+    def record_sent(alert_ids):
+        # Recorded per delivered mail batch, so a failing batch
+        # does not cause mails of earlier batches to be sent again
+        Alert.objects.filter(id__in=alert_ids).update(last_alert=timezone.now())
+        # Matches of alerts that were not sent and matches buffered
+        # while sending are kept for the next update
+        AlertMatch.objects.filter(id__in=match_ids, alert_id__in=alert_ids).delete()
+
+    alert_update_email.bulk_send(messages, on_sent=record_sent)
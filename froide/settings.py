@@ -459,6 +459,7 @@ class Base(Configuration):
     CELERY_TASK_ROUTES = {
         "froide.foirequest.tasks.fetch_mail": {"queue": "emailfetch"},
         "froide.foirequest.tasks.process_mail": {"queue": "email"},
+        "froide.foirequest.tasks.process_spooled_mail": {"queue": "email"},
         "djcelery_email_send_multiple": {"queue": "emailsend"},
         "froide.helper.tasks.search_*": {"queue": "searchindex"},
         "froide.foirequest.tasks.redact_attachment_task": {"queue": "redact"},
@@ -477,6 +478,13 @@ class Base(Configuration):
     CELERY_EMAIL_TASK_CONFIG = {"queue": "emailsend"}
     CELERY_EMAIL_BACKEND = "froide.foirequest.smtp.EmailBackend"
     EMAIL_BULK_QUEUE = "emailsend_bulk"
+    # Backend for digest mails sent in bulk over one connection,
+    # e.g. froide.foirequest.smtp.EmailBackend. Without it every
+    # bulk mail is queued on its own like other mails
+    EMAIL_BULK_BACKEND = values.Value(None)
+    EMAIL_BULK_BATCH_SIZE = values.IntegerValue(100)
+    # Maximum bulk mails per second, 0 for no limit
+    EMAIL_BULK_RATE_LIMIT = values.FloatValue(0)
 
     # Monitoring
 
@@ -493,6 +501,11 @@ class Base(Configuration):
     ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = (
         "django_elasticsearch_dsl.signals.RealTimeSignalProcessor"
     )
+    # Seconds to collect and deduplicate search index updates before flushing
+    SEARCH_INDEX_DEBOUNCE = values.IntegerValue(5)
+    # Match newly indexed objects against search alerts instead of
+    # searching for every alert when updates are due
+    SEARCH_ALERT_PERCOLATE = values.BooleanValue(False)
 
     # ######### API #########
 
@@ -649,6 +662,10 @@ class Base(Configuration):
     # allow override of settings.LANGUAGE_CODE for Tesseract
     TESSERACT_LANGUAGE = None
 
+    # Store generated correspondence PDFs in file storage
+    # and pre-generate them for resolved requests
+    FOI_PDF_CACHE = values.BooleanValue(True)
+
     # ###### Email ##############
 
     # Django settings
@@ -673,6 +690,11 @@ class Base(Configuration):
     FOI_EMAIL_ACCOUNT_NAME = values.Value("foi@example.com")
     FOI_EMAIL_ACCOUNT_PASSWORD = values.Value("")
     FOI_EMAIL_USE_SSL = values.BooleanValue(True)
+    # Fetch unseen mails in UID chunks of this size and pass
+    # spooled mail files to tasks, 0 fetches mails one by one
+    FOI_EMAIL_FETCH_BATCH_SIZE = values.IntegerValue(0)
+    # Reuse logged in IMAP connections per worker process
+    FOI_EMAIL_PERSISTENT_CONNECTION = values.BooleanValue(False)
 
     # SMTP settings for sending FoI mail
     FOI_EMAIL_HOST_USER = values.Value(FOI_EMAIL_ACCOUNT_NAME)
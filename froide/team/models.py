@@ -21,6 +21,26 @@ class MembershipStatus(models.TextChoices):
     ACTIVE = "active", _("active")
 
 
+# Roles that allow an auth verb on team objects
+VERB_ROLES = {
+    "read": (TeamRole.OWNER, TeamRole.EDITOR, TeamRole.VIEWER),
+    "write": (TeamRole.OWNER, TeamRole.EDITOR),
+    "manage": (TeamRole.OWNER,),
+}
+
+
+class TeamMembershipManager(models.Manager):
+    def get_roles_for_user(self, user):
+        """
+        Role per team id of all active memberships of user.
+        """
+        return dict(
+            self.get_queryset()
+            .filter(user=user, status=MembershipStatus.ACTIVE)
+            .values_list("team_id", "role")
+        )
+
+
 class TeamMembership(models.Model):
     ROLE = TeamRole
     MEMBERSHIP_STATUS = MembershipStatus
@@ -36,6 +56,8 @@ class TeamMembership(models.Model):
     created = models.DateTimeField(default=timezone.now)
     updated = models.DateTimeField(default=timezone.now)
 
+    objects = TeamMembershipManager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -60,6 +82,13 @@ class TeamMembership(models.Model):
     def send_invite_mail(self):
         pass
 
+    @staticmethod
+    def role_can_do(role, verb):
+        try:
+            return role in VERB_ROLES[verb]
+        except KeyError:
+            raise ValueError("Invalid auth verb") from None
+
 
 class TeamManager(models.Manager):
     def get_for_user(self, user, *args, **kwargs):
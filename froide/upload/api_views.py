@@ -1,6 +1,8 @@
 import json
 import logging
+import os
 
+from django.db import transaction
 from django.http import Http404
 from django.urls import reverse
 from django.utils import timezone
@@ -23,9 +25,9 @@ from . import (
 )
 from . import settings as tus_settings
 from .exceptions import Conflict, TusParseError
-from .models import Upload, UploadState
+from .models import Upload, UploadState, get_upload_guid
 from .serializers import UploadCreateSerializer, UploadSerializer
-from .utils import augment_request, checksum_matches, encode_upload_metadata
+from .utils import augment_request, encode_upload_metadata, get_header
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +45,8 @@ class TusUploadStreamParser(BaseParser):
     media_type = "application/offset+octet-stream"
 
     def parse(self, stream, media_type=None, parser_context=None):
-        return DataAndFiles({"chunk": stream.body}, {})
+        # The chunk is copied from the stream to the upload file in buffers
+        return DataAndFiles({"chunk": stream}, {})
 
 
 class UploadMetadata(BaseMetadata):
@@ -102,6 +105,9 @@ class TusHeadMixin(object):
         if upload.upload_metadata:
             headers["Upload-Metadata"] = encode_upload_metadata(upload.get_metadata())
 
+        if upload.upload_concat:
+            headers["Upload-Concat"] = upload.upload_concat
+
         # Add upload expiry to headers
         add_expiry_header(upload, headers)
 
@@ -117,8 +123,22 @@ class TusCreateMixin(mixins.CreateModelMixin):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Get file size from request
-        upload_length = getattr(request, constants.UPLOAD_LENGTH_FIELD_NAME, -1)
+        upload_concat = getattr(request, constants.UPLOAD_CONCAT_FIELD_NAME, None)
+        concat_type, partial_urls = upload_concat or ("", [])
+
+        partial_uploads = None
+        if concat_type == constants.UPLOAD_CONCAT_FINAL:
+            # Final upload is the concatenation of complete partial uploads
+            partial_uploads = self.get_partial_uploads(partial_urls)
+            if partial_uploads is None:
+                return Response(
+                    'Invalid partial uploads in "Upload-Concat" header.',
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            upload_length = sum(p.upload_length for p in partial_uploads)
+        else:
+            # Get file size from request
+            upload_length = getattr(request, constants.UPLOAD_LENGTH_FIELD_NAME, -1)
 
         # Validate upload_length
         max_file_size = getattr(self, "max_file_size", tus_settings.TUS_MAX_FILE_SIZE)
@@ -129,7 +149,7 @@ class TusCreateMixin(mixins.CreateModelMixin):
             )
 
         # If upload_length is not given, we expect the defer header!
-        if not upload_length or upload_length < 0:
+        if partial_uploads is None and (not upload_length or upload_length < 0):
             if getattr(request, constants.UPLOAD_DEFER_LENGTH_FIELD_NAME, -1) != 1:
                 return Response(
                     'Missing "{Upload-Defer-Length}" header.',
@@ -157,6 +177,7 @@ class TusCreateMixin(mixins.CreateModelMixin):
                     if not request.user.is_authenticated
                     else None
                 ),
+                "upload_concat": get_header(request, "Upload-Concat", ""),
             }
         )
 
@@ -169,6 +190,13 @@ class TusCreateMixin(mixins.CreateModelMixin):
         # Get upload from serializer
         upload = serializer.instance
 
+        if partial_uploads is not None:
+            upload.concatenate(partial_uploads)
+            upload.start_saving()
+            # Parts are not needed after concatenation
+            for partial_upload in partial_uploads:
+                partial_upload.delete()
+
         # Prepare response headers
         headers = self.get_success_headers(serializer.data)
 
@@ -187,6 +215,30 @@ class TusCreateMixin(mixins.CreateModelMixin):
             serializer.data, headers=headers, status=status.HTTP_201_CREATED
         )
 
+    def get_partial_uploads(self, upload_urls):
+        """
+        Complete partial uploads of the user in the order of upload_urls
+        or None if any of them is invalid
+        """
+        guids = [get_upload_guid(url) for url in upload_urls]
+        if None in guids:
+            return None
+        uploads = {
+            str(upload.guid): upload
+            for upload in self.get_queryset().filter(
+                guid__in=guids, upload_concat=constants.UPLOAD_CONCAT_PARTIAL
+            )
+        }
+        partial_uploads = []
+        for guid in guids:
+            upload = uploads.get(str(guid))
+            if upload is None or not upload.is_complete():
+                return None
+            if not upload.temporary_file_exists():
+                return None
+            partial_uploads.append(upload)
+        return partial_uploads
+
     def get_success_headers(self, data):
         try:
             return {
@@ -214,20 +266,14 @@ class TusCreateMixin(mixins.CreateModelMixin):
 
 
 class TusPatchMixin(mixins.UpdateModelMixin):
-    def get_chunk(self, request):
-        if TusUploadStreamParser in self.parser_classes:
-            return request.data["chunk"]
-        return request.body
-
-    def validate_chunk(self, offset, chunk_bytes):
+    def get_chunk_stream(self, request):
         """
-        Handler to validate chunks before they are actually written to the buffer file. Should throw a ValidationError
-          if something's off.
-        :param int offset:
-        :param six.binary_type chunk_bytes:
-        :return six.binary_type: The chunk_bytes
+        File-like object to read the chunk from, without reading the
+        whole request body into memory
         """
-        return chunk_bytes
+        if TusUploadStreamParser in self.parser_classes:
+            return request.data.get("chunk")
+        return request.stream
 
     def update(self, request, *args, **kwargs):
         raise MethodNotAllowed
@@ -252,6 +298,12 @@ class TusPatchMixin(mixins.UpdateModelMixin):
         # Retrieve object
         upload = self.get_object()
 
+        # Final uploads are concatenated from partial uploads
+        if upload.is_final():
+            return Response(
+                "Final uploads cannot be modified.", status=status.HTTP_403_FORBIDDEN
+            )
+
         # Get upload_offset
         upload_offset = getattr(request, constants.UPLOAD_OFFSET_NAME)
 
@@ -265,47 +317,70 @@ class TusPatchMixin(mixins.UpdateModelMixin):
         # Change state
         if upload.state == UploadState.INITIAL:
             upload.start_receiving()
-            upload.save()
 
-        # Get chunk from request
-        chunk_bytes = self.get_chunk(request)
+        # Limit chunk to the remaining upload length
+        if upload.upload_length >= 0:
+            max_length = upload.upload_length - upload_offset
+        else:
+            max_file_size = getattr(
+                self, "max_file_size", tus_settings.TUS_MAX_FILE_SIZE
+            )
+            max_length = max_file_size - upload_offset
+        chunk_length = max_length
+        content_length = request.headers.get("content-length")
+        if content_length:
+            chunk_length = int(content_length)
+            if chunk_length > max_length:
+                return Response(
+                    "Chunk exceeds upload length.",
+                    status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                )
+
+        # Get chunk stream from request
+        chunk_stream = self.get_chunk_stream(request)
 
         # Check for data
-        if not chunk_bytes:
+        if not chunk_length or chunk_stream is None:
             return Response("No data.", status=status.HTTP_400_BAD_REQUEST)
 
         # Check checksum  (http://tus.io/protocols/resumable-upload.html#checksum)
         upload_checksum = getattr(request, constants.UPLOAD_CHECKSUM_FIELD_NAME, None)
+        checksum_algorithm = None
         if upload_checksum is not None:
             if upload_checksum[0] not in tus_api_checksum_algorithms:
                 return Response(
                     "Unsupported Checksum Algorithm: {}.".format(upload_checksum[0]),
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            else:
-                matches = checksum_matches(
-                    upload_checksum[0], upload_checksum[1], chunk_bytes
-                )
-                if not matches:
-                    return Response("Checksum Mismatch.", status=460)
-
-        # Run chunk validator
-        chunk_bytes = self.validate_chunk(upload_offset, chunk_bytes)
+            checksum_algorithm = upload_checksum[0]
 
-        # Check for data
-        if not chunk_bytes:
-            return Response(
-                'No data. Make sure "validate_chunk" returns data.',
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Write file
-        chunk_size = int(request.headers.get("content-length", 102400))
+        # Write the chunk to its own file without holding a lock,
+        # the client may take long to send it
         try:
-            upload.write_data(chunk_bytes, chunk_size)
+            chunk_path, num_bytes_written, checksum = upload.write_stream(
+                chunk_stream, chunk_length, checksum_algorithm=checksum_algorithm
+            )
         except Exception as e:
             return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
 
+        try:
+            # Check for data
+            if not num_bytes_written:
+                return Response("No data.", status=status.HTTP_400_BAD_REQUEST)
+
+            if upload_checksum is not None and checksum != upload_checksum[1]:
+                return Response("Checksum Mismatch.", status=460)
+
+            # Lock the upload row only to append the chunk, a concurrent
+            # PATCH at the same offset may have been committed meanwhile
+            with transaction.atomic():
+                upload = self.get_queryset().select_for_update().get(pk=upload.pk)
+                if upload_offset != upload.upload_offset:
+                    raise Conflict
+                upload.append_chunk(chunk_path, num_bytes_written)
+        finally:
+            os.remove(chunk_path)
+
         headers = {
             "Upload-Offset": upload.upload_offset,
         }
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.12 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('upload', '0003_alter_upload_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='upload_concat',
+            field=models.TextField(blank=True),
+        ),
+    ]
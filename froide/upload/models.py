@@ -11,7 +11,8 @@ from django.db import models
 from django.urls import Resolver404, resolve
 from django.utils.translation import gettext_lazy as _
 
-from .utils import write_bytes_to_file
+from . import constants
+from .utils import append_file, copy_stream_to_file
 
 
 class UploadState(models.TextChoices):
@@ -53,6 +54,9 @@ class AbstractUpload(models.Model):
 
     expires = models.DateTimeField(null=True, blank=True)
 
+    # Upload-Concat of the tus concatenation extension
+    upload_concat = models.TextField(blank=True)
+
     class Meta:
         abstract = True
 
@@ -64,14 +68,63 @@ class AbstractUpload(models.Model):
         if self.upload_offset < 0:
             raise ValidationError(_("upload_offset should be >= 0."))
 
-    def write_data(self, upload_bytes, chunk_size):
-        num_bytes_written = write_bytes_to_file(
-            self.temporary_file_path, self.upload_offset, upload_bytes, makedirs=True
+    def is_partial(self):
+        return self.upload_concat == constants.UPLOAD_CONCAT_PARTIAL
+
+    def is_final(self):
+        return self.upload_concat.startswith(constants.UPLOAD_CONCAT_FINAL)
+
+    def write_stream(self, stream, length, checksum_algorithm=None):
+        """
+        Write up to length bytes from stream to a new chunk file next to
+        the upload file. Returns the path of the chunk file, the amount of
+        bytes written and their checksum. The chunk only becomes part of
+        the upload with append_chunk, the caller removes the chunk file.
+        """
+        fd, chunk_path = tempfile.mkstemp(
+            prefix="tus-upload-chunk-",
+            dir=os.path.dirname(self.temporary_file_path),
         )
+        os.close(fd)
+        try:
+            num_bytes_written, checksum = copy_stream_to_file(
+                stream, chunk_path, 0, length, checksum_algorithm=checksum_algorithm
+            )
+        except Exception:
+            os.remove(chunk_path)
+            raise
+        return chunk_path, num_bytes_written, checksum
 
-        if num_bytes_written > 0:
-            self.upload_offset += num_bytes_written
-            self.save()
+    def append_chunk(self, chunk_path, num_bytes):
+        """
+        Append a chunk file at the current offset and advance upload_offset
+        with an update of only that column.
+        Callers hold a lock on the upload row.
+        """
+        with open(self.temporary_file_path, "r+b", buffering=0) as fh:
+            # Drop data of appends that failed before their commit
+            fh.truncate(self.upload_offset)
+            fh.seek(self.upload_offset)
+            append_file(fh, chunk_path)
+        type(self)._default_manager.filter(pk=self.pk).update(
+            upload_offset=self.upload_offset + num_bytes
+        )
+        self.upload_offset += num_bytes
+
+    def concatenate(self, partial_uploads):
+        """
+        Write the data of complete partial uploads in order into the
+        temporary file and mark the upload as received.
+        """
+        path = self.get_or_create_temporary_file()
+        offset = 0
+        with open(path, "wb", buffering=0) as fh:
+            for partial_upload in partial_uploads:
+                offset += append_file(fh, partial_upload.temporary_file_path)
+        self.upload_length = offset
+        self.upload_offset = offset
+        self.state = UploadState.RECEIVING
+        self.save()
 
     @property
     def size(self):
@@ -170,19 +223,26 @@ class AbstractUpload(models.Model):
         self.save(update_fields=["state"])
 
 
+def get_upload_guid(upload_url):
+    parsed_upload_url = urlparse(upload_url)
+    upload_path = parsed_upload_url.path
+    try:
+        match = resolve(upload_path)
+    except Resolver404:
+        return None
+    return match.kwargs.get("guid")
+
+
 class UploadManager(models.Manager):
     def get_by_url(self, upload_url, user=None, token=None):
-        parsed_upload_url = urlparse(upload_url)
-        upload_path = parsed_upload_url.path
-        try:
-            match = resolve(upload_path)
-        except Resolver404:
-            return None
-        guid = match.kwargs.get("guid")
+        guid = get_upload_guid(upload_url)
         if guid is None:
             return None
         try:
-            return Upload.objects.get(user=user, token=token, guid=guid)
+            # Partial uploads are only parts of a final upload
+            return Upload.objects.exclude(
+                upload_concat=constants.UPLOAD_CONCAT_PARTIAL
+            ).get(user=user, token=token, guid=guid)
         except Upload.DoesNotExist:
             return None
 
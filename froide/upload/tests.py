@@ -0,0 +1,191 @@
+import hashlib
+import io
+import os
+from unittest import mock
+
+from django.test import Client
+from django.urls import reverse
+
+import pytest
+
+from froide.account.factories import UserFactory
+
+from .factories import TEST_PDF_PATH, TEST_PDF_SIZE
+from .models import Upload, UploadState
+from .utils import UPLOAD_BUFFER_SIZE
+
+TUS_HEADERS = {"HTTP_TUS_RESUMABLE": "1.0.0"}
+
+
+def get_test_data():
+    with open(TEST_PDF_PATH, "rb") as f:
+        return f.read()
+
+
+def create_upload(client, length=None, concat=None):
+    headers = dict(TUS_HEADERS)
+    if length is not None:
+        headers["HTTP_UPLOAD_LENGTH"] = str(length)
+    if concat is not None:
+        headers["HTTP_UPLOAD_CONCAT"] = concat
+    response = client.post(reverse("api:upload-list"), **headers)
+    assert response.status_code == 201
+    return response["Location"]
+
+
+def patch_chunk(client, url, offset, data, **extra):
+    return client.patch(
+        url,
+        data=data,
+        content_type="application/offset+octet-stream",
+        HTTP_UPLOAD_OFFSET=str(offset),
+        **TUS_HEADERS,
+        **extra,
+    )
+
+
+def get_upload(url):
+    return Upload.objects.get(guid=url.rstrip("/").rsplit("/", 1)[-1])
+
+
+@pytest.fixture
+def upload_client(client: Client):
+    user = UserFactory.create()
+    assert client.login(email=user.email, password="froide")
+    return client
+
+
+@pytest.mark.django_db
+def test_upload_stream_chunks(upload_client):
+    data = get_test_data()
+    url = create_upload(upload_client, TEST_PDF_SIZE)
+
+    # Chunks larger than the copy buffer are streamed to the file
+    chunk_size = UPLOAD_BUFFER_SIZE + 1000
+    offset = 0
+    while offset < len(data):
+        chunk = data[offset : offset + chunk_size]
+        response = patch_chunk(upload_client, url, offset, chunk)
+        assert response.status_code == 204
+        offset += len(chunk)
+        assert int(response["Upload-Offset"]) == offset
+
+    upload = get_upload(url)
+    assert upload.upload_offset == TEST_PDF_SIZE
+    assert upload.state == UploadState.SAVING
+    with open(upload.temporary_file_path, "rb") as f:
+        assert f.read() == data
+
+    # Wrong offset
+    response = patch_chunk(upload_client, url, 0, data[:10])
+    assert response.status_code == 409
+
+
+@pytest.mark.django_db
+def test_upload_chunk_checksum(upload_client):
+    data = get_test_data()
+    url = create_upload(upload_client, TEST_PDF_SIZE)
+
+    chunk = data[:1000]
+    wrong_checksum = hashlib.sha1(b"other").hexdigest()
+    response = patch_chunk(
+        upload_client,
+        url,
+        0,
+        chunk,
+        HTTP_UPLOAD_CHECKSUM="sha1 {}".format(wrong_checksum),
+    )
+    assert response.status_code == 460
+    upload = get_upload(url)
+    assert upload.upload_offset == 0
+    assert os.path.getsize(upload.temporary_file_path) == 0
+
+    checksum = hashlib.sha1(chunk).hexdigest()
+    response = patch_chunk(
+        upload_client, url, 0, chunk, HTTP_UPLOAD_CHECKSUM="sha1 {}".format(checksum)
+    )
+    assert response.status_code == 204
+    assert int(response["Upload-Offset"]) == 1000
+
+    # Chunk larger than the rest of the upload
+    response = patch_chunk(upload_client, url, 1000, data)
+    assert response.status_code == 413
+    assert get_upload(url).upload_offset == 1000
+
+
+@pytest.mark.django_db
+def test_upload_chunk_conflict(upload_client):
+    data = get_test_data()
+    url = create_upload(upload_client, TEST_PDF_SIZE)
+    chunk_paths = []
+    write_stream = Upload.write_stream
+
+    def write_concurrently(upload, *args, **kwargs):
+        result = write_stream(upload, *args, **kwargs)
+        chunk_paths.append(result[0])
+        # Another request commits a chunk at the same offset meanwhile
+        other = Upload.objects.get(pk=upload.pk)
+        other_path, num_bytes, _checksum = write_stream(
+            other, io.BytesIO(data[:1000]), 1000
+        )
+        other.append_chunk(other_path, num_bytes)
+        os.remove(other_path)
+        return result
+
+    with mock.patch.object(Upload, "write_stream", write_concurrently):
+        response = patch_chunk(upload_client, url, 0, data[:1000])
+    assert response.status_code == 409
+    assert not os.path.exists(chunk_paths[0])
+
+    upload = get_upload(url)
+    assert upload.upload_offset == 1000
+    with open(upload.temporary_file_path, "rb") as f:
+        assert f.read() == data[:1000]
+
+
+@pytest.mark.django_db
+def test_upload_concatenation(upload_client):
+    data = get_test_data()
+    split = len(data) // 3
+    parts = [data[:split], data[split:]]
+
+    partial_urls = []
+    for part in parts:
+        url = create_upload(upload_client, len(part), concat="partial")
+        response = patch_chunk(upload_client, url, 0, part)
+        assert response.status_code == 204
+        partial_urls.append(url)
+
+    # Partial uploads cannot be used as attachment uploads
+    user = get_upload(url).user
+    assert Upload.objects.get_by_url(partial_urls[0], user=user) is None
+
+    response = upload_client.head(partial_urls[0], **TUS_HEADERS)
+    assert response["Upload-Concat"] == "partial"
+
+    final_url = create_upload(
+        upload_client, concat="final;{}".format(" ".join(partial_urls))
+    )
+    upload = get_upload(final_url)
+    assert upload.upload_length == len(data)
+    assert upload.is_complete()
+    assert upload.state == UploadState.SAVING
+    with open(upload.temporary_file_path, "rb") as f:
+        assert f.read() == data
+    assert not Upload.objects.filter(upload_concat="partial").exists()
+
+    response = upload_client.head(final_url, **TUS_HEADERS)
+    assert response["Upload-Length"] == str(len(data))
+    assert response["Upload-Concat"].startswith("final;")
+
+    # Final uploads cannot be patched
+    response = patch_chunk(upload_client, final_url, 0, data[:10])
+    assert response.status_code == 403
+
+    # Unknown partial uploads
+    response = upload_client.post(
+        reverse("api:upload-list"),
+        HTTP_UPLOAD_CONCAT="final;{}".format(partial_urls[0]),
+        **TUS_HEADERS,
+    )
+    assert response.status_code == 400
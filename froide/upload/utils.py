@@ -1,11 +1,14 @@
 import hashlib
 import os
-import sys
+import shutil
 import tempfile
 from base64 import b64decode, b64encode
 
 from . import constants
 
+# Size of buffers streamed from request bodies and partial uploads to files
+UPLOAD_BUFFER_SIZE = 64 * 1024
+
 
 def encode_base64_to_string(data):
     """
@@ -41,38 +44,69 @@ def encode_upload_metadata(upload_metadata):
     )
 
 
-def write_bytes_to_file(file_path, offset, bytes, makedirs=False):
+def copy_stream_to_file(
+    stream, file_path, offset, length, checksum_algorithm=None, makedirs=False
+):
     """
-    Util to write bytes to a local file at a specific offset
+    Copy up to length bytes from a file-like stream, e.g. the request
+    body, to a local file at offset in fixed size buffers, so only one
+    buffer of the chunk is held in memory. The file is opened once.
+    :param stream: Object with a read(size) method
     :param str file_path:
     :param int offset:
-    :param six.binary_type bytes:
+    :param int length: The maximum amount of bytes to copy
+    :param str checksum_algorithm: Algorithm of the returned checksum (e.g. "md5")
     :param bool makedirs: Whether or not to create the file_path's directories if they don't exist
-    :return int: The amount of bytes written
+    :return tuple: The amount of bytes written and the hex-checksum or None
     """
     if makedirs:
         if not os.path.isdir(os.path.dirname(file_path)):
             os.makedirs(os.path.dirname(file_path))
 
-    num_bytes_written = -1
+    checksum = None
+    if checksum_algorithm is not None:
+        checksum = hashlib.new(checksum_algorithm)
 
-    fh = None
-    try:
-        try:
-            fh = open(file_path, "r+b")
-        except IOError:
-            fh = open(file_path, "wb")
+    num_bytes_written = 0
+    mode = "r+b" if os.path.exists(file_path) else "wb"
+    with open(file_path, mode) as fh:
         fh.seek(offset, os.SEEK_SET)
-        num_bytes_written = fh.write(bytes)
-    finally:
-        if fh is not None:
-            fh.close()
+        while num_bytes_written < length:
+            data = stream.read(min(UPLOAD_BUFFER_SIZE, length - num_bytes_written))
+            if not data:
+                break
+            fh.write(data)
+            if checksum is not None:
+                checksum.update(data)
+            num_bytes_written += len(data)
 
-    # For python version < 3, "fh.write" will return None...
-    if sys.version_info[0] < 3:
-        num_bytes_written = len(bytes)
+    return num_bytes_written, checksum.hexdigest() if checksum is not None else None
 
-    return num_bytes_written
+
+def append_file(fh, file_path):
+    """
+    Util to append the content of a local file to an open file, with
+    sendfile inside the kernel where the platform supports it
+    :param fh: Unbuffered file opened for binary writing
+    :param str file_path:
+    :return int: The amount of bytes written
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as source:
+        offset = 0
+        try:
+            while offset < size:
+                sent = os.sendfile(fh.fileno(), source.fileno(), offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+        except (AttributeError, OSError):
+            # No file to file sendfile, copy the rest in buffers
+            fh.seek(0, os.SEEK_END)
+            source.seek(offset)
+            shutil.copyfileobj(source, fh, UPLOAD_BUFFER_SIZE)
+            offset = size
+    return offset
 
 
 def read_bytes_from_field_file(field_file):
@@ -154,6 +188,7 @@ def checksum_matches(checksum_algorithm, checksum, bytes):
 
 def augment_request(request):
     parse_tus_version(request)
+    parse_upload_concat(request)
     parse_upload_defer_length(request)
     parse_upload_offset(request)
     parse_upload_length(request)
@@ -172,6 +207,28 @@ def parse_tus_version(request):
     setattr(request, constants.TUS_RESUMABLE_FIELD_NAME, tus_version)
 
 
+def parse_upload_concat(request):
+    upload_concat = get_header(request, "Upload-Concat", None)
+
+    if upload_concat is None:
+        return
+
+    if upload_concat == constants.UPLOAD_CONCAT_PARTIAL:
+        value = (constants.UPLOAD_CONCAT_PARTIAL, [])
+    elif upload_concat.startswith(constants.UPLOAD_CONCAT_FINAL + ";"):
+        upload_urls = upload_concat[len(constants.UPLOAD_CONCAT_FINAL) + 1 :].split()
+        if not upload_urls:
+            raise ValueError('Missing uploads in "Upload-Concat" header.')
+        value = (constants.UPLOAD_CONCAT_FINAL, upload_urls)
+    else:
+        raise ValueError(
+            'Invalid value for "Upload-Concat" header: {}.'.format(upload_concat)
+        )
+
+    # Set upload concat type and partial upload urls
+    setattr(request, constants.UPLOAD_CONCAT_FIELD_NAME, value)
+
+
 def parse_upload_defer_length(request):
     upload_defer_length = get_header(request, "Upload-Defer-Length", None)
 
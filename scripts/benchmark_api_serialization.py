@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Query count benchmark for nested request serialization.
+
+Creates a test database with requests that have several messages with
+attachments and serializes them with FoiRequestDetailSerializer, once
+request by request like the detail view does and once as a page with
+the batch path of the list serializer. Message and attachment queries
+of the page must not grow with the number of requests.
+
+Requires the test database server (PostGIS) of the Test configuration.
+
+Usage: python scripts/benchmark_api_serialization.py [--requests 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "froide.settings")
+os.environ.setdefault("DJANGO_CONFIGURATION", "Test")
+
+import configurations  # noqa: E402
+
+configurations.setup()
+
+from django.contrib.auth.models import AnonymousUser  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from froide.foirequest.models import FoiRequest  # noqa: E402
+from froide.foirequest.serializers import FoiRequestDetailSerializer  # noqa: E402
+from froide.foirequest.tests import factories  # noqa: E402
+
+
+def make_data(request_count, message_count, attachment_count):
+    foirequests = factories.FoiRequestFactory.create_batch(request_count)
+    for foirequest in foirequests:
+        for _ in range(message_count):
+            message = factories.FoiMessageFactory.create(request=foirequest)
+            factories.FoiAttachmentFactory.create_batch(
+                attachment_count, belongs_to=message
+            )
+    return [fr.id for fr in foirequests]
+
+
+def get_request():
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+    return request
+
+
+def per_request(request_ids):
+    data = []
+    for foirequest in FoiRequest.objects.filter(id__in=request_ids):
+        data.append(
+            FoiRequestDetailSerializer(
+                foirequest, context={"request": get_request()}
+            ).data
+        )
+    return data
+
+
+def page(request_ids):
+    return FoiRequestDetailSerializer(
+        FoiRequest.objects.filter(id__in=request_ids),
+        many=True,
+        context={"request": get_request()},
+    ).data
+
+
+def bench(func, request_ids):
+    reset_queries()
+    start = time.monotonic()
+    data = func(request_ids)
+    duration = time.monotonic() - start
+    message_queries = [
+        q
+        for q in connection.queries
+        if 'FROM "foirequest_foimessage"' in q["sql"]
+        or 'FROM "foirequest_foiattachment"' in q["sql"]
+    ]
+    return duration, len(connection.queries), len(message_queries), data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=5)
+    parser.add_argument("--attachments", type=int, default=3)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.force_debug_cursor = True
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        factories.make_world()
+        request_ids = make_data(args.requests, args.messages, args.attachments)
+        results = {}
+        for func in (per_request, page):
+            duration, queries, message_queries, data = bench(func, request_ids)
+            results[func.__name__] = data
+            print(
+                "{:<12} {:>7.2f}s {:>7} queries {:>6} message/attachment "
+                "queries".format(func.__name__, duration, queries, message_queries)
+            )
+        assert sorted(results["per_request"], key=lambda d: d["id"]) == sorted(
+            results["page"], key=lambda d: d["id"]
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+
+if __name__ == "__main__":
+    main()
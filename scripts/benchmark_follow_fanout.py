@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark the follower fan-out of batch follow updates.
+
+Creates a test database with requests and 100k confirmed follow
+relations (every tenth follower is a user account, the rest follow by
+email), builds one notification per request like a busy day and
+compares the previous per object follower queries with
+get_follower_updates. Sending the mails is not part of the timing.
+
+Requires the test database server (PostGIS) of the Test configuration.
+
+Usage: python scripts/benchmark_follow_fanout.py [--followers 100000] [--requests 2000]
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "froide.settings")
+os.environ.setdefault("DJANGO_CONFIGURATION", "Test")
+
+import configurations  # noqa: E402
+
+configurations.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone, translation  # noqa: E402
+
+from froide.foirequest.tests import factories  # noqa: E402
+from froide.foirequestfollower.models import FoiRequestFollower  # noqa: E402
+from froide.follow.configuration import follow_registry  # noqa: E402
+from froide.follow.models import FollowerItem  # noqa: E402
+from froide.follow.notifications import get_follower_updates  # noqa: E402
+from froide.helper.notifications import Notification, TemplatedEvent  # noqa: E402
+
+
+def get_follower_updates_per_object(notifications):
+    """Previous implementation with one follower query per object."""
+    follower_updates = {}
+
+    def key_func(n):
+        return (n.section, n.object.id, n.timestamp)
+
+    notifications = sorted(notifications, key=key_func)
+    for (section, _obj_id), group in itertools.groupby(
+        notifications, lambda n: (n.section, n.object.id)
+    ):
+        update_list = list(group)
+        content_object = update_list[0].object
+        for configuration in follow_registry.list_by_content_model(
+            content_object.__class__
+        ):
+            if not configuration.wants_update(update_list):
+                continue
+            followers = configuration.model.objects.filter(
+                content_object=content_object, confirmed=True
+            ).select_related("user")
+            for follower in followers:
+                if not any(
+                    n
+                    for n in update_list
+                    if n.user_id is None or n.user_id != follower.user_id
+                ):
+                    continue
+                if follower.user and follower.user.language:
+                    lang = follower.user.language
+                else:
+                    lang = settings.LANGUAGE_CODE
+                with translation.override(lang):
+                    follower_updates.setdefault(follower.get_ident(), []).append(
+                        FollowerItem(
+                            section=section,
+                            content_object=content_object,
+                            object_label=update_list[0].object_label,
+                            unfollow_link=follower.get_unfollow_link(),
+                            events=[n.event.as_text() for n in update_list],
+                        )
+                    )
+    return follower_updates
+
+
+def make_data(follower_count, request_count):
+    users = factories.UserFactory.create_batch(max(1, follower_count // 100))
+    requests = factories.FoiRequestFactory.create_batch(request_count)
+    followers = []
+    for i in range(follower_count):
+        request = requests[i % request_count]
+        if i % 10 == 0:
+            user = users[(i // 10) % len(users)]
+            followers.append(
+                FoiRequestFollower(content_object=request, user=user, confirmed=True)
+            )
+        else:
+            followers.append(
+                FoiRequestFollower(
+                    content_object=request,
+                    email="follower{}@example.org".format(i),
+                    confirmed=True,
+                )
+            )
+    FoiRequestFollower.objects.bulk_create(followers, batch_size=5000)
+    now = timezone.now()
+    return [
+        Notification(
+            section="requests",
+            event_type="message_received",
+            object=request,
+            object_label=request.title,
+            timestamp=now,
+            event=TemplatedEvent(
+                "The request “{title}” received a reply.", title=request.title
+            ),
+            user_id=None,
+        )
+        for request in requests
+    ]
+
+
+def summarize(follower_updates):
+    return {
+        ident: sorted((item.content_object.id, item.unfollow_link) for item in items)
+        for ident, items in follower_updates.items()
+    }
+
+
+def bench(func, notifications):
+    reset_queries()
+    start = time.monotonic()
+    result = func(notifications)
+    duration = time.monotonic() - start
+    return result, duration, len(connection.queries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--followers", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.force_debug_cursor = True
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        notifications = make_data(args.followers, args.requests)
+        results = {}
+        for func in (get_follower_updates_per_object, get_follower_updates):
+            result, duration, queries = bench(func, notifications)
+            results[func.__name__] = summarize(result)
+            print(
+                "{:<34} {:>7.2f}s {:>7} queries {:>7} recipients".format(
+                    func.__name__, duration, queries, len(result)
+                )
+            )
+        assert (
+            results["get_follower_updates_per_object"]
+            == results["get_follower_updates"]
+        )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+
+if __name__ == "__main__":
+    main()
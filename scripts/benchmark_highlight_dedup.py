@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark highlight snippet de-duplication of search results.
+
+Compares the plain difflib comparison against every kept snippet with the
+fingerprint based SimilarSnippetSet on the highlight payloads from the
+search tests, once per payload and once for a page of 25 hits with many
+highlighted fragments each.
+
+Usage: python scripts/benchmark_highlight_dedup.py [--number N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "froide.settings")
+os.environ.setdefault("DJANGO_CONFIGURATION", "Test")
+
+import configurations  # noqa: E402
+
+configurations.setup()
+
+from froide.helper.search.queryset import (  # noqa: E402
+    SimilarSnippetSet,
+    filter_highlight_snippet,
+    has_similar_match,
+)
+from froide.helper.tests.testdata.search_highlights import (  # noqa: E402
+    search_highlight_tests,
+)
+
+
+def dedup_difflib(snippets):
+    highlighted = set()
+    result = []
+    for snippet in snippets:
+        for s in filter_highlight_snippet(snippet):
+            if not has_similar_match(s, highlighted):
+                result.append(s)
+            highlighted.add(s)
+    return result
+
+
+def dedup_fingerprint(snippets):
+    highlighted = SimilarSnippetSet()
+    result = []
+    for snippet in snippets:
+        for s in filter_highlight_snippet(snippet):
+            if not highlighted.has_similar(s):
+                result.append(s)
+            highlighted.add(s)
+    return result
+
+
+def bench(name, payloads, number):
+    for payload in payloads:
+        assert dedup_difflib(payload) == dedup_fingerprint(payload)
+    timings = {}
+    for func in (dedup_difflib, dedup_fingerprint):
+        timer = timeit.Timer(lambda func=func: [func(p) for p in payloads])
+        timings[func.__name__] = min(timer.repeat(repeat=5, number=number)) / number
+    difflib_time = timings["dedup_difflib"]
+    fingerprint_time = timings["dedup_fingerprint"]
+    print(
+        "{:<28} difflib {:>9.1f} µs  fingerprint {:>9.1f} µs  speedup {:>5.1f}x".format(
+            name,
+            difflib_time * 1e6,
+            fingerprint_time * 1e6,
+            difflib_time / fingerprint_time,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = [highlight_list for highlight_list, _ in search_highlight_tests]
+    for i, payload in enumerate(payloads):
+        bench("payload {}".format(i), [payload], args.number)
+
+    # Results page with long attachment texts: every hit returns all
+    # fragments of all payloads
+    page = [[s for p in payloads for s in p] for _ in range(25)]
+    bench("page of 25 hits", page, max(1, args.number // 20))
+
+
+if __name__ == "__main__":
+    main()
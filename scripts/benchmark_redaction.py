@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark redaction of user strings in message bodies.
+
+Compares consecutive replace_word/replace_custom passes with the cached
+RedactionEngine behind redact_user_strings on the plain text bodies of the
+test mails, with the user's name inserted like in real correspondence.
+
+Usage: python scripts/benchmark_redaction.py [--number N]
+"""
+
+import argparse
+import email
+import os
+import re
+import sys
+import timeit
+from email import policy
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "froide.settings")
+os.environ.setdefault("DJANGO_CONFIGURATION", "Test")
+
+import configurations  # noqa: E402
+
+configurations.setup()
+
+from froide.helper.text_utils import (  # noqa: E402
+    redact_user_strings,
+    replace_custom,
+    replace_word,
+)
+
+TESTDATA = ROOT / "froide" / "foirequest" / "tests" / "testdata"
+
+NAME = "<< Name removed >>"
+USER_REPLACEMENTS = [
+    ("Musterstraße 12", "<< Address removed >>"),
+    ("10115 Berlin", "<< Address removed >>"),
+    ("max.mustermann@example.org", "<< Email removed >>"),
+    (re.compile(r"Sehr geehrter? (?:Herr|Frau) (\w+)"), NAME),
+    ("Mustermann", NAME),
+    ("Max", NAME),
+    ("Max Mustermann", NAME),
+    ("Mustermann Consulting GmbH", NAME),
+]
+
+
+def load_corpus():
+    bodies = []
+    for path in sorted(TESTDATA.glob("test_mail_*.txt")):
+        with open(path, "rb") as f:
+            msg = email.message_from_binary_file(f, policy=policy.default)
+        part = msg.get_body(preferencelist=("plain", "html"))
+        if part is None:
+            continue
+        try:
+            body = part.get_content()
+        except (LookupError, UnicodeDecodeError):
+            continue
+        bodies.append(
+            "Sehr geehrter Herr Mustermann,\n\n{}\n\nMit freundlichen Grüßen\n"
+            "Max Mustermann\nMusterstraße 12\n10115 Berlin".format(body)
+        )
+    return bodies
+
+
+def redact_sequential(content, user_replacements):
+    for needle, repl in user_replacements:
+        if isinstance(needle, str):
+            content = replace_word(needle, repl, content)
+        else:
+            content = replace_custom(needle, repl, content)
+    return content
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    for body in corpus:
+        assert redact_sequential(body, USER_REPLACEMENTS) == redact_user_strings(
+            body, USER_REPLACEMENTS
+        )
+
+    timings = {}
+    for func in (redact_sequential, redact_user_strings):
+        timer = timeit.Timer(
+            lambda func=func: [func(body, USER_REPLACEMENTS) for body in corpus]
+        )
+        timings[func.__name__] = (
+            min(timer.repeat(repeat=5, number=args.number)) / args.number
+        )
+
+    size = sum(len(body) for body in corpus)
+    print("{} message bodies, {} characters".format(len(corpus), size))
+    for name, seconds in timings.items():
+        print(
+            "{:<22} {:>9.1f} µs per corpus  {:>7.1f} MB/s".format(
+                name, seconds * 1e6, size / seconds / 1e6
+            )
+        )
+    print(
+        "speedup {:.1f}x".format(
+            timings["redact_sequential"] / timings["redact_user_strings"]
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
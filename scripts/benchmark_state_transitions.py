@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark the daily request state transitions.
+
+Creates a test database with requests that fell asleep and requests
+that became overdue on the same day and compares the previous per
+request set_asleep/set_overdue loop with the batched transitions of
+detect_asleep and detect_overdue. Both runs use their own requests;
+statuses, events and notification mails are checked to be the same.
+Search index updates are counted as scheduled index tasks with the
+realtime search signal processor connected.
+
+Requires the test database server (PostGIS) of the Test configuration.
+
+Usage: python scripts/benchmark_state_transitions.py [--requests 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "froide.settings")
+os.environ.setdefault("DJANGO_CONFIGURATION", "Test")
+
+import configurations  # noqa: E402
+
+configurations.setup()
+
+from django.core import mail  # noqa: E402
+from django.db import connection, reset_queries, transaction  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from froide.foirequest.models import FoiEvent, FoiRequest  # noqa: E402
+from froide.foirequest.tasks import get_request_batches  # noqa: E402
+from froide.foirequest.tests import factories  # noqa: E402
+from froide.helper import tasks as helper_tasks  # noqa: E402
+from froide.helper.search.signal_processor import realtime_search  # noqa: E402
+
+
+def make_data(request_count):
+    now = timezone.now()
+    asleep = factories.FoiRequestFactory.create_batch(
+        request_count,
+        status=FoiRequest.STATUS.AWAITING_RESPONSE,
+        last_message=now - timedelta(days=31 * 6),
+    )
+    overdue = factories.FoiRequestFactory.create_batch(
+        request_count,
+        status=FoiRequest.STATUS.AWAITING_RESPONSE,
+        due_date=now - timedelta(hours=5),
+    )
+    return [fr.id for fr in asleep], [fr.id for fr in overdue]
+
+
+def per_request(asleep_ids, overdue_ids):
+    """Previous implementation with one transition per request."""
+    for foirequest in FoiRequest.objects.filter(id__in=asleep_ids):
+        foirequest.set_asleep()
+    for foirequest in FoiRequest.objects.filter(id__in=overdue_ids):
+        foirequest.set_overdue()
+
+
+def batched(asleep_ids, overdue_ids):
+    for batch in get_request_batches(FoiRequest.objects.filter(id__in=asleep_ids)):
+        with transaction.atomic():
+            FoiRequest.objects.bulk_set_asleep(batch)
+    for batch in get_request_batches(FoiRequest.objects.filter(id__in=overdue_ids)):
+        with transaction.atomic():
+            FoiRequest.objects.bulk_set_overdue(batch)
+
+
+def get_outcome(asleep_ids, overdue_ids):
+    return (
+        FoiRequest.objects.filter(
+            id__in=asleep_ids, status=FoiRequest.STATUS.ASLEEP
+        ).count(),
+        FoiEvent.objects.filter(
+            request_id__in=overdue_ids, event_name=FoiEvent.EVENTS.BECAME_OVERDUE
+        ).count(),
+        len(mail.outbox),
+    )
+
+
+def bench(func, asleep_ids, overdue_ids):
+    mail.outbox = []
+    reset_queries()
+    with (
+        realtime_search(),
+        mock.patch.object(helper_tasks.search_instances_save, "apply_async") as task,
+    ):
+        start = time.monotonic()
+        func(asleep_ids, overdue_ids)
+        duration = time.monotonic() - start
+    return duration, len(connection.queries), task.call_count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.force_debug_cursor = True
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        factories.make_world()
+        outcomes = {}
+        for func in (per_request, batched):
+            asleep_ids, overdue_ids = make_data(args.requests)
+            duration, queries, index_tasks = bench(func, asleep_ids, overdue_ids)
+            outcomes[func.__name__] = get_outcome(asleep_ids, overdue_ids)
+            print(
+                "{:<12} {:>7.2f}s {:>7} queries {:>6} index tasks "
+                "{:>6} asleep {:>6} overdue events {:>6} mails".format(
+                    func.__name__,
+                    duration,
+                    queries,
+                    index_tasks,
+                    *outcomes[func.__name__],
+                )
+            )
+        assert outcomes["per_request"] == outcomes["batched"]
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for streaming request packages.
+
+Builds a synthetic request with many scanned PDF sized attachments
+(sparse files on disk, 2 GB in total by default), streams it through
+stream_zip like the download views do and reports the peak of Python
+allocations and the resident set size. With --in-memory the previous
+BytesIO based packaging is measured for comparison, use a smaller
+--size-mb for that.
+
+Usage: python scripts/benchmark_zip_stream.py [--size-mb 2048] [--files 200]
+"""
+
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "froide.settings")
+os.environ.setdefault("DJANGO_CONFIGURATION", "Test")
+
+import configurations  # noqa: E402
+
+configurations.setup()
+
+from django.core.files import File  # noqa: E402
+
+from froide.helper.zip_utils import stream_zip  # noqa: E402
+
+
+def make_files(directory, total_size, count):
+    size = total_size // count
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, "scan_%03d.pdf" % i)
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.4\n")
+            f.truncate(size)
+        paths.append(path)
+    return paths
+
+
+def package_streaming(paths):
+    def members():
+        yield ("1/_1.pdf", b"%PDF-1.4\n" * 1000)
+        for path in paths:
+            yield ("1/%s" % os.path.basename(path), File(open(path, "rb")))
+
+    size = 0
+    for chunk in stream_zip(members()):
+        size += len(chunk)
+    return size
+
+
+def package_in_memory(paths):
+    zfile_obj = BytesIO()
+    zfile = zipfile.ZipFile(zfile_obj, "w")
+    zfile.writestr("1/_1.pdf", b"%PDF-1.4\n" * 1000)
+    for path in paths:
+        with open(path, "rb") as f:
+            zfile.writestr("1/%s" % os.path.basename(path), f.read())
+    zfile.close()
+    return len(zfile_obj.getvalue())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--in-memory", action="store_true")
+    args = parser.parse_args()
+
+    func = package_in_memory if args.in_memory else package_streaming
+    with tempfile.TemporaryDirectory() as directory:
+        paths = make_files(directory, args.size_mb * 1024 * 1024, args.files)
+        tracemalloc.start()
+        start = time.monotonic()
+        archive_size = func(paths)
+        duration = time.monotonic() - start
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        "{}: {:.0f} MB archive from {} files in {:.1f}s".format(
+            func.__name__, archive_size / 1024 / 1024, args.files, duration
+        )
+    )
+    print("peak Python allocations {:.1f} MB".format(peak / 1024 / 1024))
+    print("max resident set size {:.1f} MB".format(max_rss))
+
+
+if __name__ == "__main__":
+    main()